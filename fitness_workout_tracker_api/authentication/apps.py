@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fitness_workout_tracker_api.authentication'
+
+    def ready(self):
+        from . import checks  # noqa: F401
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from .models import AuthToken, hash_token_key, token_cache_key
+
+class BearerTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates `Authorization: Bearer <key>` headers.
+
+    Resolved tokens (with their user) are kept in the cache for
+    AUTH_TOKEN_CACHE_TTL seconds, so most requests need no database query
+    to identify the user. Logging out revokes the token and its cache entry,
+    which reaches every process only if the cache is shared (see checks.py).
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        return self.authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        digest = hash_token_key(key)
+        ttl = settings.AUTH_TOKEN_CACHE_TTL
+        token = cache.get(token_cache_key(digest)) if ttl else None
+        if token is None:
+            try:
+                token = AuthToken.objects.select_related('user').get(digest=digest)
+            except AuthToken.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            if ttl:
+                cache.set(token_cache_key(digest), token, ttl)
+
+        if token.is_expired:
+            token.revoke()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (token.user, token)
+
+    def authenticate_header(self, request):
+        return self.keyword
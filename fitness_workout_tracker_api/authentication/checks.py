@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+@register()
+def check_token_cache(app_configs, **kwargs):
+    """
+    Cached tokens outlive their revocation on every process but the one that
+    revoked them unless the cache is shared between processes
+    """
+    if settings.AUTH_TOKEN_CACHE_TTL > 0 and isinstance(caches['default'], LocMemCache):
+        return [
+            Warning(
+                'AUTH_TOKEN_CACHE_TTL is set but the default cache is local to each process, '
+                'so a revoked token stays valid on other workers for up to that many seconds.',
+                hint='Use a shared cache (DJANGO_CACHE_BACKEND=file) or set DJANGO_AUTH_TOKEN_CACHE_TTL=0.',
+                id='authentication.W001',
+            )
+        ]
+    return []
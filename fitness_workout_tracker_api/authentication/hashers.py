@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher whose work factor comes from PASSWORD_HASH_ITERATIONS.
+
+    It keeps the standard `pbkdf2_sha256` algorithm name, so existing hashes
+    still verify. A hash with a different iteration count is rewritten with
+    the configured cost on the user's next successful login (Django calls
+    `must_update` from `check_password`).
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
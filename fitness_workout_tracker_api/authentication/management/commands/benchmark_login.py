@@ -0,0 +1,69 @@
+import math
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+class Command(BaseCommand):
+    help = 'Measure login (authenticate) latency under concurrent load for a PBKDF2 work factor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Total login attempts')
+        parser.add_argument('--concurrency', type=int, default=4, help='Parallel workers')
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            action='append',
+            help='PBKDF2 iterations to benchmark (may be repeated; defaults to the current setting)',
+        )
+
+    def handle(self, *args, **options):
+        username = f'benchmark-{uuid.uuid4().hex[:12]}'
+        password = uuid.uuid4().hex
+        user = User.objects.create_user(username, password=password)
+        try:
+            for iterations in options['iterations'] or [None]:
+                self.run(user, password, iterations, options['requests'], options['concurrency'])
+        finally:
+            user.delete()
+
+    def run(self, user, password, iterations, requests, concurrency):
+        overrides = {} if iterations is None else {'PASSWORD_HASH_ITERATIONS': iterations}
+        with override_settings(**overrides):
+            # Hash the password at the cost being measured, so logins verify
+            # rather than rehash
+            user.set_password(password)
+            user.save(update_fields=['password'])
+
+            def attempt(_):
+                try:
+                    started = time.perf_counter()
+                    authenticated = authenticate(username=user.username, password=password)
+                    latency = time.perf_counter() - started
+                    if authenticated is None:
+                        raise CommandError('Login failed for the benchmark user')
+                    return latency
+                finally:
+                    connection.close()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                latencies = sorted(executor.map(attempt, range(requests)))
+            elapsed = time.perf_counter() - started
+
+        def percentile(p):
+            # Nearest-rank percentile, in milliseconds
+            return latencies[max(0, math.ceil(p / 100 * len(latencies)) - 1)] * 1000
+
+        self.stdout.write(
+            f'iterations={iterations or settings.PASSWORD_HASH_ITERATIONS} '
+            f'requests={requests} concurrency={concurrency} '
+            f'throughput={requests / elapsed:.1f}/s '
+            f'p50={percentile(50):.1f}ms p95={percentile(95):.1f}ms '
+            f'p99={percentile(99):.1f}ms max={latencies[-1] * 1000:.1f}ms'
+        )
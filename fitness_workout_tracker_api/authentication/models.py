@@ -1,3 +1,49 @@
+import hashlib
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+def hash_token_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def token_cache_key(digest):
+    return f'auth:token:{digest}'
+
+class AuthToken(models.Model):
+    """
+    Bearer token issued on login/register. Only a digest of the key is
+    stored, so a leaked database does not leak usable tokens.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='auth_tokens')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Token for {self.user.username}"
+
+    @classmethod
+    def issue(cls, user):
+        """
+        Create a token for `user` and return it together with its key, which
+        is only available at this point
+        """
+        key = secrets.token_urlsafe(32)
+        token = cls.objects.create(
+            digest=hash_token_key(key),
+            user=user,
+            expires_at=timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_LIFETIME),
+        )
+        return token, key
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def revoke(self):
+        cache.delete(token_cache_key(self.digest))
+        self.delete()
@@ -1,3 +1,157 @@
-from django.test import TestCase
+from django.contrib.auth.hashers import identify_hasher
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from io import StringIO
+from unittest import mock
+from .checks import check_token_cache
+from .hashers import ConfigurablePBKDF2PasswordHasher
+from .models import AuthToken
+from .throttling import AuthIPRateThrottle, AuthUsernameRateThrottle
 
-# Create your tests here.
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/auth/login/', {'username': 'user1', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['token']
+
+    def test_login_and_register_issue_tokens(self):
+        """Test that login and register return a usable bearer token"""
+        token = self.login()
+        self.assertTrue(AuthToken.objects.filter(user=self.user).exists())
+
+        response = self.client.post('/auth/register/', {'username': 'newuser', 'password': 'a-Strong-pass-42'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('token', response.data)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.get('/exercises/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(AUTH_TOKEN_CACHE_TTL=300)
+    def test_cached_token_needs_no_identity_query(self):
+        """Test that repeated requests resolve the user from the cache"""
+        token = self.login()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        client.get('/sync/', {'limit': 1})
+
+        with CaptureQueriesContext(connection) as context:
+            client.get('/sync/', {'limit': 1})
+
+        identity_queries = [
+            q for q in context.captured_queries
+            if 'authentication_authtoken' in q['sql'] or 'django_session' in q['sql']
+            or 'FROM "auth_user"' in q['sql']
+        ]
+        self.assertEqual(identity_queries, [])
+
+    @override_settings(AUTH_TOKEN_CACHE_TTL=300)
+    def test_logout_revokes_token(self):
+        """Test that logging out with a token revokes it immediately"""
+        token = self.login()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        client.get('/exercises/')
+
+        response = client.post('/auth/logout/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(AuthToken.objects.exists())
+
+        response = client.get('/exercises/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token(self):
+        """Test that unknown tokens are rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        response = self.client.get('/exercises/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_LIFETIME=-1)
+    def test_expired_token(self):
+        """Test that expired tokens are rejected and removed"""
+        token = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        response = self.client.get('/exercises/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(AuthToken.objects.exists())
+
+    def test_token_cache_requires_shared_cache(self):
+        """Test that caching tokens in a per-process cache is reported"""
+        with override_settings(AUTH_TOKEN_CACHE_TTL=300):
+            self.assertEqual([w.id for w in check_token_cache(None)], ['authentication.W001'])
+        with override_settings(AUTH_TOKEN_CACHE_TTL=0):
+            self.assertEqual(check_token_cache(None), [])
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class LoginCostTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+
+    def login(self, username='user1', password='password123'):
+        return self.client.post('/auth/login/', {'username': username, 'password': password})
+
+    def test_password_is_rehashed_with_configured_cost(self):
+        """Test that logging in upgrades hashes to the configured work factor"""
+        self.assertIn('$1000$', self.user.password)
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password('password123'))
+
+    def test_pbkdf2_hashes_use_configurable_hasher(self):
+        """Test that stored PBKDF2 hashes resolve to the configurable hasher"""
+        self.assertIsInstance(identify_hasher(self.user.password), ConfigurablePBKDF2PasswordHasher)
+
+    @mock.patch.object(AuthUsernameRateThrottle, 'rate', '2/min', create=True)
+    def test_login_is_throttled_per_username(self):
+        """Test that repeated attempts on one username are throttled"""
+        self.assertEqual(self.login(password='wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login(password='wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        response = self.login(username='someone-else')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @mock.patch.object(AuthIPRateThrottle, 'rate', '3/min', create=True)
+    def test_login_and_register_are_throttled_per_ip(self):
+        """Test that attempts from one address are throttled across usernames"""
+        for username in ('a', 'b', 'c'):
+            self.assertEqual(self.login(username=username).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post('/auth/register/', {'username': 'newuser', 'password': 'a-Strong-pass-42'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(User.objects.filter(username='newuser').exists())
+
+    @mock.patch(
+        'fitness_workout_tracker_api.authentication.management.commands.benchmark_login.authenticate',
+        return_value=None,
+    )
+    def test_login_benchmark_fails_on_rejected_logins(self, authenticate):
+        """Test that the login benchmark stops when a login fails, also under python -O"""
+        with self.assertRaisesMessage(CommandError, 'Login failed'):
+            call_command('benchmark_login', requests=2, concurrency=1, stdout=StringIO())
+        self.assertTrue(authenticate.called)
+        self.assertFalse(User.objects.filter(username__startswith='benchmark-').exists())
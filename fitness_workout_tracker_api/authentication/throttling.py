@@ -0,0 +1,30 @@
+import hashlib
+from rest_framework.throttling import SimpleRateThrottle
+
+class AuthIPRateThrottle(SimpleRateThrottle):
+    """
+    Limits login/register attempts per client IP address
+    """
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+class AuthUsernameRateThrottle(SimpleRateThrottle):
+    """
+    Limits login/register attempts per target username, whichever IP they
+    come from
+    """
+    scope = 'auth_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': hashlib.sha256(str(username).lower().encode()).hexdigest(),
+        }
@@ -4,7 +4,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import login, logout, authenticate
+from .models import AuthToken
 from .serializers import UserSerializer
+from .throttling import AuthIPRateThrottle, AuthUsernameRateThrottle
 
 class AuthViewSet(viewsets.GenericViewSet):
     """
@@ -13,18 +15,21 @@ class AuthViewSet(viewsets.GenericViewSet):
     serializer_class = UserSerializer
     permission_classes = (AllowAny,)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[AuthIPRateThrottle, AuthUsernameRateThrottle])
     def register(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         login(request, user)  # Automatically log in after registration
+        token, key = AuthToken.issue(user)
         return Response({
             "message": "User created and logged in successfully",
-            "username": user.username
+            "username": user.username,
+            "token": key,
+            "expires_at": token.expires_at
         }, status=status.HTTP_201_CREATED)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[AuthIPRateThrottle, AuthUsernameRateThrottle])
     def login(self, request):
         username = request.data.get('username')
         password = request.data.get('password')
@@ -32,9 +37,12 @@ class AuthViewSet(viewsets.GenericViewSet):
         
         if user is not None:
             login(request, user)
+            token, key = AuthToken.issue(user)
             return Response({
                 "message": "Login successful",
-                "username": username
+                "username": username,
+                "token": key,
+                "expires_at": token.expires_at
             })
         return Response({
             "message": "Invalid credentials"
@@ -42,6 +50,8 @@ class AuthViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def logout(self, request):
+        if isinstance(request.auth, AuthToken):
+            request.auth.revoke()
         logout(request)
         return Response({
             "message": "Successfully logged out."
@@ -0,0 +1,63 @@
+"""
+Database routing for read replicas.
+
+Reads go to a replica only while a view has opted in for the current
+request (see ReplicaReadMixin in workouts/views.py). Everything else, and
+every read after a write in the same request, uses the primary. After a
+user writes, their reads stay on the primary for REPLICA_STICKY_SECONDS so
+they see their own changes despite replication lag. That pin lives in the
+default cache, which must be shared between the server processes for it to
+hold on all of them (checks.py in the workouts app warns otherwise).
+"""
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+def _pin_key(user_id):
+    return f'db:primary:{user_id}'
+
+def start_replica_reads(user_id):
+    """
+    Allow reads of the current request to use a replica, unless the user
+    wrote recently. Returns a token for end_replica_reads().
+    """
+    enabled = bool(settings.REPLICA_DATABASES) and not cache.get(_pin_key(user_id))
+    return _replica_reads.set(enabled)
+
+def end_replica_reads(token):
+    _replica_reads.reset(token)
+
+def pin_to_primary(user_id):
+    """
+    Keep the user's reads on the primary for REPLICA_STICKY_SECONDS
+    """
+    if settings.REPLICA_DATABASES:
+        cache.set(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+def reading_from_replica():
+    return _replica_reads.get()
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return random.choice(settings.REPLICA_DATABASES)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Reads later in the same request must see this write
+        _replica_reads.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        return db == DEFAULT_DB_ALIAS
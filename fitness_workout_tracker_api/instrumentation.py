@@ -0,0 +1,250 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware measures wall time, database queries (count and
+time, on every configured database) and response size for each request,
+InstrumentedSerializerMixin (through the InstrumentedSerializer and
+InstrumentedModelSerializer base classes) adds the time spent serializing, and
+TimedJSONRenderer the time spent rendering JSON. The figures are returned
+in a `Server-Timing` header, aggregated per endpoint for the Prometheus
+metrics endpoint, and requests slower than SLOW_REQUEST_THRESHOLD
+milliseconds are logged with their queries.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = ContextVar('request_metrics', default=None)
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db_time += duration
+            self.queries.append((sql, duration))
+
+class InstrumentedSerializerMixin:
+    """
+    Counts the time spent in to_representation (excluding queries it
+    triggers) as serialization time. Nested and per-item calls within an
+    outer serializer are not counted twice.
+    """
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+
+        metrics.serializing = True
+        started = time.perf_counter()
+        db_time = metrics.db_time
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializing = False
+            metrics.serialize_time += time.perf_counter() - started - (metrics.db_time - db_time)
+
+class InstrumentedSerializer(InstrumentedSerializerMixin, serializers.Serializer):
+    """
+    Base class of the project's serializers (tests check that every one
+    derives from InstrumentedSerializerMixin)
+    """
+
+class InstrumentedModelSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    pass
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics.render_time += time.perf_counter() - started
+
+class MetricsRegistry:
+    """
+    Per-endpoint aggregates for this process
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.sums = defaultdict(lambda: defaultdict(float))
+
+    def record(self, method, route, status_code, metrics, duration, size):
+        endpoint = (method, route)
+        with self.lock:
+            self.requests[endpoint + (str(status_code),)] += 1
+            buckets = self.buckets[endpoint]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+            sums = self.sums[endpoint]
+            sums['duration'] += duration
+            sums['count'] += 1
+            sums['db_queries'] += len(metrics.queries)
+            sums['db_duration'] += metrics.db_time
+            sums['serialize_duration'] += metrics.serialize_time
+            sums['render_duration'] += metrics.render_time
+            sums['response_bytes'] += size
+
+    def render(self):
+        """
+        Return the aggregates in the Prometheus text exposition format
+        """
+        def labels(**values):
+            return ','.join(f'{key}="{escape(value)}"' for key, value in values.items())
+
+        with self.lock:
+            lines = [
+                '# HELP http_requests_total Requests by endpoint and status code.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (method, route, status_code), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{labels(method=method, view=route, status=status_code)}}} {count}')
+
+            lines += [
+                '# HELP http_request_duration_seconds Wall time of requests by endpoint.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (method, route), buckets in sorted(self.buckets.items()):
+                endpoint = labels(method=method, view=route)
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{{endpoint},le="{bound}"}} {count}')
+                sums = self.sums[(method, route)]
+                lines.append(f'http_request_duration_seconds_bucket{{{endpoint},le="+Inf"}} {int(sums["count"])}')
+                lines.append(f'http_request_duration_seconds_sum{{{endpoint}}} {sums["duration"]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{endpoint}}} {int(sums["count"])}')
+
+            for name, key, help_text in [
+                ('http_request_db_queries_total', 'db_queries', 'Database queries issued by endpoint.'),
+                ('http_request_db_duration_seconds_total', 'db_duration', 'Time spent in database queries by endpoint.'),
+                ('http_request_serialize_duration_seconds_total', 'serialize_duration', 'Time spent serializing by endpoint.'),
+                ('http_request_render_duration_seconds_total', 'render_duration', 'Time spent rendering by endpoint.'),
+                ('http_response_size_bytes_total', 'response_bytes', 'Response body bytes by endpoint.'),
+            ]:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (method, route), sums in sorted(self.sums.items()):
+                    value = sums[key]
+                    value = int(value) if key in ('db_queries', 'response_bytes') else f'{value:.6f}'
+                    lines.append(f'{name}{{{labels(method=method, view=route)}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+registry = MetricsRegistry()
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper installed on every connection. Queries are
+    attributed through the context variable rather than the connection, so
+    those an async view runs in a worker thread (on that thread's
+    connection) count towards its request too.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+connection_created.connect(install_query_recorder)
+
+class PerformanceMiddleware:
+    """
+    Should come first in MIDDLEWARE so that its wall time covers the rest.
+    Runs natively in sync and async chains, so async views are not pushed
+    through a thread by it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self.start()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.start()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def start(self):
+        # Connections opened later get the recorder from connection_created
+        for alias in connections:
+            install_query_recorder(connections[alias])
+        return RequestMetrics()
+
+    def finish(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.started
+        size = 0 if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{len(metrics.queries)} queries"',
+            f'serialize;dur={metrics.serialize_time * 1000:.1f}',
+            f'render;dur={metrics.render_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ])
+
+        match = request.resolver_match
+        route = (match.view_name or match.route) if match is not None else 'unmatched'
+        registry.record(request.method, route, response.status_code, metrics, duration, size)
+
+        threshold = settings.SLOW_REQUEST_THRESHOLD
+        if threshold and duration * 1000 >= threshold:
+            logger.warning(
+                'Slow request: %s %s took %.1fms (%d queries, %.1fms in database)\n%s',
+                request.method,
+                request.get_full_path(),
+                duration * 1000,
+                len(metrics.queries),
+                metrics.db_time * 1000,
+                '\n'.join(f'  {query_time * 1000:.1f}ms {sql}' for sql, query_time in metrics.queries),
+            )
+        return response
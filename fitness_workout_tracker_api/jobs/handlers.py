@@ -0,0 +1,88 @@
+import codecs
+import tempfile
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from fitness_workout_tracker_api.workouts.caching import invalidate_user_cache
+from fitness_workout_tracker_api.workouts.export import csv_rows, ndjson_rows
+from fitness_workout_tracker_api.workouts.imports import import_workouts
+from fitness_workout_tracker_api.workouts.models import Workout, WorkoutExercise, Comment
+from fitness_workout_tracker_api.workouts.summaries import rebuild_daily_summaries
+from .models import Job
+
+# Workouts deleted per transaction when deleting an account
+DELETE_BATCH_SIZE = 500
+
+HANDLERS = {}
+
+def handler(kind, max_attempts=None):
+    """
+    Register the decorated function as the handler of `kind` jobs. It is
+    called with the job and returns a JSON-serializable result. Handlers
+    that are not safe to run twice set `max_attempts=1`.
+    """
+    def register(func):
+        HANDLERS[kind] = (func, max_attempts)
+        return func
+    return register
+
+def enqueue(kind, user=None, payload=None):
+    _, max_attempts = HANDLERS[kind]
+    return Job.enqueue(kind, user=user, payload=payload, max_attempts=max_attempts)
+
+def run(job):
+    func, _ = HANDLERS[job.kind]
+    return func(job)
+
+@handler('export')
+def export_history(job):
+    rows = csv_rows(job.user) if job.payload['type'] == 'csv' else ndjson_rows(job.user)
+    with tempfile.TemporaryFile() as handle:
+        for row in rows:
+            handle.write(row if isinstance(row, bytes) else row.encode())
+        handle.seek(0)
+        name = default_storage.save(f"exports/workouts-{job.pk}.{job.payload['type']}", File(handle))
+    return {'file': name, 'type': job.payload['type']}
+
+# A retry would insert the batches of the failed attempt a second time
+@handler('import', max_attempts=1)
+def import_history(job):
+    try:
+        with default_storage.open(job.payload['file'], 'rb') as handle:
+            return import_workouts(job.user, codecs.iterdecode(handle, 'utf-8-sig'), job.payload['type'])
+    finally:
+        default_storage.delete(job.payload['file'])
+
+@handler('rebuild_summaries')
+def rebuild_summaries(job):
+    rebuild_daily_summaries([job.user])
+    return {}
+
+@handler('delete_account')
+def delete_account(job):
+    """
+    Delete the user and everything they own. Workouts go in batches, so no
+    single transaction has to cascade through the whole history.
+    """
+    user = job.user
+    if user is None:
+        # Deleted by an earlier attempt
+        return {'workouts': 0}
+
+    for token in user.auth_tokens.all():
+        token.revoke()
+    deleted = 0
+    workouts = Workout.objects.filter(user=user)
+    while True:
+        ids = list(workouts.values_list('id', flat=True)[:DELETE_BATCH_SIZE])
+        if not ids:
+            break
+        with transaction.atomic():
+            WorkoutExercise.objects.filter(workout_id__in=ids).delete()
+            Comment.objects.filter(workout_id__in=ids).delete()
+            Workout.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+    user_id = user.pk
+    user.delete()
+    invalidate_user_cache(user_id)
+    return {'workouts': deleted}
@@ -0,0 +1,79 @@
+import os
+import socket
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from fitness_workout_tracker_api.jobs.worker import work
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs. Start several processes to spread the work further.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1, help='Jobs run in parallel by this process')
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Seconds to wait when the queue is empty',
+        )
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        stop = threading.Event()
+        lock = threading.Lock()
+
+        def on_job(worker_id, job):
+            with lock:
+                self.stdout.write(f'{worker_id} {job.kind} job {job.pk}: {job.status}')
+
+        def on_maintenance(worker_id, requeued, failed, purged):
+            with lock:
+                self.stdout.write(
+                    f'{worker_id} requeued {requeued} and failed {failed} stale job(s), purged {purged} expired job(s)'
+                )
+
+        def run(worker_id):
+            try:
+                work(
+                    worker_id,
+                    stop,
+                    options['poll_interval'],
+                    burst=options['burst'],
+                    on_job=on_job,
+                    on_maintenance=on_maintenance,
+                )
+            finally:
+                connection.close()
+
+        if options['concurrency'] <= 1:
+            # Run in the current thread (and on its database connection)
+            try:
+                work(
+                    f'{prefix}:0',
+                    stop,
+                    options['poll_interval'],
+                    burst=options['burst'],
+                    on_job=on_job,
+                    on_maintenance=on_maintenance,
+                )
+            except KeyboardInterrupt:
+                pass
+            return
+
+        threads = [
+            threading.Thread(target=run, args=(f'{prefix}:{i}',), daemon=True)
+            for i in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            # Let running jobs finish
+            stop.set()
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,178 @@
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+class Job(models.Model):
+    """
+    Unit of background work, stored in the database and executed by the
+    `run_jobs` worker command. Any number of workers may poll the table;
+    a job is claimed with a conditional UPDATE, so only one of them runs it.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    # Kept when the user is deleted, so account deletion jobs can finish
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=1)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['status', 'run_after', 'id'], name='job_status_run_after_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='job_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.pk} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, kind, user=None, payload=None, max_attempts=None):
+        return cls.objects.create(
+            kind=kind,
+            user=user,
+            payload=payload or {},
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        )
+
+    @classmethod
+    def claim(cls, worker_id):
+        """
+        Mark the next due job as running for `worker_id` and return it, or
+        return None when no job is due
+        """
+        now = timezone.now()
+        due = (
+            cls.objects
+            .filter(status=cls.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'id')
+            .values_list('id', flat=True)[:10]
+        )
+        for job_id in due:
+            claimed = cls.objects.filter(id=job_id, status=cls.QUEUED).update(
+                status=cls.RUNNING,
+                locked_by=worker_id,
+                started_at=now,
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                return cls.objects.get(id=job_id)
+        return None
+
+    @classmethod
+    def requeue_stale(cls):
+        """
+        Return jobs left running by a worker that died to the queue, or mark
+        them failed when they have no attempts left (jobs that are not safe
+        to run twice have a single attempt). Return the numbers of requeued
+        and failed jobs.
+        """
+        now = timezone.now()
+        stale = cls.objects.filter(
+            status=cls.RUNNING,
+            started_at__lt=now - timedelta(seconds=settings.JOB_TIMEOUT)
+        )
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=cls.FAILED,
+            locked_by='',
+            error=f'The worker stopped responding (no result after {settings.JOB_TIMEOUT} seconds)',
+            finished_at=now,
+        )
+        requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+            status=cls.QUEUED,
+            locked_by='',
+            run_after=now,
+        )
+        return requeued, failed
+
+    @classmethod
+    def purge_expired(cls, batch_size=500):
+        """
+        Delete jobs that finished more than JOB_RETENTION_DAYS ago, with the
+        files they left in storage (export results, unprocessed uploads),
+        and return how many were deleted
+        """
+        if not settings.JOB_RETENTION_DAYS:
+            return 0
+        expired = cls.objects.filter(
+            status__in=[cls.SUCCEEDED, cls.FAILED],
+            finished_at__lt=timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS)
+        )
+        deleted = 0
+        while True:
+            jobs = list(expired.values('id', 'payload', 'result')[:batch_size])
+            if not jobs:
+                return deleted
+            for job in jobs:
+                for data in (job['payload'], job['result']):
+                    if isinstance(data, dict) and data.get('file'):
+                        default_storage.delete(data['file'])
+            deleted += cls.objects.filter(id__in=[job['id'] for job in jobs]).delete()[0]
+
+    def succeed(self, result):
+        self.status = self.SUCCEEDED
+        self.result = result
+        self.error = ''
+        self.finished_at = timezone.now()
+        self._save_state()
+
+    def fail(self, error):
+        """
+        Record a failed attempt. The job is queued again after an
+        exponentially growing delay until it runs out of attempts.
+        """
+        self.error = error
+        if self.attempts < self.max_attempts:
+            self.status = self.QUEUED
+            self.run_after = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_DELAY * 2 ** (self.attempts - 1)
+            )
+        else:
+            self.status = self.FAILED
+            self.finished_at = timezone.now()
+        self._save_state()
+
+    def retry(self):
+        """
+        Queue a failed job again with a fresh set of attempts
+        """
+        self.status = self.QUEUED
+        self.attempts = 0
+        self.error = ''
+        self.run_after = timezone.now()
+        self.finished_at = None
+        self._save_state()
+
+    def _save_state(self):
+        # A plain save() would write back the user of a job that deleted it
+        Job.objects.filter(pk=self.pk).update(
+            status=self.status,
+            result=self.result,
+            error=self.error,
+            attempts=self.attempts,
+            run_after=self.run_after,
+            locked_by='',
+            finished_at=self.finished_at,
+        )
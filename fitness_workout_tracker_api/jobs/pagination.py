@@ -0,0 +1,4 @@
+from fitness_workout_tracker_api.workouts.pagination import KeysetPagination
+
+class JobPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
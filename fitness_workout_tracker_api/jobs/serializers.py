@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from fitness_workout_tracker_api.instrumentation import InstrumentedModelSerializer, InstrumentedSerializer
+from .models import Job
+
+class JobSerializer(InstrumentedModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'payload', 'result', 'error', 'attempts', 'max_attempts',
+                  'run_after', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+class JobCreateSerializer(InstrumentedSerializer):
+    """
+    Validates a job request. Exports and imports take a `type` (ndjson or
+    csv, for imports defaulting to the file extension) and imports a `file`.
+    """
+    kind = serializers.ChoiceField(choices=['export', 'import', 'rebuild_summaries', 'delete_account'])
+    type = serializers.ChoiceField(choices=['ndjson', 'csv'], required=False)
+    file = serializers.FileField(required=False)
+
+    def validate(self, attrs):
+        if attrs['kind'] == 'export':
+            attrs.setdefault('type', 'ndjson')
+        if attrs['kind'] == 'import':
+            if 'file' not in attrs:
+                raise serializers.ValidationError({'file': ["This field is required."]})
+            if 'type' not in attrs:
+                extension = attrs['file'].name.rsplit('.', 1)[-1].lower()
+                if extension not in ('ndjson', 'csv'):
+                    raise serializers.ValidationError("Pass type=csv or type=ndjson for this file name")
+                attrs['type'] = extension
+        return attrs
@@ -0,0 +1,222 @@
+import shutil
+import tempfile
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from fitness_workout_tracker_api.authentication.models import AuthToken
+from fitness_workout_tracker_api.workouts.models import Exercise, Workout, WorkoutExercise, Comment
+from . import handlers, worker
+from .models import Job
+
+class JobTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, JOB_RETRY_DELAY=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        squat = Exercise.objects.create(user=self.user, name='Squat')
+        for i in range(3):
+            workout = Workout.objects.create(
+                user=self.user,
+                title=f'Workout {i}',
+                date=date(2024, 1, 1 + i),
+                duration=45
+            )
+            WorkoutExercise.objects.create(workout=workout, exercise=squat, sets=5, reps=5, weight=100, order=1)
+            Comment.objects.create(workout=workout, user=self.user, text='Solid')
+
+    def run_jobs(self):
+        call_command('run_jobs', '--burst', stdout=StringIO())
+
+    def test_export_job(self):
+        """Test that an export job produces the same file as the export endpoint"""
+        response = self.client.post('/jobs/', {'kind': 'export', 'type': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Job.QUEUED)
+        job_id = response.data['id']
+
+        self.run_jobs()
+
+        response = self.client.get(f'/jobs/{job_id}/')
+        self.assertEqual(response.data['status'], Job.SUCCEEDED)
+        download = self.client.get(f'/jobs/{job_id}/download/')
+        expected = self.client.get('/workouts/export/?type=csv')
+        self.assertEqual(b''.join(download.streaming_content), b''.join(expected.streaming_content))
+
+    def test_import_job(self):
+        """Test that an uploaded file is imported by the worker and removed"""
+        upload = SimpleUploadedFile(
+            'history.csv',
+            b'date,title,duration,exercise,sets,reps,weight\n2024-02-01,Imported,30,Deadlift,1,5,140\n'
+        )
+        response = self.client.post('/jobs/', {'kind': 'import', 'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        stored = response.data['payload']['file']
+        self.assertTrue(default_storage.exists(stored))
+
+        self.run_jobs()
+
+        job = Job.objects.get(id=response.data['id'])
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result['workouts'], 1)
+        self.assertTrue(Workout.objects.filter(user=self.user, title='Imported').exists())
+        self.assertFalse(default_storage.exists(stored))
+
+    def test_failing_job_is_retried_then_failed(self):
+        """Test that failures are retried up to the attempt limit and can be requeued"""
+        calls = []
+
+        def flaky(job):
+            calls.append(job.attempts)
+            raise RuntimeError('boom')
+
+        with mock.patch.dict(handlers.HANDLERS, {'flaky': (flaky, 3)}):
+            job = handlers.enqueue('flaky', user=self.user)
+            self.run_jobs()
+
+            job.refresh_from_db()
+            self.assertEqual(calls, [1, 2, 3])
+            self.assertEqual(job.status, Job.FAILED)
+            self.assertIn('RuntimeError: boom', job.error)
+
+            response = self.client.post(f'/jobs/{job.id}/retry/')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response.data['status'], Job.QUEUED)
+            self.assertEqual(response.data['attempts'], 0)
+
+    def test_unsafe_jobs_are_not_retried(self):
+        """Test that jobs registered with a single attempt cannot be requeued"""
+        job = Job.objects.create(user=self.user, kind='import', status=Job.FAILED, max_attempts=1)
+        response = self.client.post(f'/jobs/{job.id}/retry/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delete_account_job(self):
+        """Test that account deletion locks the account at once and removes its data in the worker"""
+        _, key = AuthToken.issue(self.user)
+        response = self.client.post('/jobs/', {'kind': 'delete_account'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        token_client = APIClient()
+        token_client.credentials(HTTP_AUTHORIZATION=f'Bearer {key}')
+        self.assertEqual(token_client.get('/workouts/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.run_jobs()
+
+        job = Job.objects.get(id=response.data['id'])
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertIsNone(job.user)
+        self.assertEqual(job.result, {'workouts': 3})
+        self.assertFalse(User.objects.filter(username='user1').exists())
+        self.assertFalse(Workout.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_job_is_claimed_once(self):
+        """Test that a job can only be claimed by one worker"""
+        job = handlers.enqueue('rebuild_summaries', user=self.user)
+
+        self.assertEqual(Job.claim('worker-a').id, job.id)
+        self.assertIsNone(Job.claim('worker-b'))
+
+    def test_stale_jobs_are_requeued(self):
+        """Test that jobs abandoned by a dead worker return to the queue"""
+        job = handlers.enqueue('rebuild_summaries', user=self.user)
+        Job.claim('worker-a')
+        Job.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(Job.requeue_stale(), (1, 0))
+        self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_stale_jobs_without_attempts_left_fail(self):
+        """Test that a single-attempt job abandoned by a worker is failed, not run again"""
+        job = Job.objects.create(
+            user=self.user,
+            kind='import',
+            payload={'file': 'imports/gone.csv', 'type': 'csv'},
+            max_attempts=1
+        )
+        Job.claim('worker-a')
+        Job.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(days=1))
+
+        out = StringIO()
+        call_command('run_jobs', '--burst', stdout=out)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('stopped responding', job.error)
+        self.assertIn('requeued 0 and failed 1 stale job(s)', out.getvalue())
+
+    @override_settings(JOB_MAINTENANCE_INTERVAL=0)
+    def test_workers_requeue_stale_jobs_while_polling(self):
+        """Test that a running worker picks up jobs abandoned after it started"""
+        stop = threading.Event()
+        job = handlers.enqueue('rebuild_summaries', user=self.user)
+        Job.claim('worker-a')
+
+        waits = []
+
+        def wait(timeout):
+            waits.append(timeout)
+            if len(waits) == 1:
+                # worker-a dies with the job after worker-b started polling
+                Job.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(days=1))
+            else:
+                stop.set()
+
+        with mock.patch.object(stop, 'wait', side_effect=wait):
+            worker.work('worker-b', stop, poll_interval=0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+
+    def test_expired_jobs_are_purged_with_their_files(self):
+        """Test that old finished jobs and their export files are deleted by the worker"""
+        old = handlers.enqueue('export', user=self.user, payload={'type': 'ndjson'})
+        recent = handlers.enqueue('export', user=self.user, payload={'type': 'ndjson'})
+        self.run_jobs()
+        old_file = Job.objects.get(id=old.id).result['file']
+        recent_file = Job.objects.get(id=recent.id).result['file']
+        Job.objects.filter(id=old.id).update(finished_at=timezone.now() - timedelta(days=30))
+
+        out = StringIO()
+        call_command('run_jobs', '--burst', stdout=out)
+
+        self.assertIn('purged 1 expired job(s)', out.getvalue())
+        self.assertEqual(list(Job.objects.values_list('id', flat=True)), [recent.id])
+        self.assertFalse(default_storage.exists(old_file))
+        self.assertTrue(default_storage.exists(recent_file))
+
+        with override_settings(JOB_RETENTION_DAYS=0):
+            Job.objects.update(finished_at=timezone.now() - timedelta(days=365))
+            self.assertEqual(Job.purge_expired(), 0)
+
+    def test_jobs_are_private(self):
+        """Test that users cannot see each other's jobs"""
+        job = handlers.enqueue('rebuild_summaries', user=self.user)
+        other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        client = APIClient()
+        client.force_authenticate(user=other)
+
+        self.assertEqual(client.get(f'/jobs/{job.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(client.get('/jobs/').data['results'], [])
@@ -0,0 +1,78 @@
+import uuid
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .handlers import HANDLERS, enqueue
+from .models import Job
+from .pagination import JobPagination
+from .serializers import JobSerializer, JobCreateSerializer
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Background jobs of the current user: queue new ones and follow their
+    status
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = JobPagination
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+    def create(self, request):
+        """
+        Queue an export, import, summary rebuild or account deletion and
+        return the job with 202 Accepted
+        """
+        serializer = JobCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = serializer.validated_data
+        kind = params['kind']
+        payload = {}
+        if kind == 'export':
+            payload = {'type': params['type']}
+        elif kind == 'import':
+            name = default_storage.save(f"imports/{uuid.uuid4().hex}.{params['type']}", params['file'])
+            payload = {'file': name, 'type': params['type']}
+        elif kind == 'delete_account':
+            # Lock the account right away; the worker removes the data
+            request.user.is_active = False
+            request.user.save(update_fields=['is_active'])
+
+        job = enqueue(kind, user=request.user, payload=payload)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def retry(self, request, pk=None):
+        """
+        Queue a failed job again
+        """
+        job = self.get_object()
+        _, max_attempts = HANDLERS[job.kind]
+        if job.status != Job.FAILED or max_attempts == 1:
+            return Response(
+                {'detail': 'Only failed jobs that are safe to repeat can be retried.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job.retry()
+        job.refresh_from_db()
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Download the file produced by a finished export job
+        """
+        job = self.get_object()
+        if job.kind != 'export' or job.status != Job.SUCCEEDED:
+            return Response({'detail': 'No file for this job.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            default_storage.open(job.result['file'], 'rb'),
+            as_attachment=True,
+            filename=f"workouts.{job.result['type']}",
+        )
@@ -0,0 +1,56 @@
+import time
+import traceback
+from django.conf import settings
+from django.db import close_old_connections, connection
+from . import handlers
+from .models import Job
+
+def run_next(worker_id):
+    """
+    Claim and run one due job. Return it, or None when the queue is empty.
+    """
+    job = Job.claim(worker_id)
+    if job is None:
+        return None
+    try:
+        result = handlers.run(job)
+    except Exception:
+        job.fail(traceback.format_exc())
+    else:
+        job.succeed(result)
+    return job
+
+def maintain():
+    """
+    Requeue (or fail) jobs abandoned by dead workers and purge expired ones.
+    Return the number of requeued, failed and purged jobs.
+    """
+    requeued, failed = Job.requeue_stale()
+    return requeued, failed, Job.purge_expired()
+
+def work(worker_id, stop, poll_interval, burst=False, on_job=None, on_maintenance=None):
+    """
+    Run jobs until `stop` (a threading.Event) is set, waiting
+    `poll_interval` seconds whenever the queue is empty. In burst mode,
+    return as soon as the queue is empty instead. Every
+    JOB_MAINTENANCE_INTERVAL seconds the worker also runs maintain().
+    """
+    next_maintenance = 0
+    while not stop.is_set():
+        if not connection.in_atomic_block:
+            # Drop connections past CONN_MAX_AGE or broken, as Django does
+            # between requests (skipped inside test transactions)
+            close_old_connections()
+        if time.monotonic() >= next_maintenance:
+            counts = maintain()
+            if on_maintenance is not None and any(counts):
+                on_maintenance(worker_id, *counts)
+            next_maintenance = time.monotonic() + settings.JOB_MAINTENANCE_INTERVAL
+        job = run_next(worker_id)
+        if job is not None:
+            if on_job is not None:
+                on_job(worker_id, job)
+            continue
+        if burst:
+            return
+        stop.wait(poll_interval)
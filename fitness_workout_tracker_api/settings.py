@@ -43,9 +43,11 @@ INSTALLED_APPS = [
     'rest_framework',
     'fitness_workout_tracker_api.authentication',
     'fitness_workout_tracker_api.workouts',
+    'fitness_workout_tracker_api.jobs',
 ]
 
 MIDDLEWARE = [
+    'fitness_workout_tracker_api.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,17 +77,125 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'fitness_workout_tracker_api.wsgi.application'
 
+# Route workout/exercise/comment list and detail reads to the async handlers
+# in workouts/async_views.py (worthwhile when served through asgi.py)
+ASYNC_READ_VIEWS = os.getenv('DJANGO_ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Serve workout/exercise/comment list and detail reads from `.values()` rows
+# instead of serializers, rendered with orjson when installed (see
+# workouts/fast_reads.py); the responses are the same
+FAST_READS = os.getenv('DJANGO_FAST_READS', 'False') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# DJANGO_DB_ENGINE selects SQLite (default) or PostgreSQL. Connections are
+# kept open for DJANGO_DB_CONN_MAX_AGE seconds and checked before reuse.
+
+DATABASE_ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+DATABASE_ENGINE = os.getenv('DJANGO_DB_ENGINE', 'sqlite')
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': DATABASE_ENGINES[DATABASE_ENGINE],
+        'CONN_MAX_AGE': int(os.getenv('DJANGO_DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+if DATABASE_ENGINE == 'postgresql':
+    # Requires the psycopg package
+    DATABASES['default'].update({
+        'NAME': os.getenv('DJANGO_DB_NAME', 'fitness_workout_tracker'),
+        'USER': os.getenv('DJANGO_DB_USER', 'postgres'),
+        'PASSWORD': os.getenv('DJANGO_DB_PASSWORD', ''),
+        'HOST': os.getenv('DJANGO_DB_HOST', 'localhost'),
+        'PORT': os.getenv('DJANGO_DB_PORT', '5432'),
+    })
+else:
+    DATABASES['default']['NAME'] = os.getenv('DJANGO_DB_NAME', str(BASE_DIR / 'db.sqlite3'))
+    if os.getenv('DJANGO_SQLITE_TUNING', 'True') == 'True':
+        # Applied on every new connection: WAL lets readers run alongside
+        # the writer, NORMAL sync is safe with WAL, and writers wait up to
+        # the busy timeout for the lock instead of failing. IMMEDIATE
+        # transactions take the write lock up front, so two transactions
+        # cannot deadlock upgrading from a read lock.
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA busy_timeout={int(os.getenv('DJANGO_SQLITE_BUSY_TIMEOUT', '5000'))};"
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        }
+
+# Read replicas: DJANGO_DB_REPLICAS lists replica SQLite files (or
+# PostgreSQL hosts), which otherwise share the primary's settings. List
+# and detail reads of workouts, exercises, workout exercises and comments
+# are served from them; a user's reads return to the primary for
+# REPLICA_STICKY_SECONDS after each of their writes (tracked in the cache,
+# which must be shared between the server processes).
+REPLICA_DATABASES = []
+for index, replica in enumerate(filter(None, os.getenv('DJANGO_DB_REPLICAS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DATABASE_ENGINE == 'postgresql' else 'NAME': replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['fitness_workout_tracker_api.db_routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('DJANGO_REPLICA_STICKY_SECONDS', '5'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# DJANGO_CACHE_BACKEND selects the local-memory (default) or file backend,
+# both of which work without any external service.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[os.getenv('DJANGO_CACHE_BACKEND', 'locmem')],
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', str(BASE_DIR / '.cache')),
     }
 }
 
+# Seconds that list/detail responses stay cached per user (0 disables caching).
+# Writes from other processes (other web workers, the job worker and the
+# management commands) only invalidate a shared cache, so responses are not
+# cached by default with the local-memory backend.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv(
+    'DJANGO_RESPONSE_CACHE_TIMEOUT',
+    '0' if CACHES['default']['BACKEND'] == CACHE_BACKENDS['locmem'] else '300',
+))
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+# PASSWORD_HASH_ITERATIONS tunes the PBKDF2 work factor per environment;
+# stored hashes are upgraded or downgraded transparently on login. The
+# configurable hasher handles every `pbkdf2_sha256` hash, so Django's stock
+# PBKDF2PasswordHasher (same algorithm name) is not listed.
+
+PASSWORD_HASHERS = [
+    'fitness_workout_tracker_api.authentication.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASH_ITERATIONS = int(os.getenv('DJANGO_PASSWORD_HASH_ITERATIONS', '870000'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -123,6 +233,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Files written and read by background jobs (uploaded imports, exports)
+MEDIA_ROOT = os.getenv('DJANGO_MEDIA_ROOT', str(BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -131,10 +244,73 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Add REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'fitness_workout_tracker_api.authentication.authentication.BearerTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
+    # Used by the login/register throttles
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('DJANGO_AUTH_IP_RATE', '30/min'),
+        'auth_username': os.getenv('DJANGO_AUTH_USERNAME_RATE', '10/min'),
+    },
+    # The JSON renderer reports its time to the performance middleware
+    'DEFAULT_RENDERER_CLASSES': [
+        'fitness_workout_tracker_api.instrumentation.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Requests taking at least this many milliseconds are logged with their
+# queries by the performance middleware (0 disables the log)
+SLOW_REQUEST_THRESHOLD = int(os.getenv('DJANGO_SLOW_REQUEST_THRESHOLD', '500'))
+
+# Runs the tests with the slow request log disabled
+TEST_RUNNER = 'fitness_workout_tracker_api.test_runner.TestRunner'
+
+# Bearer tokens returned by login/register: lifetime, and how long a resolved
+# token is cached before the database is consulted again (this bounds how
+# long a deactivated user keeps access on other processes). Revoking a token
+# only drops its entry from this process's cache when the cache is local
+# memory, so tokens are not cached by default unless the cache is shared.
+AUTH_TOKEN_LIFETIME = int(os.getenv('DJANGO_AUTH_TOKEN_LIFETIME', str(30 * 24 * 60 * 60)))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv(
+    'DJANGO_AUTH_TOKEN_CACHE_TTL',
+    '0' if CACHES['default']['BACKEND'] == CACHE_BACKENDS['locmem'] else '300',
+))
+
+# Pagination settings for workouts, exercises and comments. Clients may ask
+# for a different page size with `?page_size=`, capped at MAX_PAGE_SIZE.
+PAGE_SIZE = int(os.getenv('DJANGO_PAGE_SIZE', '20'))
+MAX_PAGE_SIZE = int(os.getenv('DJANGO_MAX_PAGE_SIZE', '100'))
+
+# Most points an exercise history (`/exercises/{id}/history/`) returns;
+# longer series are aggregated into coarser buckets
+HISTORY_MAX_POINTS = int(os.getenv('DJANGO_HISTORY_MAX_POINTS', '500'))
+
+# Sync endpoint: maximum rows of each kind per call, and how far behind the
+# current time a sync round stops so in-flight transactions are not missed
+SYNC_PAGE_SIZE = int(os.getenv('DJANGO_SYNC_PAGE_SIZE', '500'))
+SYNC_SETTLE_SECONDS = int(os.getenv('DJANGO_SYNC_SETTLE_SECONDS', '1'))
+
+# Workouts read per query (with their exercises and comments) while
+# streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv('DJANGO_EXPORT_BATCH_SIZE', '200'))
+
+# Workouts validated and written per transaction while importing
+IMPORT_BATCH_SIZE = int(os.getenv('DJANGO_IMPORT_BATCH_SIZE', '500'))
+
+# Background jobs (see jobs/ and `manage.py run_jobs`): attempts before a
+# job is marked failed, base delay in seconds between attempts (doubled on
+# each retry), seconds after which a running job is assumed to belong to a
+# dead worker, how often workers look for such jobs and purge finished jobs
+# (and their files) older than JOB_RETENTION_DAYS (0 keeps them), and how
+# often idle workers poll the queue
+JOB_MAX_ATTEMPTS = int(os.getenv('DJANGO_JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_DELAY = int(os.getenv('DJANGO_JOB_RETRY_DELAY', '30'))
+JOB_TIMEOUT = int(os.getenv('DJANGO_JOB_TIMEOUT', '3600'))
+JOB_MAINTENANCE_INTERVAL = int(os.getenv('DJANGO_JOB_MAINTENANCE_INTERVAL', '60'))
+JOB_RETENTION_DAYS = int(os.getenv('DJANGO_JOB_RETENTION_DAYS', '7'))
+JOB_POLL_INTERVAL = float(os.getenv('DJANGO_JOB_POLL_INTERVAL', '1'))
+
 # Session settings
 SESSION_COOKIE_SECURE = True  # for HTTPS
 SESSION_COOKIE_HTTPONLY = True  # Prevents JavaScript access to session cookie
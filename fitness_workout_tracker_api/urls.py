@@ -1,18 +1,27 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedDefaultRouter
 from fitness_workout_tracker_api.authentication.views import AuthViewSet
+from fitness_workout_tracker_api.jobs.views import JobViewSet
 from fitness_workout_tracker_api.workouts.views import (
     WorkoutViewSet, 
     ExerciseViewSet, 
     WorkoutExerciseViewSet,
-    WorkoutCommentViewSet
+    WorkoutCommentViewSet,
+    SyncViewSet,
+    SearchViewSet,
+    CacheStatsView,
+    MetricsView
 )
 
 router = DefaultRouter()
 router.register(r'auth', AuthViewSet, basename='auth')
 router.register(r'workouts', WorkoutViewSet, basename='workout')
 router.register(r'exercises', ExerciseViewSet, basename='exercise')
+router.register(r'sync', SyncViewSet, basename='sync')
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'jobs', JobViewSet, basename='job')
 
 # Create nested routers
 workouts_router = NestedDefaultRouter(router, r'workouts', lookup='workout')
@@ -24,5 +33,12 @@ workouts_router.register(r'comments', WorkoutCommentViewSet, basename='workout-c
 urlpatterns = [
     path('', include(router.urls)),
     path('', include(workouts_router.urls)),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('metrics/cache/', CacheStatsView.as_view(), name='cache-stats'),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
-]
\ No newline at end of file
+]
+
+# Serve workout, exercise and comment reads from async handlers in ASGI
+# deployments that opt in; other methods still reach the viewsets
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns.insert(0, path('', include('fitness_workout_tracker_api.workouts.async_urls')))
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class WorkoutsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fitness_workout_tracker_api.workouts'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .search import install_after_migrate
+        post_migrate.connect(install_after_migrate, sender=self)
@@ -0,0 +1,36 @@
+"""
+URL patterns that route workout, exercise and comment reads to the async
+handlers. They mirror the router URLs and are placed in front of them when
+ASYNC_READ_VIEWS is enabled.
+"""
+from django.urls import path
+from .async_views import (
+    AsyncWorkoutHandler,
+    AsyncExerciseHandler,
+    AsyncCommentHandler,
+    async_read_view
+)
+from .views import WorkoutViewSet, ExerciseViewSet, WorkoutCommentViewSet
+
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+
+def read_routes(prefix, basename, handler, viewset):
+    # Integer converters keep extra actions such as /workouts/stats/ on the
+    # router URLs
+    return [
+        path(
+            f'{prefix}/',
+            async_read_view(handler, 'list', viewset.as_view(LIST_ACTIONS, basename=basename, detail=False)),
+        ),
+        path(
+            f'{prefix}/<int:pk>/',
+            async_read_view(handler, 'retrieve', viewset.as_view(DETAIL_ACTIONS, basename=basename, detail=True)),
+        ),
+    ]
+
+urlpatterns = (
+    read_routes('workouts', 'workout', AsyncWorkoutHandler(), WorkoutViewSet)
+    + read_routes('exercises', 'exercise', AsyncExerciseHandler(), ExerciseViewSet)
+    + read_routes('workouts/<int:workout_pk>/comments', 'workout-comments', AsyncCommentHandler(), WorkoutCommentViewSet)
+)
@@ -0,0 +1,169 @@
+"""
+Async-native list/retrieve handlers for workouts, exercises and comments.
+
+Under an ASGI server these read the database through Django's async ORM
+instead of blocking a worker thread per request. They render the same
+payloads as the DRF viewsets (pagination, `?expand=` and `?fields=`
+included), but skip the response cache and conditional GET handling. Other
+HTTP methods on the same URLs are passed to the regular viewsets. Enable
+them with DJANGO_ASYNC_READ_VIEWS=True (see async_urls.py).
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from fitness_workout_tracker_api.authentication.authentication import BearerTokenAuthentication
+from .filters import filter_workouts
+from .models import Workout, Exercise, Comment
+from .pagination import WorkoutPagination, ExercisePagination, CommentPagination
+from .serializers import (
+    WorkoutSerializer,
+    WorkoutListSerializer,
+    ExerciseSerializer,
+    CommentSerializer
+)
+
+def render(data, status_code=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status_code,
+        content_type='application/json',
+        headers=headers,
+    )
+
+def not_found():
+    return render({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+
+async def aauthenticate(request):
+    """
+    Resolve the user from a bearer token or the session, mirroring the
+    DEFAULT_AUTHENTICATION_CLASSES order
+    """
+    authenticator = BearerTokenAuthentication()
+    result = await sync_to_async(authenticator.authenticate)(request)
+    if result is not None:
+        return result[0]
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+class AsyncReadHandler:
+    """
+    Async list and retrieve for one resource. Subclasses provide the
+    queryset and may check access to a parent object first.
+    """
+    serializer_class = None
+    list_serializer_class = None
+    pagination_class = None
+
+    def get_queryset(self, user, kwargs):
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, request):
+        return queryset
+
+    async def has_parent(self, user, kwargs):
+        return True
+
+    def eager_load(self, serializer_class, queryset, request):
+        setup_eager_loading = getattr(serializer_class, 'setup_eager_loading', None)
+        if setup_eager_loading is not None:
+            queryset = setup_eager_loading(queryset, request=request)
+        return queryset
+
+    async def prepare(self, request, kwargs):
+        try:
+            user = await aauthenticate(request)
+        except exceptions.AuthenticationFailed as exc:
+            return None, None, render(
+                {'detail': str(exc.detail)},
+                status.HTTP_401_UNAUTHORIZED,
+                {'WWW-Authenticate': BearerTokenAuthentication.keyword},
+            )
+        if user is None:
+            return None, None, render(
+                {'detail': 'Authentication credentials were not provided.'},
+                status.HTTP_401_UNAUTHORIZED,
+                {'WWW-Authenticate': BearerTokenAuthentication.keyword},
+            )
+        if not await self.has_parent(user, kwargs):
+            return None, None, not_found()
+
+        api_request = Request(request)
+        api_request.user = user
+        return user, api_request, None
+
+    async def list(self, request, **kwargs):
+        user, api_request, error = await self.prepare(request, kwargs)
+        if error is not None:
+            return error
+
+        serializer_class = self.list_serializer_class or self.serializer_class
+        queryset = self.filter_queryset(self.get_queryset(user, kwargs), api_request)
+        queryset = self.eager_load(serializer_class, queryset, api_request)
+        paginator = self.pagination_class()
+        page_queryset = paginator.get_page_queryset(queryset, api_request)
+        page = paginator.set_page([obj async for obj in page_queryset])
+
+        serializer = serializer_class(page, many=True, context={'request': api_request})
+        return render(paginator.get_paginated_response(serializer.data).data)
+
+    async def retrieve(self, request, pk, **kwargs):
+        user, api_request, error = await self.prepare(request, kwargs)
+        if error is not None:
+            return error
+
+        queryset = self.eager_load(self.serializer_class, self.get_queryset(user, kwargs), api_request)
+        try:
+            instance = await queryset.aget(pk=pk)
+        except self.serializer_class.Meta.model.DoesNotExist:
+            return not_found()
+        return render(self.serializer_class(instance, context={'request': api_request}).data)
+
+class AsyncWorkoutHandler(AsyncReadHandler):
+    serializer_class = WorkoutSerializer
+    list_serializer_class = WorkoutListSerializer
+    pagination_class = WorkoutPagination
+
+    def get_queryset(self, user, kwargs):
+        return Workout.objects.filter(user=user)
+
+    def filter_queryset(self, queryset, request):
+        return filter_workouts(queryset, request.query_params)
+
+class AsyncExerciseHandler(AsyncReadHandler):
+    serializer_class = ExerciseSerializer
+    pagination_class = ExercisePagination
+
+    def get_queryset(self, user, kwargs):
+        return Exercise.objects.filter(user=user)
+
+class AsyncCommentHandler(AsyncReadHandler):
+    serializer_class = CommentSerializer
+    pagination_class = CommentPagination
+
+    async def has_parent(self, user, kwargs):
+        return await Workout.objects.filter(id=kwargs['workout_pk'], user=user).aexists()
+
+    def get_queryset(self, user, kwargs):
+        return Comment.objects.filter(workout_id=kwargs['workout_pk'])
+
+def async_read_view(handler, action, fallback):
+    """
+    Serve GET/HEAD with the async `action` of `handler` and every other
+    method with the synchronous DRF `fallback` view
+    """
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            try:
+                return await getattr(handler, action)(request, **kwargs)
+            except exceptions.APIException as exc:
+                # e.g. NotFound for an invalid cursor or invalid filters
+                if isinstance(exc.detail, (list, dict)):
+                    return render(exc.detail, exc.status_code)
+                return render({'detail': str(exc.detail)}, exc.status_code)
+        return await sync_to_async(fallback)(request, *args, **kwargs)
+
+    # CSRF is enforced by DRF's SessionAuthentication in the fallback view
+    view.csrf_exempt = True
+    return view
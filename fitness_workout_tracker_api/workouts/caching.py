@@ -0,0 +1,69 @@
+import hashlib
+import uuid
+from django.core.cache import cache
+
+# Resources whose responses are cached, named after their router basenames
+CACHED_RESOURCES = ['workout', 'exercise', 'workout-exercises', 'workout-comments']
+
+def _version_key(user_id):
+    return f'workouts:version:{user_id}'
+
+def get_user_cache_version(user_id):
+    """
+    Return the current cache generation of a user. Every cached response of
+    the user embeds it in its key, so changing it invalidates them all.
+    """
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+def invalidate_user_cache(user_id):
+    """
+    Drop every cached response of a user. Call this after writing any of
+    their workouts, exercises, workout exercises or comments outside of the
+    viewsets (which invalidate on their own).
+    """
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+
+def response_cache_key(user_id, resource, full_path, validator=''):
+    """
+    Key of a cached response. `validator` (the response's ETag, when the view
+    computes one) ties the body to the state it was built from, so a body is
+    never served under validators of a newer state.
+    """
+    path_hash = hashlib.md5(f'{full_path}|{validator}'.encode()).hexdigest()
+    version = get_user_cache_version(user_id)
+    return f'workouts:response:{user_id}:{version}:{resource}:{path_hash}'
+
+def _counter_key(resource, outcome):
+    return f'workouts:stats:{resource}:{outcome}'
+
+def record_cache_access(resource, hit):
+    key = _counter_key(resource, 'hits' if hit else 'misses')
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr()
+        cache.set(key, 1, None)
+
+def get_cache_stats():
+    """
+    Return hit and miss counters per resource, as seen by this cache backend
+    (per process with the local-memory backend)
+    """
+    keys = [
+        _counter_key(resource, outcome)
+        for resource in CACHED_RESOURCES
+        for outcome in ('hits', 'misses')
+    ]
+    values = cache.get_many(keys)
+    return {
+        resource: {
+            outcome: values.get(_counter_key(resource, outcome), 0)
+            for outcome in ('hits', 'misses')
+        }
+        for resource in CACHED_RESOURCES
+    }
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    """
+    The primary pin set after a write (see db_routers.pin_to_primary) is only
+    seen by the other processes if the cache is shared between them
+    """
+    if settings.REPLICA_DATABASES and isinstance(caches['default'], LocMemCache):
+        return [
+            Warning(
+                'Read replicas are configured but the default cache is local to each process, '
+                'so reads served by other workers right after a write may not see it.',
+                hint='Use a shared cache (DJANGO_CACHE_BACKEND=file) when running several processes.',
+                id='workouts.W001',
+            )
+        ]
+    return []
+
+@register()
+def check_response_cache(app_configs, **kwargs):
+    """
+    Cached responses are only dropped on the process that handled the write
+    (see caching.invalidate_user_cache) unless the cache is shared
+    """
+    if settings.RESPONSE_CACHE_TIMEOUT > 0 and isinstance(caches['default'], LocMemCache):
+        return [
+            Warning(
+                'RESPONSE_CACHE_TIMEOUT is set but the default cache is local to each process, '
+                'so writes made by other workers, jobs or commands leave stale responses cached '
+                'for up to that many seconds.',
+                hint='Use a shared cache (DJANGO_CACHE_BACKEND=file) or set DJANGO_RESPONSE_CACHE_TIMEOUT=0.',
+                id='workouts.W002',
+            )
+        ]
+    return []
@@ -0,0 +1,68 @@
+import csv
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from .models import Workout
+from .serializers import WorkoutSerializer
+
+CSV_FIELDS = [
+    'workout_id', 'date', 'title', 'description', 'duration',
+    'record', 'exercise', 'sets', 'reps', 'weight', 'order', 'notes', 'username', 'created_at',
+]
+
+class Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer can
+    produce one encoded row at a time
+    """
+    def write(self, value):
+        return value
+
+def export_workouts(user):
+    """
+    Iterate over the user's workouts, oldest first, with their exercises and
+    comments loaded.
+
+    Workouts are read through a cursor EXPORT_BATCH_SIZE rows at a time, with
+    one prefetch query per relation and batch, so memory use does not grow
+    with the length of the history.
+    """
+    queryset = WorkoutSerializer.setup_eager_loading(
+        Workout.objects.filter(user=user).order_by('date', 'id')
+    )
+    return queryset.iterator(chunk_size=settings.EXPORT_BATCH_SIZE)
+
+def ndjson_rows(user):
+    """
+    Yield one JSON document per workout, in the detail representation
+    """
+    renderer = JSONRenderer()
+    for workout in export_workouts(user):
+        yield renderer.render(WorkoutSerializer(workout).data) + b'\n'
+
+def csv_rows(user):
+    """
+    Yield CSV lines: a `workout` record per workout followed by one
+    `exercise` record per set entry and one `comment` record per comment.
+    The workout columns are repeated on every line.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for workout in export_workouts(user):
+        prefix = [workout.id, workout.date.isoformat(), workout.title, workout.description, workout.duration]
+        yield writer.writerow(prefix + ['workout'] + [''] * 8)
+        for workout_exercise in workout.workout_exercises.all():
+            yield writer.writerow(prefix + [
+                'exercise',
+                workout_exercise.exercise.name,
+                workout_exercise.sets,
+                workout_exercise.reps,
+                '' if workout_exercise.weight is None else workout_exercise.weight,
+                workout_exercise.order,
+                workout_exercise.notes,
+                '',
+                '',
+            ])
+        for comment in workout.comments.all():
+            yield writer.writerow(prefix + [
+                'comment', '', '', '', '', '', comment.text, comment.user.username, comment.created_at.isoformat(),
+            ])
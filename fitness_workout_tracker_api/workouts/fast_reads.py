@@ -0,0 +1,118 @@
+"""
+Serializer-free responses for hot read endpoints (enabled with FAST_READS).
+
+A ValuesPlan compiles a response serializer once into the `.values()`
+lookups its fields read, the function that formats each value exactly as
+the field would, and nested plans for many=True relations (fetched with
+one query per relation, like the prefetches of the serializer's eager
+loading). Rows then become response dicts without model instances or
+per-object field lookups. FastJSONRenderer renders with orjson when it is
+installed, producing the same bytes as DRF's JSONRenderer.
+"""
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from fitness_workout_tracker_api.instrumentation import TimedJSONRenderer
+from .serializers import ExpandableFieldsMixin
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fields whose database values are already their representation
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.PrimaryKeyRelatedField)
+
+class ValuesPlan:
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        # (key, lookup, convert, nested plan, foreign key of the nested rows)
+        self.fields = []
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+                relation = self.model._meta.get_field(field.source)
+                self.fields.append((key, None, None, ValuesPlan(field.child), relation.field.name))
+            elif isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)) or field.source == '*':
+                raise TypeError(f'{type(serializer).__name__}.{key} cannot be read from values()')
+            else:
+                # Exact types only: subclasses may format values differently
+                convert = None if type(field) in IDENTITY_FIELDS else field.to_representation
+                self.fields.append((key, '__'.join(field.source_attrs), convert, None, None))
+        self.lookups = list(dict.fromkeys(
+            [self.pk] + [lookup for _, lookup, _, plan, _ in self.fields if plan is None]
+        ))
+
+    def fetch(self, queryset, extra=()):
+        """
+        Return the raw rows of `queryset` (including the `extra` columns)
+        with their nested rows attached
+        """
+        rows = list(queryset.values(*dict.fromkeys(self.lookups + list(extra))))
+        ids = [row[self.pk] for row in rows]
+        for key, _, _, plan, foreign_key in self.fields:
+            if plan is None:
+                continue
+            children = {}
+            related = plan.model._default_manager.filter(**{f'{foreign_key}__in': ids})
+            for child in plan.fetch(related, extra=[foreign_key]):
+                children.setdefault(child[foreign_key], []).append(child)
+            for row in rows:
+                row[key] = children.get(row[self.pk], [])
+        return rows
+
+    def represent(self, row):
+        data = {}
+        for key, lookup, convert, plan, _ in self.fields:
+            if plan is not None:
+                data[key] = [plan.represent(child) for child in row[key]]
+            else:
+                value = row[lookup]
+                data[key] = value if convert is None or value is None else convert(value)
+        return data
+
+_plans = {}
+
+def get_plan(serializer_class, request):
+    """
+    Return the (cached) plan of `serializer_class` for the `?fields=` and
+    `?expand=` of `request`
+    """
+    key = (serializer_class,)
+    if issubclass(serializer_class, ExpandableFieldsMixin):
+        fields = set(serializer_class.parse_list(request, 'fields'))
+        key += (
+            tuple(name for name in serializer_class.Meta.fields if name in fields) if fields else None,
+            tuple(serializer_class.get_expand(request)),
+        )
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = ValuesPlan(serializer_class(context={'request': request}))
+    return plan
+
+class OrjsonRenderer(JSONRenderer):
+    """
+    JSONRenderer output through orjson, for the default compact, unicode
+    settings. Anything orjson would format differently (datetimes, Decimal,
+    sets, ...) falls back to JSONRenderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not api_settings.COMPACT_JSON
+            or not api_settings.UNICODE_JSON
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # As JSONRenderer: keep the output valid JavaScript
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+class FastJSONRenderer(TimedJSONRenderer, OrjsonRenderer):
+    pass
@@ -0,0 +1,35 @@
+from django.db.models import Exists, OuterRef
+from .models import WorkoutExercise
+from .serializers import WorkoutFilterSerializer
+from .stats import filter_dates
+
+def filter_workouts(queryset, query_params):
+    """
+    Narrow a user's workouts by the list query parameters `date_from`,
+    `date_to`, `exercise`, `min_duration`, `max_duration` and `title`.
+    Raises a ValidationError (400) for malformed values.
+
+    Date and duration ranges are served by the (user, date) and
+    (user, duration) indexes. The exercise filter is a correlated EXISTS
+    on the (exercise, workout) index rather than a join, so a workout with
+    the exercise entered several times is still listed once. The title
+    match is a substring search: PostgreSQL answers it from a trigram index
+    on UPPER(title) (migration 0012), while SQLite, which cannot index infix
+    matches, checks it against the user's workouts the other filters leave.
+    """
+    query = WorkoutFilterSerializer(data=query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+
+    queryset = filter_dates(queryset, 'date', params.get('date_from'), params.get('date_to'))
+    if 'min_duration' in params:
+        queryset = queryset.filter(duration__gte=params['min_duration'])
+    if 'max_duration' in params:
+        queryset = queryset.filter(duration__lte=params['max_duration'])
+    if 'exercise' in params:
+        queryset = queryset.filter(Exists(
+            WorkoutExercise.objects.filter(exercise_id=params['exercise'], workout=OuterRef('pk'))
+        ))
+    if 'title' in params:
+        queryset = queryset.filter(title__icontains=params['title'])
+    return queryset
@@ -0,0 +1,158 @@
+import csv
+import json
+from django.conf import settings
+from django.db import transaction
+from .caching import invalidate_user_cache
+from .models import Exercise, Workout, WorkoutExercise
+from .serializers import ImportWorkoutSerializer
+from .summaries import refresh_daily_summaries, update_workout_aggregates
+
+WORKOUT_FIELDS = ['title', 'description', 'date', 'duration']
+
+def parse_ndjson(lines):
+    """
+    Yield (line number, workout data, error) for every non-blank line. Lines
+    use the `/workouts/export/?type=ndjson` representation, so unknown keys
+    (ids, timestamps, comments) are ignored.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, None, {'non_field_errors': ['Invalid JSON']}
+            continue
+        if not isinstance(data, dict):
+            yield number, None, {'non_field_errors': ['Expected a JSON object']}
+            continue
+        yield number, data, None
+
+def parse_csv(lines):
+    """
+    Yield (line number, workout data, error) for every workout in a CSV with
+    the `/workouts/export/?type=csv` columns.
+
+    Consecutive lines with the same `workout_id` (or, without that column,
+    the same date, title and duration) form one workout. Lines with an
+    `exercise` become its exercises; comment records are ignored.
+    """
+    reader = csv.DictReader(lines)
+    key = workout = line = None
+    for row in reader:
+        row_key = row.get('workout_id') or (row.get('date'), row.get('title'), row.get('duration'))
+        if workout is None or row_key != key:
+            if workout is not None:
+                yield line, workout, None
+            key, line = row_key, reader.line_num
+            workout = {field: row.get(field) for field in WORKOUT_FIELDS}
+            workout['description'] = workout['description'] or ''
+            workout['exercises'] = []
+
+        record = row.get('record') or ('exercise' if row.get('exercise') else 'workout')
+        if record == 'exercise':
+            exercise = {
+                'exercise_name': row.get('exercise'),
+                'sets': row.get('sets'),
+                'reps': row.get('reps'),
+                'weight': row.get('weight') or None,
+                'notes': row.get('notes') or '',
+            }
+            if row.get('order'):
+                exercise['order'] = row['order']
+            workout['exercises'].append(exercise)
+    if workout is not None:
+        yield line, workout, None
+
+PARSERS = {
+    'ndjson': parse_ndjson,
+    'csv': parse_csv,
+}
+
+class WorkoutImporter:
+    """
+    Loads parsed workouts for one user.
+
+    Workouts are validated one at a time, but written IMPORT_BATCH_SIZE at a
+    time: each batch upserts the exercises it references and bulk-inserts
+    its workouts and workout exercises in a single transaction. Invalid
+    workouts are reported with their line number and skipped.
+    """
+    def __init__(self, user, batch_size=None):
+        self.user = user
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.result = {'workouts': 0, 'workout_exercises': 0, 'exercises': 0, 'errors': []}
+
+    def run(self, rows):
+        batch = []
+        try:
+            for line, data, error in rows:
+                if error is None:
+                    serializer = ImportWorkoutSerializer(data=data)
+                    if serializer.is_valid():
+                        batch.append(serializer.validated_data)
+                        if len(batch) >= self.batch_size:
+                            self.save(batch)
+                            batch = []
+                        continue
+                    error = serializer.errors
+                self.result['errors'].append({'line': line, 'errors': error})
+        except (csv.Error, UnicodeDecodeError) as exc:
+            # The rest of the file cannot be read; keep what was parsed
+            self.result['errors'].append({'line': None, 'errors': {'non_field_errors': [str(exc)]}})
+        if batch:
+            self.save(batch)
+        invalidate_user_cache(self.user.pk)
+        return self.result
+
+    def get_exercise_ids(self, names):
+        exercise_ids = dict(
+            Exercise.objects.filter(user=self.user, name__in=names).values_list('name', 'id')
+        )
+        missing = names - set(exercise_ids)
+        if missing:
+            Exercise.objects.bulk_create(
+                [Exercise(user=self.user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            exercise_ids.update(
+                Exercise.objects.filter(user=self.user, name__in=missing).values_list('name', 'id')
+            )
+            self.result['exercises'] += len(missing)
+        return exercise_ids
+
+    @transaction.atomic
+    def save(self, batch):
+        exercise_ids = self.get_exercise_ids({
+            item['exercise_name'] for data in batch for item in data.get('exercises', [])
+        })
+        workouts = Workout.objects.bulk_create([
+            Workout(user=self.user, **{field: data.get(field, '') for field in WORKOUT_FIELDS})
+            for data in batch
+        ])
+        workout_exercises = WorkoutExercise.objects.bulk_create([
+            WorkoutExercise(
+                workout=workout,
+                exercise_id=exercise_ids[item['exercise_name']],
+                sets=item['sets'],
+                reps=item['reps'],
+                weight=item.get('weight'),
+                notes=item.get('notes', ''),
+                order=item.get('order', 0),
+            )
+            for workout, data in zip(workouts, batch)
+            for item in data.get('exercises', [])
+        ], batch_size=self.batch_size)
+        update_workout_aggregates(Workout.objects.filter(pk__in=[workout.pk for workout in workouts]))
+        refresh_daily_summaries(self.user, {workout.date for workout in workouts})
+
+        self.result['workouts'] += len(workouts)
+        self.result['workout_exercises'] += len(workout_exercises)
+
+def import_workouts(user, lines, file_type):
+    """
+    Import workouts for `user` from an iterable of text lines in the given
+    format ('ndjson' or 'csv') and return counts of the created rows and
+    the errors of skipped workouts
+    """
+    return WorkoutImporter(user).run(PARSERS[file_type](lines))
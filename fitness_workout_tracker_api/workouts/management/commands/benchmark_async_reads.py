@@ -0,0 +1,108 @@
+import asyncio
+import math
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from fitness_workout_tracker_api.authentication.models import AuthToken
+from fitness_workout_tracker_api.workouts.models import Exercise, Workout, WorkoutExercise, Comment
+
+ASYNC_URLCONF = 'fitness_workout_tracker_api.workouts.async_urls'
+
+class Command(BaseCommand):
+    help = 'Compare workout read throughput and latency of the sync viewsets and the async handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Total requests per mode and URL')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once')
+        parser.add_argument('--workouts', type=int, default=100, help='Workouts in the benchmark account')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex[:12]}')
+        try:
+            workout = self.seed(user, options['workouts'])
+            _, key = AuthToken.issue(user)
+            headers = {'Authorization': f'Bearer {key}'}
+            urls = [
+                '/workouts/',
+                '/workouts/?expand=exercises',
+                f'/workouts/{workout.id}/',
+                f'/workouts/{workout.id}/comments/',
+            ]
+            # Measure the handlers themselves, not the response cache
+            with override_settings(RESPONSE_CACHE_TIMEOUT=0, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                for url in urls:
+                    self.report('sync', url, options, self.run_sync(url, headers, options))
+                    with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+                        self.report('async', url, options, asyncio.run(self.run_async(url, headers, options)))
+        finally:
+            user.delete()
+
+    def seed(self, user, count):
+        exercises = Exercise.objects.bulk_create([
+            Exercise(user=user, name=f'Exercise {i}') for i in range(5)
+        ])
+        workouts = Workout.objects.bulk_create([
+            Workout(user=user, title=f'Workout {i}', date=date.today() - timedelta(days=i), duration=45)
+            for i in range(count)
+        ])
+        WorkoutExercise.objects.bulk_create([
+            WorkoutExercise(workout=workout, exercise=exercise, sets=3, reps=10, weight=50, order=order)
+            for workout in workouts
+            for order, exercise in enumerate(exercises)
+        ])
+        Comment.objects.bulk_create([
+            Comment(workout=workouts[0], user=user, text=f'Comment {i}') for i in range(10)
+        ])
+        return workouts[0]
+
+    def run_sync(self, url, headers, options):
+        def fetch(_):
+            try:
+                started = time.perf_counter()
+                response = Client().get(url, headers=headers)
+                assert response.status_code == 200, response.status_code
+                return time.perf_counter() - started
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            latencies = list(executor.map(fetch, range(options['requests'])))
+        return latencies, time.perf_counter() - started
+
+    async def run_async(self, url, headers, options):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def fetch():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                assert response.status_code == 200, response.status_code
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(fetch() for _ in range(options['requests'])))
+        return latencies, time.perf_counter() - started
+
+    def report(self, mode, url, options, result):
+        latencies, elapsed = result
+        latencies = sorted(latencies)
+
+        def percentile(p):
+            # Nearest-rank percentile, in milliseconds
+            return latencies[max(0, math.ceil(p / 100 * len(latencies)) - 1)] * 1000
+
+        self.stdout.write(
+            f'mode={mode} url={url} '
+            f'requests={options["requests"]} concurrency={options["concurrency"]} '
+            f'throughput={len(latencies) / elapsed:.1f}/s '
+            f'p50={percentile(50):.1f}ms p99={percentile(99):.1f}ms max={latencies[-1] * 1000:.1f}ms'
+        )
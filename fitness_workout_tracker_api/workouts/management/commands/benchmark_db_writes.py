@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from fitness_workout_tracker_api.workouts.models import Exercise, Workout, WorkoutExercise
+from fitness_workout_tracker_api.workouts.summaries import refresh_daily_summaries
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent write throughput and latency against the configured database, '
+        'with optional concurrent readers. Run with DJANGO_SQLITE_TUNING=False to compare '
+        'SQLite without the connection pragmas; since WAL mode persists in the database file, '
+        'such a run first switches the file back to the default rollback journal.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Parallel writer threads')
+        parser.add_argument('--readers', type=int, default=2, help='Parallel reader threads')
+        parser.add_argument('--transactions', type=int, default=50, help='Write transactions per writer')
+
+    def handle(self, *args, **options):
+        self.reset_journal_mode()
+        user = User.objects.create_user(f'benchmark-{uuid.uuid4().hex[:12]}')
+        exercises = Exercise.objects.bulk_create([
+            Exercise(user=user, name=f'Exercise {i}') for i in range(3)
+        ])
+        try:
+            self.run(user, exercises, options)
+        finally:
+            user.delete()
+
+    def run(self, user, exercises, options):
+        done = threading.Event()
+        reads = []
+        errors = []
+
+        def write(index):
+            try:
+                day = date.today() - timedelta(days=index % 30)
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        workout = Workout.objects.create(user=user, title=f'Workout {index}', date=day, duration=45)
+                        WorkoutExercise.objects.bulk_create([
+                            WorkoutExercise(workout=workout, exercise=exercise, sets=3, reps=10, weight=50, order=order)
+                            for order, exercise in enumerate(exercises)
+                        ])
+                        refresh_daily_summaries(user, [day])
+                except OperationalError as exc:
+                    errors.append(str(exc))
+                    return None
+                return time.perf_counter() - started
+            finally:
+                connection.close()
+
+        def read():
+            count = 0
+            try:
+                while not done.is_set():
+                    try:
+                        list(Workout.objects.filter(user=user).order_by('-date', 'id')[:20])
+                        count += 1
+                    except OperationalError as exc:
+                        errors.append(str(exc))
+            finally:
+                connection.close()
+                reads.append(count)
+
+        readers = [threading.Thread(target=read) for _ in range(options['readers'])]
+        for reader in readers:
+            reader.start()
+        total = options['writers'] * options['transactions']
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options['writers']) as executor:
+                results = list(executor.map(write, range(total)))
+        finally:
+            elapsed = time.perf_counter() - started
+            done.set()
+            for reader in readers:
+                reader.join()
+
+        latencies = sorted(latency for latency in results if latency is not None)
+
+        def percentile(p):
+            # Nearest-rank percentile, in milliseconds
+            if not latencies:
+                return float('nan')
+            return latencies[max(0, math.ceil(p / 100 * len(latencies)) - 1)] * 1000
+
+        self.stdout.write(
+            f'database={connection.vendor} {self.describe_connection()} '
+            f'writers={options["writers"]} readers={options["readers"]} '
+            f'writes={len(latencies)}/{total} errors={len(errors)} '
+            f'throughput={len(latencies) / elapsed:.1f}/s '
+            f'p50={percentile(50):.1f}ms p99={percentile(99):.1f}ms '
+            f'reads={sum(reads)} ({sum(reads) / elapsed:.1f}/s)'
+        )
+        for error in sorted(set(errors)):
+            self.stderr.write(f'{errors.count(error)} x {error}')
+
+    def reset_journal_mode(self):
+        """
+        Without the tuning pragmas, undo the WAL mode a tuned connection left
+        in the file, so the run measures SQLite's defaults
+        """
+        if connection.vendor != 'sqlite' or 'init_command' in connection.settings_dict['OPTIONS']:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=DELETE')
+            if cursor.fetchone()[0] == 'wal':
+                raise CommandError(
+                    'The database is in WAL mode and could not be switched back (is it open elsewhere?)'
+                )
+
+    def describe_connection(self):
+        if connection.vendor != 'sqlite':
+            return ''
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+        return f'journal_mode={journal_mode} busy_timeout={busy_timeout}ms'
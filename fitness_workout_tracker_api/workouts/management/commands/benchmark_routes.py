@@ -0,0 +1,257 @@
+import json
+import math
+import subprocess
+import time
+import uuid
+from datetime import date
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver, resolve, reverse
+from django.utils import timezone
+from fitness_workout_tracker_api.authentication.models import AuthToken
+from fitness_workout_tracker_api.jobs.handlers import export_history
+from fitness_workout_tracker_api.jobs.models import Job
+from fitness_workout_tracker_api.workouts.models import Workout
+
+# Routes that need a staff user
+ADMIN_ROUTES = {'metrics', 'cache-stats'}
+
+# Query strings for routes that need one
+ROUTE_QUERIES = {
+    'search-list': '?q=press',
+}
+
+# Routes that are not driven, with the reason
+SKIPPED_ROUTES = {
+    'auth-login': 'throttled and dominated by password hashing; see benchmark_login',
+    'auth-register': 'throttled and dominated by password hashing; see benchmark_login',
+    'auth-logout': 'revokes the benchmark token',
+    'job-retry': 'only applies to failed jobs',
+    'workout-import-history': 'needs a file upload; see import_workouts',
+}
+
+class Command(BaseCommand):
+    help = (
+        'Drive every named route in urls.py (including nested routes) as a seeded user and report '
+        'throughput, latency percentiles and query counts. Writes run in rolled-back transactions, '
+        'so runs against the same seeded data are comparable across commits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='seed-user-0', help='Seeded user to benchmark as (see seed_data)')
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per route and method')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per route and method')
+        parser.add_argument('--route', action='append', dest='routes', help='Only drive this route name (may be repeated)')
+        parser.add_argument('--with-cache', action='store_true', help='Keep the response cache enabled')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='Compare with the JSON results of an earlier run')
+
+    def handle(self, *args, **options):
+        try:
+            self.user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user {options['user']}; create it with seed_data")
+        self.workout = (
+            Workout.objects.filter(user=self.user, comments__isnull=False, workout_exercises__isnull=False)
+            .order_by('-date', 'id').first()
+        )
+        if self.workout is None:
+            raise CommandError('The user needs a workout with exercises and comments')
+
+        overrides = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+        if not options['with_cache']:
+            overrides['RESPONSE_CACHE_TIMEOUT'] = 0
+
+        admin = User.objects.create_superuser(f'benchmark-{uuid.uuid4().hex[:12]}')
+        _, key = AuthToken.issue(self.user)
+        _, admin_key = AuthToken.issue(admin)
+        self.job = Job.objects.create(user=self.user, kind='export', payload={'type': 'ndjson'}, status=Job.RUNNING)
+        try:
+            with override_settings(**overrides):
+                self.job.succeed(export_history(self.job))
+                self.job.refresh_from_db()
+                self.clients = {
+                    False: Client(headers={'Authorization': f'Bearer {key}'}),
+                    True: Client(headers={'Authorization': f'Bearer {admin_key}'}),
+                }
+                results = self.run(options)
+        finally:
+            if self.job.result:
+                default_storage.delete(self.job.result['file'])
+            self.job.delete()
+            AuthToken.objects.filter(user=self.user).delete()
+            admin.delete()
+
+        previous = {}
+        if options['compare']:
+            with open(options['compare']) as handle:
+                previous = json.load(handle)['results']
+        self.report(results, previous)
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({
+                    'commit': self.get_commit(),
+                    'created_at': timezone.now().isoformat(),
+                    'options': {key: options[key] for key in ('user', 'requests', 'warmup', 'with_cache')},
+                    'results': results,
+                }, handle, indent=2)
+
+    def get_routes(self):
+        """
+        Return (name, path) for every named route without a format suffix
+        """
+        resolver = get_resolver()
+        routes = {}
+        for name in resolver.reverse_dict:
+            if not isinstance(name, str) or name in routes:
+                continue
+            params = {
+                param
+                for possibilities, *_ in resolver.reverse_dict.getlist(name)
+                for _, params in possibilities
+                for param in params
+                if 'format' not in params
+            }
+            path = reverse(name, kwargs={param: self.get_param(name, param) for param in params})
+            routes[name] = path + ROUTE_QUERIES.get(name, '')
+        return sorted(routes.items())
+
+    def get_param(self, name, param):
+        if param == 'workout_pk':
+            return self.workout.pk
+        if name.startswith('workout-exercises-'):
+            return self.workout.workout_exercises.order_by('id').first().pk
+        if name.startswith('workout-comments-'):
+            return self.workout.comments.order_by('id').first().pk
+        if name.startswith('exercise-'):
+            return self.workout.workout_exercises.order_by('id').first().exercise_id
+        if name.startswith('job-'):
+            return self.job.pk
+        return self.workout.pk
+
+    def get_write_data(self, name, method):
+        exercise_id = self.workout.workout_exercises.order_by('id').first().exercise_id
+        payloads = {
+            ('workout-list', 'post'): {'title': 'Benchmark', 'date': date.today().isoformat(), 'duration': 45},
+            ('workout-detail', 'patch'): {'duration': 50},
+            ('exercise-list', 'post'): {'name': f'Benchmark {uuid.uuid4().hex[:8]}'},
+            ('exercise-detail', 'patch'): {'description': 'Benchmark'},
+            ('workout-exercises-list', 'post'): {'exercise_id': exercise_id, 'sets': 3, 'reps': 5, 'order': 1000},
+            ('workout-exercises-bulk', 'post'): [
+                {'exercise_id': exercise_id, 'sets': 3, 'reps': 5, 'order': 1000 + i} for i in range(10)
+            ],
+            ('workout-comments-list', 'post'): {'text': 'Benchmark'},
+            ('workout-comments-detail', 'patch'): {'text': 'Benchmark'},
+        }
+        return payloads.get((name, method))
+
+    def get_scenarios(self, name, path):
+        func = resolve(path.split('?')[0]).func
+        actions = getattr(func, 'actions', None)
+        if actions is not None:
+            methods = list(actions)
+        else:
+            methods = [method for method in ('get', 'post') if hasattr(getattr(func, 'cls', None), method)]
+
+        scenarios = []
+        if 'get' in methods:
+            scenarios.append(('get', None))
+        for method in ('post', 'patch'):
+            data = self.get_write_data(name, method) if method in methods else None
+            if data is not None:
+                scenarios.append((method, data))
+        return scenarios
+
+    def run(self, options):
+        results = {}
+        for name, path in self.get_routes():
+            if options['routes'] and name not in options['routes']:
+                continue
+            if name in SKIPPED_ROUTES:
+                self.stdout.write(f'skip {name}: {SKIPPED_ROUTES[name]}')
+                continue
+            client = self.clients[name in ADMIN_ROUTES]
+            for method, data in self.get_scenarios(name, path):
+                results[f'{method.upper()} {name}'] = self.measure(client, method, path, data, options)
+        return results
+
+    def request(self, client, method, path, data):
+        if method == 'get':
+            response = client.get(path)
+        else:
+            # Leave the seeded data unchanged for the next run
+            with transaction.atomic():
+                response = getattr(client, method)(path, data, content_type='application/json')
+                transaction.set_rollback(True)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def measure(self, client, method, path, data, options):
+        for _ in range(options['warmup']):
+            self.request(client, method, path, data)
+
+        latencies = []
+        statuses = set()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(options['requests']):
+                request_started = time.perf_counter()
+                response = self.request(client, method, path, data)
+                latencies.append(time.perf_counter() - request_started)
+                statuses.add(response.status_code)
+            elapsed = time.perf_counter() - started
+        latencies.sort()
+
+        def percentile(p):
+            # Nearest-rank percentile, in milliseconds
+            return round(latencies[max(0, math.ceil(p / 100 * len(latencies)) - 1)] * 1000, 2)
+
+        return {
+            'path': path,
+            'status': sorted(statuses),
+            'throughput': round(len(latencies) / elapsed, 1),
+            'p50': percentile(50),
+            'p95': percentile(95),
+            'p99': percentile(99),
+            # Transaction control statements of rolled-back writes excluded
+            'queries': round(
+                sum(1 for query in queries.captured_queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE', 'ROLLBACK')))
+                / len(latencies),
+                1,
+            ),
+        }
+
+    def report(self, results, previous):
+        for key, result in results.items():
+            line = (
+                f"{key:<40} status={','.join(map(str, result['status']))} "
+                f"throughput={result['throughput']}/s p50={result['p50']}ms "
+                f"p95={result['p95']}ms p99={result['p99']}ms queries={result['queries']}"
+            )
+            if key in previous:
+                before = previous[key]
+                line += (
+                    f" (p50 {result['p50'] - before['p50']:+.2f}ms,"
+                    f" queries {result['queries'] - before['queries']:+.1f})"
+                )
+            self.stdout.write(line)
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
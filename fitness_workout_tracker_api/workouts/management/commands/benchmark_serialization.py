@@ -0,0 +1,86 @@
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from fitness_workout_tracker_api.workouts.fast_reads import OrjsonRenderer, get_plan, orjson
+from fitness_workout_tracker_api.workouts.models import Comment, Exercise, Workout
+from fitness_workout_tracker_api.workouts.serializers import (
+    CommentSerializer,
+    ExerciseSerializer,
+    WorkoutListSerializer,
+    WorkoutSerializer
+)
+
+class Command(BaseCommand):
+    help = (
+        'Compare serializing and rendering a page of rows through the DRF serializers and '
+        'JSONRenderer with the FAST_READS path (values() plans and orjson), checking that '
+        'both produce the same bytes. Database time is excluded.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='seed-user-0', help='Seeded user whose rows are serialized (see seed_data)')
+        parser.add_argument('--rows', type=int, default=settings.MAX_PAGE_SIZE, help='Rows per list page')
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user {options['user']}; create it with seed_data")
+
+        workouts = Workout.objects.filter(user=user).order_by('-date', 'id')
+        workout = workouts.filter(comments__isnull=False).first() or workouts.first()
+        if workout is None:
+            raise CommandError('The user has no workouts')
+        rows = options['rows']
+        exercises = Exercise.objects.filter(user=user).order_by('name', 'id')
+        comments = Comment.objects.filter(workout=workout).order_by('-created_at', 'id')
+        cases = [
+            ('workout list', WorkoutListSerializer, workouts[:rows], {}, True),
+            ('workout list expanded', WorkoutListSerializer, workouts[:rows], {'expand': 'exercises,comments'}, True),
+            ('workout detail', WorkoutSerializer, workouts.filter(pk=workout.pk), {}, False),
+            ('exercise list', ExerciseSerializer, exercises[:rows], {}, True),
+            ('comment list', CommentSerializer, comments[:rows], {}, True),
+        ]
+
+        self.stdout.write(f"orjson={'yes' if orjson is not None else 'no'} iterations={options['iterations']}")
+        for label, serializer_class, queryset, query, many in cases:
+            request = Request(APIRequestFactory().get('/', query))
+            request.user = user
+            context = {'request': request}
+
+            eager_queryset = queryset
+            setup_eager_loading = getattr(serializer_class, 'setup_eager_loading', None)
+            if setup_eager_loading is not None:
+                eager_queryset = setup_eager_loading(queryset, request=request)
+            instances = list(eager_queryset)
+            plan = get_plan(serializer_class, request)
+            values = plan.fetch(queryset)
+
+            def serialize():
+                data = serializer_class(instances if many else instances[0], many=many, context=context).data
+                return JSONRenderer().render(data)
+
+            def fast():
+                data = [plan.represent(row) for row in values]
+                return OrjsonRenderer().render(data if many else data[0])
+
+            if serialize() != fast():
+                raise CommandError(f'{label}: the fast path rendered different bytes')
+
+            timings = [self.time(func, options['iterations']) for func in (serialize, fast)]
+            self.stdout.write(
+                f'{label:<24} rows={len(values):<4} serializer={timings[0] * 1000:.3f}ms '
+                f'fast={timings[1] * 1000:.3f}ms speedup={timings[0] / timings[1]:.1f}x'
+            )
+
+    def time(self, func, iterations):
+        """Return the mean seconds per call"""
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations
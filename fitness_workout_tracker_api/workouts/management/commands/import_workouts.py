@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from fitness_workout_tracker_api.workouts.imports import PARSERS, import_workouts
+
+class Command(BaseCommand):
+    help = 'Import workouts for a user from an NDJSON or CSV file in the export format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Owner of the imported workouts')
+        parser.add_argument('path', help='File to import')
+        parser.add_argument(
+            '--type',
+            choices=sorted(PARSERS),
+            help='File format (defaults to the file extension)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user: {options['username']}")
+
+        file_type = options['type'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_type not in PARSERS:
+            raise CommandError('Pass --type csv or --type ndjson for this file name')
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                result = import_workouts(user, lines, file_type)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in result['errors']:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['workouts']} workout(s) with {result['workout_exercises']} exercise "
+            f"entries, created {result['exercises']} exercise(s), skipped {len(result['errors'])} workout(s)"
+        ))
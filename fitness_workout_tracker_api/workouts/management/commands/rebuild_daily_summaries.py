@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from fitness_workout_tracker_api.workouts.summaries import rebuild_daily_summaries
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily training summaries from workouts and their exercises'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Only rebuild the summaries of this user (may be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+
+        count = 0
+        for user in users.iterator():
+            rebuild_daily_summaries([user])
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily summaries for {count} user(s)'))
@@ -0,0 +1,31 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from fitness_workout_tracker_api.workouts.models import Workout
+from fitness_workout_tracker_api.workouts.summaries import repair_workout_aggregates
+
+class Command(BaseCommand):
+    help = (
+        'Check the stored exercise count, comment count and total volume of workouts '
+        'against their exercises and comments, and fix the ones that drifted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Only check the workouts of this user (may be repeated)',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        workouts = Workout.objects.all()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+            workouts = workouts.filter(user__in=users)
+
+        repaired = repair_workout_aggregates(workouts, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired the aggregates of {len(repaired)} workout(s)'))
@@ -0,0 +1,96 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from fitness_workout_tracker_api.workouts.models import Exercise, Workout, WorkoutExercise, Comment
+from fitness_workout_tracker_api.workouts.summaries import rebuild_daily_summaries, update_workout_aggregates
+
+EXERCISE_NAMES = [
+    'Squat', 'Bench Press', 'Deadlift', 'Overhead Press', 'Barbell Row', 'Pull Up', 'Chin Up', 'Dip',
+    'Lunge', 'Leg Press', 'Romanian Deadlift', 'Hip Thrust', 'Calf Raise', 'Lat Pulldown', 'Cable Row',
+    'Incline Bench Press', 'Face Pull', 'Bicep Curl', 'Tricep Extension', 'Lateral Raise', 'Plank',
+    'Front Squat', 'Push Up', 'Kettlebell Swing', 'Farmer Carry',
+]
+WORKOUT_TITLES = ['Push Day', 'Pull Day', 'Leg Day', 'Upper Body', 'Lower Body', 'Full Body', 'Conditioning']
+COMMENTS = ['Felt strong', 'Tired today', 'New personal best', 'Short on time', 'Good pump', 'Back was tight']
+
+class Command(BaseCommand):
+    help = (
+        'Seed users with synthetic exercises, workouts, workout exercises and comments for '
+        'benchmarking. The same --seed produces the same data, with dates relative to today.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--exercises', type=int, default=20, help='Exercises per user')
+        parser.add_argument('--workouts', type=int, default=300, help='Workouts per user')
+        parser.add_argument('--entries', type=int, default=6, help='Average exercise entries per workout')
+        parser.add_argument('--comments', type=float, default=0.5, help='Average comments per workout')
+        parser.add_argument('--days', type=int, default=730, help='Spread workouts over this many past days')
+        parser.add_argument('--prefix', default='seed-user-', help='Username prefix of the seeded users')
+        parser.add_argument('--password', default='seed-password', help='Password of the seeded users')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--clear', action='store_true', help='Delete users with the prefix first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['clear']:
+            deleted = User.objects.filter(username__startswith=prefix).delete()[1].get('auth.User', 0)
+            self.stdout.write(f'Deleted {deleted} seeded user(s)')
+
+        rng = random.Random(options['seed'])
+        # Hash once; every seeded user shares the password
+        password = make_password(options['password'])
+        today = date.today()
+        totals = {'users': 0, 'exercises': 0, 'workouts': 0, 'workout_exercises': 0, 'comments': 0}
+
+        for index in range(options['users']):
+            with transaction.atomic():
+                user = User.objects.create(username=f'{prefix}{index}', password=password)
+                names = EXERCISE_NAMES[:options['exercises']] + [
+                    f'Exercise {i}' for i in range(len(EXERCISE_NAMES), options['exercises'])
+                ]
+                exercises = Exercise.objects.bulk_create([Exercise(user=user, name=name) for name in names])
+                workouts = Workout.objects.bulk_create([
+                    Workout(
+                        user=user,
+                        title=rng.choice(WORKOUT_TITLES),
+                        description='',
+                        date=today - timedelta(days=rng.randrange(options['days'])),
+                        duration=rng.randrange(20, 120, 5),
+                    )
+                    for _ in range(options['workouts'])
+                ], batch_size=1000)
+
+                entries = []
+                comments = []
+                for workout in workouts:
+                    count = max(1, min(len(exercises), round(rng.gauss(options['entries'], 2))))
+                    for order, exercise in enumerate(rng.sample(exercises, count)):
+                        entries.append(WorkoutExercise(
+                            workout=workout,
+                            exercise=exercise,
+                            sets=rng.randint(2, 5),
+                            reps=rng.randint(3, 15),
+                            weight=Decimal(rng.randrange(0, 2000, 25)) / 10 if rng.random() > 0.1 else None,
+                            order=order,
+                        ))
+                    while rng.random() < options['comments'] / (1 + options['comments']):
+                        comments.append(Comment(workout=workout, user=user, text=rng.choice(COMMENTS)))
+                WorkoutExercise.objects.bulk_create(entries, batch_size=1000)
+                Comment.objects.bulk_create(comments, batch_size=1000)
+                update_workout_aggregates(Workout.objects.filter(user=user))
+                rebuild_daily_summaries([user])
+
+            totals['users'] += 1
+            totals['exercises'] += len(exercises)
+            totals['workouts'] += len(workouts)
+            totals['workout_exercises'] += len(entries)
+            totals['comments'] += len(comments)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded ' + ', '.join(f'{count} {name.replace("_", " ")}' for name, count in totals.items())
+        ))
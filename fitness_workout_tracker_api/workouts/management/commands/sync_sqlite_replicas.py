@@ -0,0 +1,29 @@
+import sqlite3
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite primary database into every replica file (DJANGO_DB_REPLICAS), '
+        'standing in for replication when trying out read replicas locally'
+    )
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Only SQLite replicas can be synced by this command')
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('No replicas configured; set DJANGO_DB_REPLICAS')
+
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        try:
+            for alias in settings.REPLICA_DATABASES:
+                connections[alias].close()
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Copied primary to {alias} ({settings.DATABASES[alias]['NAME']})")
+        finally:
+            source.close()
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# The searchable columns as of this migration. The DDL is frozen here rather
+# than taken from workouts.search so that later changes to the live indexes
+# cannot change what this migration does.
+SEARCH_COLUMNS = {
+    'workouts_exercise': ['name', 'description'],
+    'workouts_workout': ['title', 'description'],
+    'workouts_workoutexercise': ['notes'],
+}
+
+
+def document(columns):
+    return ' || '.join(
+        f"setweight(to_tsvector('simple', coalesce({column}, '')), '{'A' if i == 0 else 'B'}')"
+        for i, column in enumerate(columns)
+    )
+
+
+def install_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in SEARCH_COLUMNS.items():
+        if vendor == 'sqlite':
+            fts_table = f'{table}_fts'
+            column_list = ', '.join(columns)
+            new_values = ', '.join(f'new.{column}' for column in columns)
+            old_values = ', '.join(f'old.{column}' for column in columns)
+            delete = (
+                f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) "
+                f"VALUES ('delete', old.id, {old_values});"
+            )
+            insert = f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});"
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+                f"{column_list}, content='{table}', content_rowid='id', prefix='2 3', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            schema_editor.execute(f"CREATE TRIGGER {fts_table}_insert AFTER INSERT ON {table} BEGIN {insert} END")
+            schema_editor.execute(f"CREATE TRIGGER {fts_table}_delete AFTER DELETE ON {table} BEGIN {delete} END")
+            schema_editor.execute(
+                f"CREATE TRIGGER {fts_table}_update AFTER UPDATE OF {column_list} ON {table} "
+                f"BEGIN {delete} {insert} END"
+            )
+            # Index the rows that already exist
+            schema_editor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+        elif vendor == 'postgresql':
+            schema_editor.execute(f"CREATE INDEX {table}_search_idx ON {table} USING gin (({document(columns)}))")
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX workouts_exercise_prefix_idx ON workouts_exercise USING gin (({document(['name'])}))"
+        )
+
+
+def uninstall_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_COLUMNS:
+        if vendor == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{trigger}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+        elif vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS workouts_exercise_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_workout_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_indexes, uninstall_search_indexes),
+    ]
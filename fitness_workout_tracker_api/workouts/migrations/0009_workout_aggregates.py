@@ -0,0 +1,84 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:11
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def per_workout(model, aggregate, output_field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(workout=OuterRef('pk'))
+            .order_by()
+            .values('workout')
+            .annotate(value=aggregate)
+            .values('value'),
+            output_field=output_field,
+        ),
+        Value(0, output_field=output_field),
+    )
+
+
+def backfill_aggregates(apps, schema_editor):
+    Workout = apps.get_model('workouts', 'Workout')
+    WorkoutExercise = apps.get_model('workouts', 'WorkoutExercise')
+    Comment = apps.get_model('workouts', 'Comment')
+    volume = DecimalField(max_digits=14, decimal_places=2)
+    Workout.objects.update(
+        exercise_count=per_workout(WorkoutExercise, Count('id'), IntegerField()),
+        comment_count=per_workout(Comment, Count('id'), IntegerField()),
+        total_volume=per_workout(
+            WorkoutExercise,
+            Sum(ExpressionWrapper(F('sets') * F('reps') * F('weight'), output_field=volume)),
+            volume,
+        ),
+    )
+
+
+def install_search_triggers(apps, schema_editor):
+    # Adding the columns rebuilds the workout table on SQLite, dropping the
+    # search triggers of 0008_search_indexes (the index itself is kept)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    delete = (
+        "INSERT INTO workouts_workout_fts(workouts_workout_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description);"
+    )
+    insert = "INSERT INTO workouts_workout_fts(rowid, title, description) VALUES (new.id, new.title, new.description);"
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS workouts_workout_fts_insert AFTER INSERT ON workouts_workout BEGIN {insert} END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS workouts_workout_fts_delete AFTER DELETE ON workouts_workout BEGIN {delete} END"
+    )
+    schema_editor.execute(
+        "CREATE TRIGGER IF NOT EXISTS workouts_workout_fts_update AFTER UPDATE OF title, description "
+        f"ON workouts_workout BEGIN {delete} {insert} END"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workout',
+            name='comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='exercise_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='total_volume',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Sum of sets x reps x weight over the exercises', max_digits=14),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+        migrations.RunPython(install_search_triggers, migrations.RunPython.noop),
+    ]
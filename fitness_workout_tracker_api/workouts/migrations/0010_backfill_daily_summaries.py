@@ -0,0 +1,82 @@
+from decimal import Decimal
+from django.db import migrations
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, Max, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_daily_summaries(apps, schema_editor):
+    """
+    Build the daily summaries of the history that predates them (0005 only
+    created the tables), as rebuild_daily_summaries does at the time of
+    writing. Existing summaries are recomputed, so running it again is safe.
+    """
+    Workout = apps.get_model('workouts', 'Workout')
+    WorkoutExercise = apps.get_model('workouts', 'WorkoutExercise')
+    DailySummary = apps.get_model('workouts', 'DailySummary')
+    DailyExerciseSummary = apps.get_model('workouts', 'DailyExerciseSummary')
+    volume = DecimalField(max_digits=14, decimal_places=2)
+
+    for user_id in Workout.objects.order_by('user_id').values_list('user_id', flat=True).distinct():
+        days = {}
+        for row in (
+            Workout.objects.filter(user_id=user_id)
+            .values('date')
+            .annotate(workout_count=Count('id'), total_duration=Sum('duration'))
+            .order_by()
+        ):
+            days[row['date']] = DailySummary(
+                user_id=user_id,
+                date=row['date'],
+                workout_count=row['workout_count'],
+                total_duration=row['total_duration'],
+            )
+
+        exercise_days = []
+        for row in (
+            WorkoutExercise.objects.filter(workout__user_id=user_id)
+            .values('workout__date', 'exercise_id')
+            .annotate(
+                sets_sum=Sum('sets'),
+                reps_sum=Sum(ExpressionWrapper(F('sets') * F('reps'), output_field=IntegerField())),
+                volume_sum=Coalesce(
+                    Sum(ExpressionWrapper(F('sets') * F('reps') * F('weight'), output_field=volume)),
+                    Value(Decimal('0')),
+                    output_field=volume,
+                ),
+                weight_max=Max('weight'),
+                reps_max=Max('reps'),
+                set_volume_max=Max(ExpressionWrapper(F('reps') * F('weight'), output_field=volume)),
+            )
+            .order_by()
+        ):
+            day = days[row['workout__date']]
+            day.total_sets += row['sets_sum']
+            day.total_reps += row['reps_sum']
+            day.total_volume += row['volume_sum']
+            exercise_days.append(DailyExerciseSummary(
+                user_id=user_id,
+                date=row['workout__date'],
+                exercise_id=row['exercise_id'],
+                total_sets=row['sets_sum'],
+                total_reps=row['reps_sum'],
+                total_volume=row['volume_sum'],
+                max_weight=row['weight_max'],
+                max_reps=row['reps_max'],
+                max_set_volume=row['set_volume_max'],
+            ))
+
+        DailySummary.objects.filter(user_id=user_id).delete()
+        DailyExerciseSummary.objects.filter(user_id=user_id).delete()
+        DailySummary.objects.bulk_create(days.values(), batch_size=1000)
+        DailyExerciseSummary.objects.bulk_create(exercise_days, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_workout_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_summaries, migrations.RunPython.noop),
+    ]
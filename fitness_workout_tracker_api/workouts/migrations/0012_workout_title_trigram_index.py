@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_title_index(apps, schema_editor):
+    # Serves the `title__icontains` list filter, which Django compiles to
+    # UPPER("title"::text) LIKE UPPER(%s) on PostgreSQL. SQLite has no index
+    # type for infix matches, so there the filter scans the user's workouts.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS workout_title_trgm_idx ON workouts_workout '
+        'USING gin ((UPPER(title::text)) gin_trgm_ops)'
+    )
+
+
+def drop_title_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS workout_title_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0011_tombstone_model_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_title_index, drop_title_index),
+    ]
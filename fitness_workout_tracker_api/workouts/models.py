@@ -1,5 +1,8 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Exercise(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercises')
@@ -11,6 +14,10 @@ class Exercise(models.Model):
     class Meta:
         ordering = ['name']
         unique_together = ['user', 'name']  # One exercise name per user
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'], name='exercise_user_name_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='exercise_user_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -21,15 +28,56 @@ class Workout(models.Model):
     description = models.TextField(blank=True)
     date = models.DateField()
     duration = models.IntegerField(help_text='Duration in minutes')
+    # Denormalized from the workout's exercises and comments (see touch())
+    exercise_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    total_volume = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text='Sum of sets x reps x weight over the exercises'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['user', '-date', 'id'], name='workout_user_date_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='workout_user_updated_idx'),
+            models.Index(fields=['user', 'duration'], name='workout_user_duration_idx'),
+        ]
+
+    # Only written by the UPDATEs of touch() and repair_workout_aggregates()
+    AGGREGATE_FIELDS = ('exercise_count', 'comment_count', 'total_volume')
 
     def __str__(self):
         return f"{self.title} - {self.date}"
 
+    def save(self, *args, **kwargs):
+        # A full save of an existing workout would write back the aggregates
+        # loaded with it, undoing touch() increments made in the meantime
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.AGGREGATE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def touch(self, **deltas):
+        """
+        Mark the workout as modified after its exercises or comments change,
+        adding `deltas` to the stored aggregates (e.g. `comment_count=1`) in
+        the same UPDATE, so concurrent writes cannot lose an increment
+        """
+        self.updated_at = timezone.now()
+        Workout.objects.filter(pk=self.pk).update(
+            updated_at=self.updated_at,
+            **{field: F(field) + delta for field, delta in deltas.items() if delta}
+        )
+        for field, delta in deltas.items():
+            setattr(self, field, getattr(self, field) + delta)
+
 class WorkoutExercise(models.Model):
     workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name='workout_exercises')
     exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='workout_exercises')
@@ -38,14 +86,30 @@ class WorkoutExercise(models.Model):
     weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     notes = models.TextField(blank=True)
     order = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
         unique_together = ['workout', 'exercise', 'order']  # Prevent duplicate orders
+        indexes = [
+            models.Index(fields=['workout', 'order'], name='workoutexercise_order_idx'),
+            models.Index(fields=['updated_at', 'id'], name='workoutexercise_updated_idx'),
+            models.Index(fields=['exercise', 'workout'], name='workoutexercise_exercise_idx'),
+        ]
 
     def __str__(self):
         return f"{self.exercise.name} - {self.sets}x{self.reps}"
 
+    @property
+    def volume(self):
+        """
+        Sets x reps x weight, counted into Workout.total_volume
+        """
+        if self.weight is None:
+            return Decimal('0')
+        return self.sets * self.reps * Decimal(str(self.weight))
+
 class Comment(models.Model):
     workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_comments')
@@ -55,6 +119,89 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['workout', '-created_at', 'id'], name='comment_workout_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='comment_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.workout.title}"
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted row, kept so that offline clients can learn about
+    deletions through the sync endpoint
+    """
+    WORKOUT = 'workout'
+    EXERCISE = 'exercise'
+    WORKOUT_EXERCISE = 'workout_exercise'
+    COMMENT = 'comment'
+    MODEL_CHOICES = [
+        (WORKOUT, 'Workout'),
+        (EXERCISE, 'Exercise'),
+        (WORKOUT_EXERCISE, 'Workout exercise'),
+        (COMMENT, 'Comment'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones')
+    model = models.CharField(max_length=32, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['user', 'model', 'deleted_at'], name='tombstone_user_model_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
+
+    @classmethod
+    def record(cls, user, model, object_ids):
+        cls.objects.bulk_create([
+            cls(user=user, model=model, object_id=object_id)
+            for object_id in object_ids
+        ])
+
+class DailySummary(models.Model):
+    """
+    Per-user, per-day training totals, maintained incrementally from
+    workouts and their exercises (see summaries.py)
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_summaries')
+    date = models.DateField()
+    workout_count = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0, help_text='Duration in minutes')
+    total_sets = models.IntegerField(default=0)
+    total_reps = models.IntegerField(default=0)
+    total_volume = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['user', 'date']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
+
+class DailyExerciseSummary(models.Model):
+    """
+    Per-user, per-day, per-exercise totals and bests
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_exercise_summaries')
+    date = models.DateField()
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='daily_summaries')
+    total_sets = models.IntegerField(default=0)
+    total_reps = models.IntegerField(default=0)
+    total_volume = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    max_weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    max_reps = models.IntegerField(default=0)
+    max_set_volume = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['user', 'date', 'exercise']
+
+    def __str__(self):
+        return f"{self.exercise.name} - {self.date}"
@@ -0,0 +1,136 @@
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a composite ordering that ends in a unique field.
+
+    DRF's CursorPagination only positions on the first ordering field and
+    skips ties with an offset. Here the cursor carries every ordering value,
+    so each page is a single range scan no matter how deep it is.
+    """
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the (unevaluated) queryset holding the requested page plus
+        one extra row used to detect whether another page follows
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.cursor is not None and self.cursor.reverse:
+            ordering = [self._reverse_field(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+
+        if self.cursor is not None and self.cursor.position is not None:
+            queryset = queryset.filter(self.get_position_filter(queryset.model, ordering, self.cursor.position))
+
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        reverse = self.cursor is not None and self.cursor.reverse
+        has_position = self.cursor is not None and self.cursor.position is not None
+        has_more = len(results) > self.page_size
+
+        self.page = list(results[:self.page_size])
+        if reverse:
+            self.page.reverse()
+            self.has_next = has_position
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = has_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_position_filter(self, model, ordering, position):
+        """
+        Build the row-value comparison `(a, b, ...) > (x, y, ...)` honouring
+        the direction of each ordering field. Values that do not convert to
+        their field's type (a tampered cursor) are rejected like a malformed
+        cursor rather than failing in the query.
+        """
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError('Wrong number of cursor values')
+            values = [
+                self.to_python(model._meta.get_field(field.lstrip('-')), value)
+                for field, value in zip(ordering, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            attr = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            condition |= equal & Q(**{attr + lookup: value})
+            equal &= Q(**{attr: value})
+        return condition
+
+    @staticmethod
+    def to_python(field, value):
+        if not isinstance(value, str):
+            raise TypeError('Cursor values are strings')
+        value = field.to_python(value)
+        if value is None:
+            raise ValueError('Cursor values are not null')
+        return value
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            attr = field.lstrip('-')
+            value = instance[attr] if isinstance(instance, dict) else getattr(instance, attr)
+            values.append(str(value))
+        return json.dumps(values)
+
+    @staticmethod
+    def _reverse_field(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+class WorkoutPagination(KeysetPagination):
+    ordering = ('-date', 'id')
+
+class ExercisePagination(KeysetPagination):
+    ordering = ('name', 'id')
+
+class CommentPagination(KeysetPagination):
+    ordering = ('-created_at', 'id')
@@ -0,0 +1,185 @@
+"""
+Full-text search over exercises, workouts and workout exercise notes.
+
+On SQLite every searchable table has an external-content FTS5 index that
+triggers keep in sync with inserts, updates and deletes (bulk operations
+and cascades included). On PostgreSQL the same columns are covered by GIN
+indexes over weighted `to_tsvector('simple', ...)` expressions that the
+queries repeat verbatim. Both tokenize words without stemming, so a query matches
+the same rows on either database, and results are ordered by relevance
+(bm25 and ts_rank respectively).
+"""
+import re
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+
+class SearchIndex:
+    def __init__(self, table, columns, user_column, joins=''):
+        self.table = table
+        self.columns = columns
+        self.user_column = user_column
+        self.joins = joins
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+    def document(self, columns=None, alias='t'):
+        """
+        The PostgreSQL tsvector expression, with the first column weighted
+        highest. Queries must repeat the index definition exactly for the
+        index to be used.
+        """
+        prefix = f'{alias}.' if alias else ''
+        return ' || '.join(
+            f"setweight(to_tsvector('simple', coalesce({prefix}{column}, '')), '{'A' if i == 0 else 'B'}')"
+            for i, column in enumerate(columns or self.columns)
+        )
+
+    def rank(self):
+        """
+        The SQLite bm25() expression, with the first column weighted highest
+        """
+        weights = ', '.join(str(FIRST_COLUMN_WEIGHT if i == 0 else 1.0) for i in range(len(self.columns)))
+        return f'bm25({self.fts_table}, {weights})'
+
+INDEXES = {
+    'exercises': SearchIndex('workouts_exercise', ['name', 'description'], 't.user_id'),
+    'workouts': SearchIndex('workouts_workout', ['title', 'description'], 't.user_id'),
+    'workout_exercises': SearchIndex(
+        'workouts_workoutexercise',
+        ['notes'],
+        'w.user_id',
+        'JOIN workouts_workout w ON w.id = t.workout_id',
+    ),
+}
+
+# Matches in names and titles count this many times more than in descriptions
+FIRST_COLUMN_WEIGHT = 10.0
+
+# Autocomplete matches exercise names only
+PREFIX_INDEX = 'exercises'
+PREFIX_COLUMN = 'name'
+
+# The migration that creates the indexes
+SEARCH_MIGRATION = ('workouts', '0008_search_indexes')
+
+def install(schema_editor):
+    """
+    Create the search indexes for the current database. Safe to run again,
+    which install_after_migrate() does after every migrate.
+    """
+    vendor = schema_editor.connection.vendor
+    for index in INDEXES.values():
+        if vendor == 'sqlite':
+            columns = ', '.join(index.columns)
+            new_values = ', '.join(f'new.{column}' for column in index.columns)
+            old_values = ', '.join(f'old.{column}' for column in index.columns)
+            delete = (
+                f"INSERT INTO {index.fts_table}({index.fts_table}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {old_values});"
+            )
+            insert = f"INSERT INTO {index.fts_table}(rowid, {columns}) VALUES (new.id, {new_values});"
+            created = index.fts_table not in schema_editor.connection.introspection.table_names()
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {index.fts_table} USING fts5("
+                f"{columns}, content='{index.table}', content_rowid='id', prefix='2 3', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {index.fts_table}_insert AFTER INSERT ON {index.table} "
+                f"BEGIN {insert} END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {index.fts_table}_delete AFTER DELETE ON {index.table} "
+                f"BEGIN {delete} END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {index.fts_table}_update AFTER UPDATE OF {columns} ON {index.table} "
+                f"BEGIN {delete} {insert} END"
+            )
+            if created:
+                # Index the rows that already exist
+                schema_editor.execute(f"INSERT INTO {index.fts_table}({index.fts_table}) VALUES ('rebuild')")
+        elif vendor == 'postgresql':
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index.table}_search_idx ON {index.table} "
+                f"USING gin (({index.document(alias=None)}))"
+            )
+    if vendor == 'postgresql':
+        index = INDEXES[PREFIX_INDEX]
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index.table}_prefix_idx ON {index.table} "
+            f"USING gin (({index.document([PREFIX_COLUMN], alias=None)}))"
+        )
+
+def uninstall(schema_editor):
+    vendor = schema_editor.connection.vendor
+    for index in INDEXES.values():
+        if vendor == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {index.fts_table}_{trigger}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {index.fts_table}')
+        elif vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {index.table}_search_idx')
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEXES[PREFIX_INDEX].table}_prefix_idx')
+
+def install_after_migrate(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate receiver that puts back search triggers and indexes which
+    a later schema change dropped (SQLite rebuilds a table to alter most of
+    its columns), once the migration creating them has been applied
+    """
+    applied = MigrationRecorder(connections[using]).applied_migrations()
+    if SEARCH_MIGRATION not in applied:
+        return
+    with connections[using].schema_editor() as schema_editor:
+        install(schema_editor)
+
+def parse_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+def search_ids(name, user, query, limit, prefix=False):
+    """
+    Return the ids of the user's rows in index `name` that contain every
+    word of `query`, best match first. With `prefix` the last word may be
+    incomplete and only exercise names are searched.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+
+    index = INDEXES[name]
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"' for term in terms) + ('*' if prefix else '')
+        if prefix:
+            match = f'{PREFIX_COLUMN} : ({match})'
+        sql = (
+            f'SELECT t.id FROM {index.fts_table} '
+            f'JOIN {index.table} t ON t.id = {index.fts_table}.rowid {index.joins} '
+            f'WHERE {index.fts_table} MATCH %s AND {index.user_column} = %s '
+            f'ORDER BY {index.rank()}, t.id LIMIT %s'
+        )
+        params = [match, user.pk, limit]
+    else:
+        tsquery = ' & '.join(terms) + (':*' if prefix else '')
+        document = index.document([PREFIX_COLUMN] if prefix else None)
+        sql = (
+            f'SELECT t.id FROM {index.table} t {index.joins} '
+            f"WHERE {document} @@ to_tsquery('simple', %s) AND {index.user_column} = %s "
+            f"ORDER BY ts_rank({document}, to_tsquery('simple', %s)) DESC, t.id LIMIT %s"
+        )
+        params = [tsquery, user.pk, tsquery, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+def search(name, queryset, user, query, limit, prefix=False):
+    """
+    Return the matching objects of `queryset` in relevance order
+    """
+    ids = search_ids(name, user, query, limit, prefix)
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
@@ -1,7 +1,82 @@
+from django.conf import settings
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Workout, Exercise, WorkoutExercise, Comment
+from fitness_workout_tracker_api.instrumentation import InstrumentedModelSerializer, InstrumentedSerializer
+from .models import Workout, Exercise, WorkoutExercise, Comment, Tombstone
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """
+    Declares the related objects a serializer reads so that views can load
+    them up front instead of issuing one query per row.
+
+    `select_related_fields` lists forward relations to join, while
+    `prefetch_related_fields` maps reverse relations to the serializer used
+    to render them, so nested serializers contribute their own paths.
+    """
+    select_related_fields = []
+    prefetch_related_fields = {}
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        for lookup, serializer_class in cls.prefetch_related_fields.items():
+            queryset = cls.prefetch_serializer(queryset, lookup, serializer_class)
+        return queryset
+
+    @staticmethod
+    def prefetch_serializer(queryset, lookup, serializer_class):
+        related_queryset = serializer_class.Meta.model.objects.all()
+        return queryset.prefetch_related(
+            Prefetch(lookup, queryset=serializer_class.setup_eager_loading(related_queryset))
+        )
+
+class ExpandableFieldsMixin(EagerLoadingMixin):
+    """
+    Lets clients shape the representation through query parameters.
+
+    `?fields=id,title` keeps only the listed fields, and `?expand=comments`
+    adds nested relations declared in `expandable_fields`. Relations that are
+    not expanded are neither rendered nor loaded from the database.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        expand = self.get_expand(request)
+        fields = self.parse_list(request, 'fields')
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in expand:
+            serializer_class, field_kwargs = self.expandable_fields[name]
+            self.fields[name] = serializer_class(**field_kwargs)
+
+    @classmethod
+    def get_expand(cls, request):
+        return [name for name in cls.parse_list(request, 'expand') if name in cls.expandable_fields]
+
+    @staticmethod
+    def parse_list(request, param):
+        if request is None:
+            return []
+        value = request.query_params.get(param, '')
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        queryset = super().setup_eager_loading(queryset, request)
+        for name in cls.get_expand(request):
+            serializer_class, field_kwargs = cls.expandable_fields[name]
+            lookup = field_kwargs.get('source', name)
+            queryset = cls.prefetch_serializer(queryset, lookup, serializer_class)
+        return queryset
+
+class ExerciseSerializer(InstrumentedModelSerializer):
     class Meta:
         model = Exercise
         fields = ['id', 'name', 'description', 'created_at', 'updated_at']
@@ -11,21 +86,70 @@ class ExerciseSerializer(serializers.ModelSerializer):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
 
-class WorkoutExerciseSerializer(serializers.ModelSerializer):
+class WorkoutExerciseSerializer(EagerLoadingMixin, InstrumentedModelSerializer):
+    select_related_fields = ['exercise']
+
     exercise_name = serializers.CharField(source='exercise.name', read_only=True)
 
     class Meta:
         model = WorkoutExercise
         fields = ['id', 'exercise', 'exercise_name', 'sets', 'reps', 'weight', 'notes', 'order']
 
-class AddExerciseToWorkoutSerializer(serializers.ModelSerializer):
+class BulkAddExerciseToWorkoutSerializer(serializers.ListSerializer):
+    """
+    Validates a batch of exercises for a workout, resolving every
+    `exercise_id` with a single query instead of one per item
+    """
+    def to_internal_value(self, data):
+        # Per-item errors raised here keep the same list shape DRF uses for
+        # field errors, unlike errors raised from validate()
+        attrs = super().to_internal_value(data)
+        exercise_ids = {item['exercise_id'] for item in attrs}
+        self.exercises = {
+            exercise.id: exercise
+            for exercise in Exercise.objects.filter(
+                id__in=exercise_ids,
+                user=self.context['request'].user
+            )
+        }
+
+        taken = set()
+        workout = self.context.get('workout')
+        if workout is not None and not self.context.get('replace'):
+            taken = set(
+                WorkoutExercise.objects.filter(
+                    workout=workout,
+                    exercise_id__in=exercise_ids
+                ).values_list('exercise_id', 'order')
+            )
+
+        errors = []
+        for item in attrs:
+            key = (item['exercise_id'], item.get('order', 0))
+            if item['exercise_id'] not in self.exercises:
+                errors.append({'exercise_id': ['Exercise not found']})
+            elif key in taken:
+                errors.append({'order': ['This exercise is already in the workout at this order']})
+            else:
+                errors.append({})
+            taken.add(key)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+class AddExerciseToWorkoutSerializer(InstrumentedModelSerializer):
     exercise_id = serializers.IntegerField()
 
     class Meta:
         model = WorkoutExercise
         fields = ['exercise_id', 'sets', 'reps', 'weight', 'notes', 'order']
+        list_serializer_class = BulkAddExerciseToWorkoutSerializer
 
     def validate_exercise_id(self, value):
+        if isinstance(self.parent, BulkAddExerciseToWorkoutSerializer):
+            # The list serializer checks the whole batch at once
+            return value
         try:
             exercise = Exercise.objects.get(
                 id=value,
@@ -35,7 +159,9 @@ class AddExerciseToWorkoutSerializer(serializers.ModelSerializer):
         except Exercise.DoesNotExist:
             raise serializers.ValidationError("Exercise not found")
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(EagerLoadingMixin, InstrumentedModelSerializer):
+    select_related_fields = ['user']
+
     username = serializers.CharField(source='user.username', read_only=True)
 
     class Meta:
@@ -43,16 +169,197 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'username', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
-class WorkoutSerializer(serializers.ModelSerializer):
+class WorkoutSerializer(EagerLoadingMixin, InstrumentedModelSerializer):
+    prefetch_related_fields = {
+        'workout_exercises': WorkoutExerciseSerializer,
+        'comments': CommentSerializer,
+    }
+
     exercises = WorkoutExerciseSerializer(source='workout_exercises', many=True, read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
 
     class Meta:
         model = Workout
         fields = ['id', 'title', 'description', 'date', 'duration', 
+                 'exercise_count', 'comment_count', 'total_volume',
                  'created_at', 'updated_at', 'exercises', 'comments']
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['exercise_count', 'comment_count', 'total_volume', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data) 
\ No newline at end of file
+        return super().create(validated_data)
+
+class WorkoutListSerializer(ExpandableFieldsMixin, InstrumentedModelSerializer):
+    """
+    Compact workout representation for list views
+    """
+    expandable_fields = {
+        'exercises': (WorkoutExerciseSerializer, {'source': 'workout_exercises', 'many': True, 'read_only': True}),
+        'comments': (CommentSerializer, {'many': True, 'read_only': True}),
+    }
+
+    class Meta:
+        model = Workout
+        fields = ['id', 'title', 'date', 'duration', 'exercise_count', 'comment_count', 'total_volume']
+        read_only_fields = ['exercise_count', 'comment_count', 'total_volume']
+
+class WorkoutStatsQuerySerializer(InstrumentedSerializer):
+    period = serializers.ChoiceField(choices=['week', 'month'], default='week')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if 'date_from' in attrs and 'date_to' in attrs and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from must not be after date_to")
+        return attrs
+
+class WorkoutFilterSerializer(InstrumentedSerializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    exercise = serializers.IntegerField(required=False, min_value=1)
+    min_duration = serializers.IntegerField(required=False, min_value=0)
+    max_duration = serializers.IntegerField(required=False, min_value=0)
+    title = serializers.CharField(required=False, max_length=200)
+
+    def validate(self, attrs):
+        if 'date_from' in attrs and 'date_to' in attrs and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from must not be after date_to")
+        if (
+            'min_duration' in attrs and 'max_duration' in attrs
+            and attrs['min_duration'] > attrs['max_duration']
+        ):
+            raise serializers.ValidationError("min_duration must not be greater than max_duration")
+        return attrs
+
+class PeriodTotalsSerializer(InstrumentedSerializer):
+    period = serializers.DateField()
+    workouts = serializers.IntegerField()
+    duration = serializers.IntegerField()
+    sets = serializers.IntegerField()
+    reps = serializers.IntegerField()
+    volume = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class PersonalBestSerializer(InstrumentedSerializer):
+    exercise_id = serializers.IntegerField()
+    exercise_name = serializers.CharField()
+    max_weight = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    max_weight_date = serializers.DateField(allow_null=True)
+    max_reps = serializers.IntegerField()
+    max_volume = serializers.DecimalField(max_digits=14, decimal_places=2, allow_null=True)
+
+class ExerciseHistoryQuerySerializer(InstrumentedSerializer):
+    bucket = serializers.ChoiceField(choices=['session', 'day', 'week', 'month', 'year'], default='session')
+    max_points = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.HISTORY_MAX_POINTS,
+        default=settings.HISTORY_MAX_POINTS
+    )
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if 'date_from' in attrs and 'date_to' in attrs and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from must not be after date_to")
+        return attrs
+
+class ExerciseHistoryPointSerializer(InstrumentedSerializer):
+    date = serializers.DateField()
+    workout_id = serializers.IntegerField(required=False)
+    sessions = serializers.IntegerField()
+    max_weight = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    estimated_one_rep_max = serializers.DecimalField(max_digits=14, decimal_places=2, allow_null=True)
+    volume = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class ExportQuerySerializer(InstrumentedSerializer):
+    type = serializers.ChoiceField(choices=['ndjson', 'csv'], default='ndjson')
+
+class ImportFileSerializer(InstrumentedSerializer):
+    file = serializers.FileField()
+    type = serializers.ChoiceField(choices=['ndjson', 'csv'], required=False)
+
+    def validate(self, attrs):
+        if 'type' not in attrs:
+            extension = attrs['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in ('ndjson', 'csv'):
+                raise serializers.ValidationError("Pass type=csv or type=ndjson for this file name")
+            attrs['type'] = extension
+        return attrs
+
+class ImportWorkoutExerciseSerializer(InstrumentedModelSerializer):
+    exercise_name = serializers.CharField(max_length=200)
+
+    class Meta:
+        model = WorkoutExercise
+        fields = ['exercise_name', 'sets', 'reps', 'weight', 'notes', 'order']
+
+class ImportWorkoutSerializer(InstrumentedModelSerializer):
+    """
+    Validates one imported workout with its exercises. Exercises are
+    referenced by name and created for the user when missing.
+    """
+    exercises = ImportWorkoutExerciseSerializer(many=True, required=False)
+
+    class Meta:
+        model = Workout
+        fields = ['title', 'description', 'date', 'duration', 'exercises']
+
+    def validate_exercises(self, value):
+        keys = [(item['exercise_name'], item.get('order', 0)) for item in value]
+        if len(keys) != len(set(keys)):
+            raise serializers.ValidationError("Duplicate order for the same exercise")
+        return value
+
+class SyncQuerySerializer(InstrumentedSerializer):
+    since = serializers.DateTimeField(required=False)
+    token = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=settings.SYNC_PAGE_SIZE)
+
+class SyncWorkoutSerializer(InstrumentedModelSerializer):
+    class Meta:
+        model = Workout
+        fields = ['id', 'title', 'description', 'date', 'duration', 'created_at', 'updated_at']
+
+class SyncWorkoutExerciseSerializer(InstrumentedModelSerializer):
+    class Meta:
+        model = WorkoutExercise
+        fields = ['id', 'workout', 'exercise', 'sets', 'reps', 'weight', 'notes', 'order',
+                  'created_at', 'updated_at']
+
+class SyncCommentSerializer(InstrumentedModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'workout', 'text', 'username', 'created_at', 'updated_at']
+
+class TombstoneSerializer(InstrumentedModelSerializer):
+    id = serializers.IntegerField(source='object_id')
+
+    class Meta:
+        model = Tombstone
+        fields = ['model', 'id', 'deleted_at']
+
+class SearchQuerySerializer(InstrumentedSerializer):
+    q = serializers.CharField(max_length=200)
+    type = serializers.ChoiceField(choices=['exercises', 'workouts', 'workout_exercises'], required=False)
+    prefix = serializers.BooleanField(default=False)
+    limit = serializers.IntegerField(min_value=1, max_value=settings.MAX_PAGE_SIZE, default=settings.PAGE_SIZE)
+
+    def validate(self, attrs):
+        if attrs['prefix'] and attrs.get('type', 'exercises') != 'exercises':
+            raise serializers.ValidationError("prefix search only applies to exercises")
+        return attrs
+
+class ExerciseNameSerializer(InstrumentedModelSerializer):
+    class Meta:
+        model = Exercise
+        fields = ['id', 'name']
+
+class SearchWorkoutSerializer(InstrumentedModelSerializer):
+    class Meta:
+        model = Workout
+        fields = ['id', 'title', 'description', 'date', 'duration']
+
+class SearchWorkoutExerciseSerializer(WorkoutExerciseSerializer):
+    class Meta(WorkoutExerciseSerializer.Meta):
+        fields = ['id', 'workout'] + WorkoutExerciseSerializer.Meta.fields[1:]
@@ -0,0 +1,138 @@
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Max, Sum, Value, Window
+from django.db.models.functions import Coalesce, RowNumber, TruncMonth, TruncWeek, TruncYear
+from .models import DailySummary, DailyExerciseSummary, WorkoutExercise
+from .summaries import SET_VOLUME
+
+PERIOD_FUNCTIONS = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# Finest first; an exercise history uses the finest bucket (no finer than
+# requested) that fits in its point cap
+HISTORY_BUCKETS = {
+    'session': F('workout_id'),
+    'day': F('workout__date'),
+    'week': TruncWeek('workout__date'),
+    'month': TruncMonth('workout__date'),
+    'year': TruncYear('workout__date'),
+}
+
+# Epley: weight x (1 + reps / 30), in floating point on every database
+ESTIMATED_ONE_REP_MAX = ExpressionWrapper(
+    F('weight') * (F('reps') + Value(30.0)) / Value(30.0),
+    output_field=FloatField()
+)
+
+def filter_dates(queryset, date_field, date_from=None, date_to=None):
+    if date_from is not None:
+        queryset = queryset.filter(**{f'{date_field}__gte': date_from})
+    if date_to is not None:
+        queryset = queryset.filter(**{f'{date_field}__lte': date_to})
+    return queryset
+
+def period_totals(user, period='week', date_from=None, date_to=None):
+    """
+    Return per-period totals of workouts, duration, sets, reps and volume
+    (sets x reps x weight), oldest period first.
+
+    Totals are rolled up from the daily summaries, so the cost depends on
+    the number of days in the range rather than on the number of sets.
+    """
+    trunc = PERIOD_FUNCTIONS[period]
+    days = filter_dates(DailySummary.objects.filter(user=user), 'date', date_from, date_to)
+    return list(
+        days
+        .annotate(period=trunc('date'))
+        .values('period')
+        .annotate(
+            workouts=Sum('workout_count'),
+            duration=Sum('total_duration'),
+            sets=Sum('total_sets'),
+            reps=Sum('total_reps'),
+            volume=Sum('total_volume'),
+        )
+        .order_by('period')
+    )
+
+def personal_bests(user, date_from=None, date_to=None):
+    """
+    Return, per exercise, the heaviest weight lifted (and when), the most
+    reps in a set and the largest single-set volume.
+    """
+    days = filter_dates(DailyExerciseSummary.objects.filter(user=user), 'date', date_from, date_to)
+
+    heaviest = (
+        days
+        .filter(max_weight__isnull=False)
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=F('exercise_id'),
+            order_by=[F('max_weight').desc(), F('date').asc()]
+        ))
+        .filter(rank=1)
+        .values('exercise_id', 'max_weight', 'date')
+    )
+    heaviest = {row['exercise_id']: row for row in heaviest}
+
+    rows = (
+        days
+        .values('exercise_id', 'exercise__name')
+        .annotate(best_reps=Max('max_reps'), best_set_volume=Max('max_set_volume'))
+        .order_by('exercise__name')
+    )
+    bests = []
+    for row in rows:
+        best = heaviest.get(row['exercise_id'], {})
+        bests.append({
+            'exercise_id': row['exercise_id'],
+            'exercise_name': row['exercise__name'],
+            'max_weight': best.get('max_weight'),
+            'max_weight_date': best.get('date'),
+            'max_reps': row['best_reps'],
+            'max_volume': row['best_set_volume'],
+        })
+    return bests
+
+def exercise_history(exercise, bucket='session', max_points=500, date_from=None, date_to=None):
+    """
+    Return the heaviest weight, best estimated one-rep max and volume of an
+    exercise per session (workout) or per day/week/month/year, oldest first.
+
+    Points are aggregated by the database in one GROUP BY over the sets, so
+    the response size, not the length of the history, bounds the Python
+    work. A bucket whose series would exceed `max_points` is coarsened
+    (e.g. sessions to weeks); if even years do not fit, the most recent
+    `max_points` points are returned and `truncated` is set.
+    """
+    sets = filter_dates(
+        WorkoutExercise.objects.filter(exercise=exercise),
+        'workout__date',
+        date_from,
+        date_to
+    ).order_by()
+
+    buckets = list(HISTORY_BUCKETS)[list(HISTORY_BUCKETS).index(bucket):]
+    counts = sets.aggregate(**{
+        name: Count(HISTORY_BUCKETS[name], distinct=True) for name in buckets
+    })
+    bucket = next((name for name in buckets if counts[name] <= max_points), buckets[-1])
+    truncated = counts[bucket] > max_points
+
+    if bucket == 'session':
+        groups = sets.values('workout_id').annotate(date=Max('workout__date'))
+    else:
+        groups = sets.values(date=HISTORY_BUCKETS[bucket])
+    points = (
+        groups
+        .annotate(
+            sessions=Count('workout', distinct=True),
+            max_weight=Max('weight'),
+            estimated_one_rep_max=Max(ESTIMATED_ONE_REP_MAX),
+            volume=Coalesce(Sum(SET_VOLUME), Value(0, output_field=SET_VOLUME.output_field)),
+        )
+        .order_by('-date', *(['-workout_id'] if bucket == 'session' else []))
+    )
+    points = list(points[:max_points])
+    points.reverse()
+    return {'bucket': bucket, 'truncated': truncated, 'points': points}
@@ -0,0 +1,203 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import (
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .caching import invalidate_user_cache
+from .models import Workout, WorkoutExercise, Comment, DailySummary, DailyExerciseSummary
+
+SET_REPS = ExpressionWrapper(F('sets') * F('reps'), output_field=IntegerField())
+SET_VOLUME = ExpressionWrapper(
+    F('sets') * F('reps') * F('weight'),
+    output_field=DecimalField(max_digits=14, decimal_places=2)
+)
+REP_VOLUME = ExpressionWrapper(
+    F('reps') * F('weight'),
+    output_field=DecimalField(max_digits=14, decimal_places=2)
+)
+
+DAILY_SUMMARY_FIELDS = ['workout_count', 'total_duration', 'total_sets', 'total_reps', 'total_volume']
+DAILY_EXERCISE_SUMMARY_FIELDS = [
+    'total_sets', 'total_reps', 'total_volume', 'max_weight', 'max_reps', 'max_set_volume'
+]
+
+def compute_summaries(workouts, workout_exercises):
+    """
+    Aggregate the given workout and workout exercise querysets into unsaved
+    DailySummary and DailyExerciseSummary rows keyed by (user, date)
+    """
+    days = {}
+    for row in (
+        workouts
+        .values('user_id', 'date')
+        .annotate(workout_count=Count('id'), total_duration=Sum('duration'))
+        .order_by()
+    ):
+        days[row['user_id'], row['date']] = DailySummary(
+            user_id=row['user_id'],
+            date=row['date'],
+            workout_count=row['workout_count'],
+            total_duration=row['total_duration'],
+        )
+
+    exercise_days = []
+    for row in (
+        workout_exercises
+        .values('workout__user_id', 'workout__date', 'exercise_id')
+        .annotate(
+            sets_sum=Sum('sets'),
+            reps_sum=Sum(SET_REPS),
+            volume_sum=Coalesce(Sum(SET_VOLUME), Value(Decimal('0')), output_field=SET_VOLUME.output_field),
+            weight_max=Max('weight'),
+            reps_max=Max('reps'),
+            set_volume_max=Max(REP_VOLUME),
+        )
+        .order_by()
+    ):
+        key = (row['workout__user_id'], row['workout__date'])
+        day = days[key]
+        day.total_sets += row['sets_sum']
+        day.total_reps += row['reps_sum']
+        day.total_volume += row['volume_sum']
+        exercise_days.append(DailyExerciseSummary(
+            user_id=key[0],
+            date=key[1],
+            exercise_id=row['exercise_id'],
+            total_sets=row['sets_sum'],
+            total_reps=row['reps_sum'],
+            total_volume=row['volume_sum'],
+            max_weight=row['weight_max'],
+            max_reps=row['reps_max'],
+            max_set_volume=row['set_volume_max'],
+        ))
+    return list(days.values()), exercise_days
+
+def save_summaries(days, exercise_days):
+    DailySummary.objects.bulk_create(
+        days,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=DAILY_SUMMARY_FIELDS,
+    )
+    DailyExerciseSummary.objects.bulk_create(
+        exercise_days,
+        update_conflicts=True,
+        unique_fields=['user', 'date', 'exercise'],
+        update_fields=DAILY_EXERCISE_SUMMARY_FIELDS,
+    )
+
+@transaction.atomic
+def refresh_daily_summaries(user, dates):
+    """
+    Recompute the summaries of `user` for the given days from the source
+    rows. Only the touched days are read, so the cost of a write does not
+    grow with the length of the user's history.
+    """
+    dates = {day for day in dates if day is not None}
+    if not dates:
+        return
+
+    days, exercise_days = compute_summaries(
+        Workout.objects.filter(user=user, date__in=dates),
+        WorkoutExercise.objects.filter(workout__user=user, workout__date__in=dates),
+    )
+
+    # Days and exercises that no longer have any rows are dropped
+    DailySummary.objects.filter(user=user, date__in=dates).exclude(
+        date__in=[day.date for day in days]
+    ).delete()
+    kept = defaultdict(list)
+    for exercise_day in exercise_days:
+        kept[exercise_day.date].append(exercise_day.exercise_id)
+    for day in dates:
+        DailyExerciseSummary.objects.filter(user=user, date=day).exclude(
+            exercise_id__in=kept[day]
+        ).delete()
+
+    save_summaries(days, exercise_days)
+
+def rebuild_daily_summaries(users):
+    """
+    Discard and recompute all summaries of the given users
+    """
+    for user in users:
+        with transaction.atomic():
+            DailySummary.objects.filter(user=user).delete()
+            DailyExerciseSummary.objects.filter(user=user).delete()
+            save_summaries(*compute_summaries(
+                Workout.objects.filter(user=user),
+                WorkoutExercise.objects.filter(workout__user=user),
+            ))
+
+def _per_workout(model, aggregate, output_field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(workout=OuterRef('pk'))
+            .order_by()
+            .values('workout')
+            .annotate(value=aggregate)
+            .values('value'),
+            output_field=output_field,
+        ),
+        Value(0, output_field=output_field),
+    )
+
+def workout_aggregates():
+    """
+    Expressions computing Workout.exercise_count, comment_count and
+    total_volume from the source rows
+    """
+    volume_field = Workout._meta.get_field('total_volume')
+    return {
+        'exercise_count': _per_workout(WorkoutExercise, Count('id'), IntegerField()),
+        'comment_count': _per_workout(Comment, Count('id'), IntegerField()),
+        'total_volume': _per_workout(WorkoutExercise, Sum(SET_VOLUME), volume_field),
+    }
+
+def update_workout_aggregates(workouts):
+    """
+    Recompute the stored aggregates of the `workouts` queryset in one UPDATE,
+    for writes that change many rows at once
+    """
+    return workouts.update(**workout_aggregates())
+
+def repair_workout_aggregates(workouts, batch_size=500):
+    """
+    Compare the stored aggregates of the `workouts` queryset with the source
+    rows, fix the workouts that drifted (marking them modified so clients
+    and caches pick up the change) and return their ids
+    """
+    expected = {f'expected_{field}': expression for field, expression in workout_aggregates().items()}
+    drifted = []
+    users = set()
+    for row in (
+        workouts
+        .annotate(**expected)
+        .values('pk', 'user_id', 'exercise_count', 'comment_count', 'total_volume', *expected)
+        .order_by('pk')
+        .iterator(chunk_size=batch_size)
+    ):
+        if any(row[field] != row[f'expected_{field}'] for field in ('exercise_count', 'comment_count', 'total_volume')):
+            drifted.append(row['pk'])
+            users.add(row['user_id'])
+
+    for start in range(0, len(drifted), batch_size):
+        Workout.objects.filter(pk__in=drifted[start:start + batch_size]).update(
+            updated_at=timezone.now(),
+            **workout_aggregates()
+        )
+    for user_id in users:
+        invalidate_user_cache(user_id)
+    return drifted
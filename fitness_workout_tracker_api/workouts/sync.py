@@ -0,0 +1,118 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Workout, Exercise, WorkoutExercise, Comment, Tombstone
+from .serializers import (
+    ExerciseSerializer,
+    SyncWorkoutSerializer,
+    SyncWorkoutExerciseSerializer,
+    SyncCommentSerializer,
+    TombstoneSerializer
+)
+
+TOKEN_SALT = 'workouts.sync'
+
+class InvalidSyncToken(Exception):
+    pass
+
+def _changes(user):
+    """
+    Return (name, queryset, timestamp field, serializer class) for every kind
+    of row the sync endpoint reports
+    """
+    return [
+        ('workouts', Workout.objects.filter(user=user), 'updated_at', SyncWorkoutSerializer),
+        ('exercises', Exercise.objects.filter(user=user), 'updated_at', ExerciseSerializer),
+        (
+            'workout_exercises',
+            WorkoutExercise.objects.filter(workout__user=user),
+            'updated_at',
+            SyncWorkoutExerciseSerializer,
+        ),
+        (
+            'comments',
+            Comment.objects.filter(workout__user=user).select_related('user'),
+            'updated_at',
+            SyncCommentSerializer,
+        ),
+        ('deleted', Tombstone.objects.filter(user=user), 'deleted_at', TombstoneSerializer),
+    ]
+
+def encode_token(user, payload):
+    return signing.dumps({'user': user.pk, **payload}, salt=TOKEN_SALT, compress=True)
+
+def decode_token(user, token):
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise InvalidSyncToken('Invalid sync token')
+    if payload.get('user') != user.pk:
+        raise InvalidSyncToken('Invalid sync token')
+    return payload
+
+def get_changes(user, since=None, token=None, limit=None):
+    """
+    Return rows created, updated or deleted after `since` (or after the
+    point recorded in a continuation `token`) as a dict of serialized lists.
+
+    Each sync round covers changes up to a fixed upper bound chosen when the
+    round starts. Every kind of row is read in (timestamp, id) order with a
+    keyset filter, `limit` rows at a time, so one call costs time in
+    proportion to the changes it returns rather than the user's history.
+    While `has_more` is true the returned token continues the current round.
+    Once it is false, the token starts the next round from that bound.
+    Clients should apply a round only once it is complete, because rows of
+    different kinds are paged independently.
+    """
+    limit = limit or settings.SYNC_PAGE_SIZE
+    positions = {}
+    if token is not None:
+        payload = decode_token(user, token)
+        since = parse_datetime(payload['since']) if payload.get('since') else None
+        until = parse_datetime(payload['until']) if payload.get('until') else None
+        positions = payload.get('positions', {})
+    else:
+        until = None
+    if until is None:
+        # Leave recently committed transactions time to become visible
+        until = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+    result = {}
+    next_positions = {}
+    has_more = False
+    for name, queryset, timestamp, serializer_class in _changes(user):
+        queryset = queryset.filter(**{f'{timestamp}__lte': until})
+        if name in positions:
+            position_time, position_id = positions[name]
+            queryset = queryset.filter(
+                Q(**{f'{timestamp}__gt': position_time})
+                | Q(**{timestamp: position_time, 'id__gt': position_id})
+            )
+        elif since is not None:
+            queryset = queryset.filter(**{f'{timestamp}__gt': since})
+
+        rows = list(queryset.order_by(timestamp, 'id')[:limit + 1])
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        if rows:
+            last = rows[-1]
+            next_positions[name] = [getattr(last, timestamp).isoformat(), last.id]
+        elif name in positions:
+            next_positions[name] = positions[name]
+        result[name] = serializer_class(rows, many=True).data
+
+    if has_more:
+        token = encode_token(user, {
+            'since': since.isoformat() if since else None,
+            'until': until.isoformat(),
+            'positions': next_positions,
+        })
+    else:
+        token = encode_token(user, {'since': until.isoformat()})
+
+    result.update({'until': until, 'has_more': has_more, 'token': token})
+    return result
@@ -1,12 +1,49 @@
-from django.test import TestCase
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, connections
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.auth.models import User
+from rest_framework.serializers import BaseSerializer, ListSerializer
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Exercise, Workout, WorkoutExercise, Comment
-from datetime import date
+from fitness_workout_tracker_api.authentication.models import AuthToken
+from fitness_workout_tracker_api.instrumentation import InstrumentedSerializerMixin, PerformanceMiddleware, registry
+from fitness_workout_tracker_api.db_routers import (
+    ReplicaRouter,
+    end_replica_reads,
+    reading_from_replica,
+    start_replica_reads
+)
+from .checks import check_replica_pin_cache, check_response_cache
+from .filters import filter_workouts
+from .models import Exercise, Workout, WorkoutExercise, Comment, DailySummary, DailyExerciseSummary
+from .imports import import_workouts
+from .summaries import rebuild_daily_summaries
+from .serializers import BulkAddExerciseToWorkoutSerializer
+from .views import WorkoutViewSet
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+import base64
+import copy
+import csv
+import json
+import os
+import tempfile
+from unittest import mock, skipUnless
+from urllib.parse import urlencode
 
 class WorkoutIsolationTests(TestCase):
     def setUp(self):
+        cache.clear()
         # Create two users
         self.user1 = User.objects.create_user('user1', 'user1@test.com', 'password123')
         self.user2 = User.objects.create_user('user2', 'user2@test.com', 'password123')
@@ -151,15 +188,1920 @@ class WorkoutIsolationTests(TestCase):
         """Test that list endpoints only return user's own data"""
         # Test exercises list
         response = self.client2.get('/exercises/')
-        self.assertEqual(len(response.data), 0)  # user2 should see no exercises
+        self.assertEqual(len(response.data['results']), 0)  # user2 should see no exercises
 
         # Test workouts list
         response = self.client2.get('/workouts/')
-        self.assertEqual(len(response.data), 0)  # user2 should see no workouts
+        self.assertEqual(len(response.data['results']), 0)  # user2 should see no workouts
 
         # Verify user1 sees their data
         response = self.client1.get('/exercises/')
-        self.assertEqual(len(response.data), 1)  # user1 should see their exercise
+        self.assertEqual(len(response.data['results']), 1)  # user1 should see their exercise
 
         response = self.client1.get('/workouts/')
-        self.assertEqual(len(response.data), 1)  # user1 should see their workout
+        self.assertEqual(len(response.data['results']), 1)  # user1 should see their workout
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class WorkoutQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.exercises = [
+            Exercise.objects.create(user=self.user, name=f'Exercise {i}')
+            for i in range(3)
+        ]
+
+    def create_workouts(self, count):
+        for i in range(count):
+            workout = Workout.objects.create(
+                user=self.user,
+                title=f'Workout {i}',
+                date=date.today(),
+                duration=30
+            )
+            for order, exercise in enumerate(self.exercises):
+                WorkoutExercise.objects.create(
+                    workout=workout,
+                    exercise=exercise,
+                    sets=3,
+                    reps=10,
+                    order=order
+                )
+            Comment.objects.create(workout=workout, user=self.user, text='Nice')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context)
+
+    def test_workout_list_query_count_is_constant(self):
+        """Test that listing workouts does not issue queries per workout"""
+        url = '/workouts/?expand=exercises,comments'
+        self.create_workouts(1)
+        baseline = self.count_queries(url)
+
+        self.create_workouts(10)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_workout_detail_query_count_is_constant(self):
+        """Test that retrieving a workout does not issue queries per nested row"""
+        self.create_workouts(1)
+        workout = Workout.objects.get()
+        baseline = self.count_queries(f'/workouts/{workout.id}/')
+
+        for i in range(5):
+            Comment.objects.create(workout=workout, user=self.user, text=f'Comment {i}')
+        self.assertEqual(self.count_queries(f'/workouts/{workout.id}/'), baseline)
+
+    def test_nested_list_query_count_is_constant(self):
+        """Test that nested exercise and comment lists are loaded eagerly"""
+        self.create_workouts(1)
+        workout = Workout.objects.get()
+        exercises_baseline = self.count_queries(f'/workouts/{workout.id}/exercises/')
+        comments_baseline = self.count_queries(f'/workouts/{workout.id}/comments/')
+
+        extra = Exercise.objects.create(user=self.user, name='Extra')
+        WorkoutExercise.objects.create(workout=workout, exercise=extra, sets=1, reps=1, order=10)
+        Comment.objects.create(workout=workout, user=self.user, text='Another')
+        self.assertEqual(self.count_queries(f'/workouts/{workout.id}/exercises/'), exercises_baseline)
+        self.assertEqual(self.count_queries(f'/workouts/{workout.id}/comments/'), comments_baseline)
+
+class WorkoutListRepresentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        exercise = Exercise.objects.create(user=self.user, name='Squat')
+        self.workout = Workout.objects.create(
+            user=self.user,
+            title='Leg Day',
+            description='Heavy',
+            date=date.today(),
+            duration=45
+        )
+        WorkoutExercise.objects.create(workout=self.workout, exercise=exercise, sets=5, reps=5)
+        Comment.objects.create(workout=self.workout, user=self.user, text='Tough one')
+
+    def test_list_is_compact_by_default(self):
+        """Test that the list omits nested relations and skips loading them"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/workouts/')
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'title', 'date', 'duration', 'exercise_count', 'comment_count', 'total_volume'}
+        )
+        self.assertFalse(any('workouts_comment' in q['sql'] for q in context.captured_queries))
+        self.assertFalse(any('workouts_workoutexercise' in q['sql'] for q in context.captured_queries))
+
+    def test_expand_adds_nested_relations(self):
+        """Test that expand embeds the requested relations only"""
+        response = self.client.get('/workouts/?expand=comments')
+        workout = response.data['results'][0]
+        self.assertEqual(workout['comments'][0]['text'], 'Tough one')
+        self.assertNotIn('exercises', workout)
+
+        response = self.client.get('/workouts/?expand=exercises,comments,unknown')
+        workout = response.data['results'][0]
+        self.assertEqual(workout['exercises'][0]['exercise_name'], 'Squat')
+        self.assertEqual(len(workout['comments']), 1)
+
+    def test_fields_limits_representation(self):
+        """Test that fields selects a subset of the compact representation"""
+        response = self.client.get('/workouts/?fields=id,title&expand=exercises')
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'title', 'exercises'}
+        )
+
+    def test_detail_keeps_full_representation(self):
+        """Test that retrieving a workout still embeds exercises and comments"""
+        response = self.client.get(f'/workouts/{self.workout.id}/')
+        self.assertEqual(response.data['description'], 'Heavy')
+        self.assertEqual(len(response.data['exercises']), 1)
+        self.assertEqual(len(response.data['comments']), 1)
+
+class BulkWorkoutExerciseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.exercises = [
+            Exercise.objects.create(user=self.user, name=f'Exercise {i}')
+            for i in range(12)
+        ]
+        self.workout = Workout.objects.create(
+            user=self.user,
+            title='Session',
+            date=date.today(),
+            duration=60
+        )
+        self.url = f'/workouts/{self.workout.id}/exercises/bulk/'
+
+    def payload(self, exercises):
+        return [
+            {'exercise_id': exercise.id, 'sets': 3, 'reps': 10, 'weight': '50.00', 'order': order}
+            for order, exercise in enumerate(exercises)
+        ]
+
+    def test_bulk_add_uses_constant_queries(self):
+        """Test that adding many exercises costs the same as adding one"""
+        with CaptureQueriesContext(connection) as single:
+            self.client.post(self.url, self.payload(self.exercises[:1]), format='json')
+        WorkoutExercise.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as batch:
+            response = self.client.post(self.url, self.payload(self.exercises), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 12)
+        self.assertEqual(response.data[0]['exercise_name'], 'Exercise 0')
+        self.assertEqual(len(batch), len(single))
+        self.assertEqual(self.workout.workout_exercises.count(), 12)
+
+    def test_bulk_replace(self):
+        """Test that PUT replaces the workout's exercises atomically"""
+        self.client.post(self.url, self.payload(self.exercises[:3]), format='json')
+
+        replacement = self.payload(list(reversed(self.exercises[:2])))
+        response = self.client.put(self.url, replacement, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(self.workout.workout_exercises.values_list('exercise__name', flat=True)),
+            ['Exercise 1', 'Exercise 0']
+        )
+
+    def test_bulk_rejects_invalid_items(self):
+        """Test that one bad item rejects the batch with per-item errors"""
+        foreign = Exercise.objects.create(user=self.other, name='Foreign')
+        payload = self.payload(self.exercises[:2]) + self.payload([foreign])
+
+        response = self.client.put(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('exercise_id', response.data[2])
+        self.assertEqual(self.workout.workout_exercises.count(), 0)
+
+    def test_bulk_add_rejects_duplicate_order(self):
+        """Test that appending a conflicting exercise/order pair is rejected"""
+        self.client.post(self.url, self.payload(self.exercises[:1]), format='json')
+
+        response = self.client.post(self.url, self.payload(self.exercises[:1]), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('order', response.data[0])
+        self.assertEqual(self.workout.workout_exercises.count(), 1)
+
+    def test_bulk_add_loses_race_for_order(self):
+        """Test that a pair taken after validation is rejected like any duplicate"""
+        validate = BulkAddExerciseToWorkoutSerializer.validate
+
+        def validate_then_race(serializer, attrs):
+            attrs = validate(serializer, attrs)
+            # A concurrent request inserts the same exercise/order pair
+            WorkoutExercise.objects.get_or_create(
+                workout=self.workout, exercise=self.exercises[1], order=1, defaults={'sets': 1, 'reps': 1}
+            )
+            return attrs
+
+        with mock.patch.object(BulkAddExerciseToWorkoutSerializer, 'validate', validate_then_race):
+            response = self.client.post(self.url, self.payload(self.exercises[:2]), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('order', response.data[1])
+        self.assertEqual(self.workout.workout_exercises.count(), 1)
+
+    def test_bulk_isolation(self):
+        """Test that users can't bulk edit other users' workouts"""
+        client = APIClient()
+        client.force_authenticate(user=self.other)
+
+        response = client.put(self.url, [], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class WorkoutStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.squat = Exercise.objects.create(user=self.user, name='Squat')
+        self.bench = Exercise.objects.create(user=self.user, name='Bench')
+
+        # Monday 2024-01-01 and Wednesday 2024-01-03 share a week
+        monday = Workout.objects.create(user=self.user, title='A', date=date(2024, 1, 1), duration=60)
+        wednesday = Workout.objects.create(user=self.user, title='B', date=date(2024, 1, 3), duration=30)
+        february = Workout.objects.create(user=self.user, title='C', date=date(2024, 2, 5), duration=45)
+        WorkoutExercise.objects.create(workout=monday, exercise=self.squat, sets=3, reps=5, weight=100)
+        WorkoutExercise.objects.create(workout=monday, exercise=self.bench, sets=2, reps=10, weight=60, order=1)
+        WorkoutExercise.objects.create(workout=wednesday, exercise=self.squat, sets=5, reps=5, weight=110)
+        WorkoutExercise.objects.create(workout=february, exercise=self.squat, sets=1, reps=12, weight=80)
+        WorkoutExercise.objects.create(workout=february, exercise=self.bench, sets=3, reps=8, order=1)
+
+        other_exercise = Exercise.objects.create(user=self.other, name='Squat')
+        other_workout = Workout.objects.create(user=self.other, title='X', date=date(2024, 1, 1), duration=90)
+        WorkoutExercise.objects.create(workout=other_workout, exercise=other_exercise, sets=9, reps=9, weight=200)
+        rebuild_daily_summaries([self.user, self.other])
+
+    def test_weekly_totals(self):
+        """Test that totals are grouped by week and computed per user"""
+        response = self.client.get('/workouts/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        first_week, second_week = response.data['totals']
+        self.assertEqual(first_week['period'], '2024-01-01')
+        self.assertEqual(first_week['workouts'], 2)
+        self.assertEqual(first_week['duration'], 90)
+        self.assertEqual(first_week['sets'], 10)
+        self.assertEqual(first_week['reps'], 60)
+        self.assertEqual(first_week['volume'], '5450.00')
+        self.assertEqual(second_week['period'], '2024-02-05')
+        self.assertEqual(second_week['volume'], '960.00')
+
+    def test_monthly_totals_within_range(self):
+        """Test monthly grouping restricted to a date range"""
+        response = self.client.get('/workouts/stats/?period=month&date_to=2024-01-31')
+
+        self.assertEqual(len(response.data['totals']), 1)
+        january = response.data['totals'][0]
+        self.assertEqual(january['period'], '2024-01-01')
+        self.assertEqual(january['duration'], 90)
+
+    def test_personal_bests(self):
+        """Test per-exercise personal bests"""
+        response = self.client.get('/workouts/stats/')
+        bests = {best['exercise_name']: best for best in response.data['personal_bests']}
+
+        self.assertEqual(set(bests), {'Squat', 'Bench'})
+        self.assertEqual(bests['Squat']['max_weight'], '110.00')
+        self.assertEqual(bests['Squat']['max_weight_date'], '2024-01-03')
+        self.assertEqual(bests['Squat']['max_reps'], 12)
+        self.assertEqual(bests['Squat']['max_volume'], '960.00')
+        self.assertEqual(bests['Bench']['max_weight'], '60.00')
+        self.assertEqual(bests['Bench']['max_reps'], 10)
+
+    def test_invalid_parameters(self):
+        """Test that bad periods and inverted ranges are rejected"""
+        response = self.client.get('/workouts/stats/?period=year')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/workouts/stats/?date_from=2024-02-01&date_to=2024-01-01')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class DailySummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.squat = Exercise.objects.create(user=self.user, name='Squat')
+        self.bench = Exercise.objects.create(user=self.user, name='Bench')
+
+    def create_workout(self, day, duration=30):
+        response = self.client.post('/workouts/', {
+            'title': 'Workout',
+            'date': day.isoformat(),
+            'duration': duration
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def add_exercise(self, workout_id, exercise, weight, order=0):
+        response = self.client.post(f'/workouts/{workout_id}/exercises/', {
+            'exercise_id': exercise.id,
+            'sets': 3,
+            'reps': 10,
+            'weight': weight,
+            'order': order
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_summary_follows_workout_writes(self):
+        """Test that creating, moving and deleting workouts updates the summaries"""
+        day = date(2024, 3, 1)
+        first = self.create_workout(day, 30)
+        self.create_workout(day, 45)
+
+        summary = DailySummary.objects.get(user=self.user, date=day)
+        self.assertEqual(summary.workout_count, 2)
+        self.assertEqual(summary.total_duration, 75)
+
+        self.client.put(f'/workouts/{first}/', {
+            'title': 'Moved',
+            'date': '2024-03-02',
+            'duration': 30
+        })
+        self.assertEqual(DailySummary.objects.get(user=self.user, date=day).workout_count, 1)
+        self.assertEqual(DailySummary.objects.get(user=self.user, date=date(2024, 3, 2)).workout_count, 1)
+
+        self.client.delete(f'/workouts/{first}/')
+        self.assertFalse(DailySummary.objects.filter(user=self.user, date=date(2024, 3, 2)).exists())
+
+    def test_summary_follows_exercise_writes(self):
+        """Test that workout exercise writes update daily volume and bests"""
+        day = date(2024, 3, 1)
+        workout = self.create_workout(day)
+        squat_set = self.add_exercise(workout, self.squat, '100.00')
+        self.add_exercise(workout, self.bench, '50.00', order=1)
+
+        summary = DailySummary.objects.get(user=self.user, date=day)
+        self.assertEqual(summary.total_sets, 6)
+        self.assertEqual(summary.total_reps, 60)
+        self.assertEqual(summary.total_volume, 4500)
+        squat_day = DailyExerciseSummary.objects.get(user=self.user, date=day, exercise=self.squat)
+        self.assertEqual(squat_day.max_weight, 100)
+        self.assertEqual(squat_day.max_set_volume, 1000)
+
+        self.client.put(f'/workouts/{workout}/exercises/{squat_set}/', {
+            'exercise_id': self.squat.id,
+            'sets': 5,
+            'reps': 5,
+            'weight': '120.00'
+        })
+        summary.refresh_from_db()
+        self.assertEqual(summary.total_sets, 8)
+        self.assertEqual(summary.total_volume, 4500)  # 5x5x120 replaces 3x10x100
+        self.assertEqual(
+            DailyExerciseSummary.objects.get(user=self.user, date=day, exercise=self.squat).max_weight,
+            120
+        )
+
+        self.client.delete(f'/workouts/{workout}/exercises/{squat_set}/')
+        self.assertFalse(DailyExerciseSummary.objects.filter(exercise=self.squat).exists())
+        summary.refresh_from_db()
+        self.assertEqual(summary.total_volume, 1500)
+
+        self.client.delete(f'/exercises/{self.bench.id}/')
+        summary.refresh_from_db()
+        self.assertEqual(summary.total_volume, 0)
+        self.assertEqual(summary.workout_count, 1)
+
+    def test_bulk_exercises_update_summary(self):
+        """Test that the bulk endpoint keeps the summaries in sync"""
+        day = date(2024, 3, 1)
+        workout = self.create_workout(day)
+        self.client.put(f'/workouts/{workout}/exercises/bulk/', [
+            {'exercise_id': self.squat.id, 'sets': 2, 'reps': 5, 'weight': '100.00'},
+            {'exercise_id': self.bench.id, 'sets': 2, 'reps': 5, 'weight': '60.00', 'order': 1},
+        ], format='json')
+
+        self.assertEqual(DailySummary.objects.get(user=self.user, date=day).total_volume, 1600)
+
+    def test_rebuild_command(self):
+        """Test that the rebuild command recreates summaries from scratch"""
+        day = date(2024, 3, 1)
+        workout = Workout.objects.create(user=self.user, title='Imported', date=day, duration=20)
+        WorkoutExercise.objects.create(workout=workout, exercise=self.squat, sets=1, reps=1, weight=100)
+        DailySummary.objects.create(user=self.user, date=date(2000, 1, 1), workout_count=9)
+
+        call_command('rebuild_daily_summaries', stdout=StringIO())
+
+        summary = DailySummary.objects.get(user=self.user)
+        self.assertEqual(summary.date, day)
+        self.assertEqual(summary.total_volume, 100)
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=300)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.workout = Workout.objects.create(
+            user=self.user,
+            title='Morning Workout',
+            date=date.today(),
+            duration=30
+        )
+
+    def test_repeated_reads_are_served_from_cache(self):
+        """Test that a repeated list request only runs the ETag validator queries"""
+        first = self.client.get('/workouts/')
+
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get('/workouts/')
+
+        # Validators are Max('updated_at') / Max('deleted_at') aggregates
+        self.assertTrue(all('MAX(' in q['sql'] for q in context.captured_queries))
+        self.assertEqual(second.data, first.data)
+
+    def test_writes_invalidate_cached_responses(self):
+        """Test that writes through any viewset refresh the user's cached reads"""
+        self.client.get(f'/workouts/{self.workout.id}/')
+        self.client.post(f'/workouts/{self.workout.id}/comments/', {'text': 'Fresh'})
+
+        response = self.client.get(f'/workouts/{self.workout.id}/')
+        self.assertEqual(response.data['comments'][0]['text'], 'Fresh')
+
+        self.client.get('/exercises/')
+        self.client.post('/exercises/', {'name': 'Deadlift'})
+        response = self.client.get('/exercises/')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_cache_is_per_user(self):
+        """Test that cached responses are never shared between users"""
+        self.client.get('/workouts/')
+
+        other_client = APIClient()
+        other_client.force_authenticate(user=self.other)
+        response = other_client.get('/workouts/')
+        self.assertEqual(response.data['results'], [])
+
+        response = other_client.get(f'/workouts/{self.workout.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_stats(self):
+        """Test that hit and miss counters are exposed to admins only"""
+        self.client.get('/workouts/')
+        self.client.get('/workouts/')
+        self.client.get('/exercises/')
+
+        response = self.client.get('/metrics/cache/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser('admin', 'admin@test.com', 'password123')
+        admin_client = APIClient()
+        admin_client.force_authenticate(user=admin)
+        response = admin_client.get('/metrics/cache/')
+        self.assertEqual(response.data['workout'], {'hits': 1, 'misses': 1})
+        self.assertEqual(response.data['exercise'], {'hits': 0, 'misses': 1})
+
+    def test_cached_bodies_match_their_validators(self):
+        """Test that a change the cache missed is never sent under the new ETag"""
+        url = f'/workouts/{self.workout.id}/'
+        for path in (url, '/workouts/'):
+            self.client.get(path)
+        # Changed without invalidating the cache, e.g. by another process
+        Workout.objects.filter(pk=self.workout.pk).update(
+            title='Evening Workout', updated_at=timezone.now() + timedelta(seconds=1)
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['title'], 'Evening Workout')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get('/workouts/')
+        self.assertEqual(response.data['results'][0]['title'], 'Evening Workout')
+
+    def test_response_cache_requires_shared_cache(self):
+        """Test that caching responses in a per-process cache is reported"""
+        self.assertEqual([w.id for w in check_response_cache(None)], ['workouts.W002'])
+        with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+            self.assertEqual(check_response_cache(None), [])
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.exercise = Exercise.objects.create(user=self.user, name='Squat')
+        self.workout = Workout.objects.create(
+            user=self.user,
+            title='Morning Workout',
+            date=date.today(),
+            duration=30
+        )
+
+    def assertNotModified(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        return first['ETag']
+
+    def test_unchanged_resources_return_not_modified(self):
+        """Test that matching ETags get 304 on workouts, exercises and comments"""
+        Comment.objects.create(workout=self.workout, user=self.user, text='Nice')
+
+        self.assertNotModified('/workouts/')
+        self.assertNotModified(f'/workouts/{self.workout.id}/')
+        self.assertNotModified('/exercises/')
+        self.assertNotModified(f'/exercises/{self.exercise.id}/')
+        self.assertNotModified(f'/workouts/{self.workout.id}/comments/')
+
+    def test_not_modified_skips_serialization(self):
+        """Test that a 304 only runs the validator queries"""
+        url = f'/workouts/{self.workout.id}/'
+        etag = self.client.get(url)['ETag']
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(context), 2)
+
+    def test_if_modified_since(self):
+        """Test that Last-Modified is honoured for clients without ETags"""
+        first = self.client.get('/exercises/')
+
+        response = self.client.get('/exercises/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_nested_changes_update_validators(self):
+        """Test that nested writes and exercise renames change the workout ETag"""
+        url = f'/workouts/{self.workout.id}/'
+        etag = self.assertNotModified(url)
+
+        self.client.post(f'/workouts/{self.workout.id}/exercises/', {
+            'exercise_id': self.exercise.id,
+            'sets': 3,
+            'reps': 5
+        })
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['exercises']), 1)
+
+        etag = response['ETag']
+        self.client.put(f'/exercises/{self.exercise.id}/', {'name': 'Back Squat'})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['exercises'][0]['exercise_name'], 'Back Squat')
+
+    def test_deleted_comment_changes_list_validators(self):
+        """Test that removing a row changes the list ETag"""
+        comment = Comment.objects.create(workout=self.workout, user=self.user, text='Nice')
+        Comment.objects.create(workout=self.workout, user=self.user, text='Again')
+        url = f'/workouts/{self.workout.id}/comments/'
+        etag = self.assertNotModified(url)
+
+        self.client.delete(f'{url}{comment.id}/')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_deletions_move_list_last_modified(self):
+        """Test that clients sending only If-Modified-Since see deletions"""
+        other = Workout.objects.create(user=self.user, title='Evening', date=date.today(), duration=30)
+        # Keep the deletion in a later second than the last modification
+        Workout.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        Exercise.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        first = self.client.get('/workouts/')
+        self.assertEqual(
+            self.client.get('/workouts/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        self.client.delete(f'/workouts/{other.id}/')
+
+        response = self.client.get('/workouts/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertNotEqual(response['Last-Modified'], first['Last-Modified'])
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.exercise = Exercise.objects.create(user=self.user, name='Squat')
+        self.workout = Workout.objects.create(
+            user=self.user,
+            title='Morning Workout',
+            date=date.today(),
+            duration=30
+        )
+        self.workout_exercise = WorkoutExercise.objects.create(
+            workout=self.workout,
+            exercise=self.exercise,
+            sets=3,
+            reps=5
+        )
+        self.comment = Comment.objects.create(workout=self.workout, user=self.user, text='Nice')
+        Exercise.objects.create(user=self.other, name='Hidden')
+
+    def sync(self, **params):
+        response = self.client.get('/sync/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_initial_sync_returns_everything(self):
+        """Test that a sync without a starting point returns all of the user's rows"""
+        data = self.sync()
+
+        self.assertEqual([w['id'] for w in data['workouts']], [self.workout.id])
+        self.assertEqual([e['name'] for e in data['exercises']], ['Squat'])
+        self.assertEqual(data['workout_exercises'][0]['workout'], self.workout.id)
+        self.assertEqual(data['comments'][0]['text'], 'Nice')
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+    def test_token_returns_only_changes_and_deletions(self):
+        """Test that the continuation token yields just the delta, with tombstones"""
+        token = self.sync()['token']
+
+        self.client.put(f'/workouts/{self.workout.id}/', {
+            'title': 'Renamed',
+            'date': date.today().isoformat(),
+            'duration': 30
+        })
+        self.client.delete(f'/workouts/{self.workout.id}/comments/{self.comment.id}/')
+        data = self.sync(token=token)
+
+        self.assertEqual([w['title'] for w in data['workouts']], ['Renamed'])
+        self.assertEqual(data['exercises'], [])
+        self.assertEqual(data['workout_exercises'], [])
+        self.assertEqual(
+            [(d['model'], d['id']) for d in data['deleted']],
+            [('comment', self.comment.id)]
+        )
+
+        self.assertEqual(self.sync(token=data['token'])['workouts'], [])
+
+    def test_deleting_workout_records_cascaded_rows(self):
+        """Test that deleting a workout reports its exercises and comments too"""
+        token = self.sync()['token']
+
+        self.client.delete(f'/workouts/{self.workout.id}/')
+        data = self.sync(token=token)
+
+        self.assertEqual(
+            {(d['model'], d['id']) for d in data['deleted']},
+            {
+                ('workout', self.workout.id),
+                ('workout_exercise', self.workout_exercise.id),
+                ('comment', self.comment.id),
+            }
+        )
+
+    def test_paged_sync_round(self):
+        """Test that limited pages continue the round without gaps or repeats"""
+        for i in range(4):
+            Exercise.objects.create(user=self.user, name=f'Exercise {i}')
+
+        ids, params = [], {'limit': 2}
+        while True:
+            data = self.sync(**params)
+            ids.extend(e['id'] for e in data['exercises'])
+            params = {'token': data['token'], 'limit': 2}
+            if not data['has_more']:
+                break
+
+        self.assertEqual(sorted(ids), sorted(Exercise.objects.filter(user=self.user).values_list('id', flat=True)))
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_since_timestamp(self):
+        """Test that rows older than `since` are skipped"""
+        data = self.sync(since=timezone.now().isoformat())
+        self.assertEqual(data['workouts'], [])
+        self.assertEqual(data['exercises'], [])
+
+    def test_invalid_token(self):
+        """Test that forged or foreign tokens are rejected"""
+        response = self.client.get('/sync/', {'token': 'forged'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        other_client = APIClient()
+        other_client.force_authenticate(user=self.other)
+        token = other_client.get('/sync/').data['token']
+        response = self.client.get('/sync/', {'token': token})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def collect_pages(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_workouts_paginate_across_equal_dates(self):
+        """Test that workouts sharing a date are neither skipped nor repeated"""
+        workouts = [
+            Workout.objects.create(
+                user=self.user,
+                title=f'Workout {i}',
+                date=date(2024, 1, 1 + i % 3),
+                duration=30
+            )
+            for i in range(7)
+        ]
+        expected = [w.id for w in sorted(workouts, key=lambda w: (-w.date.toordinal(), w.id))]
+
+        self.assertEqual(self.collect_pages('/workouts/?page_size=2'), expected)
+
+    def test_previous_link_returns_prior_page(self):
+        """Test that following the previous link goes back to the same rows"""
+        for i in range(5):
+            Exercise.objects.create(user=self.user, name=f'Exercise {i}')
+
+        first = self.client.get('/exercises/?page_size=2')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(
+            [item['name'] for item in second.data['results']],
+            ['Exercise 2', 'Exercise 3']
+        )
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_comments_paginate_newest_first(self):
+        """Test that comments are paginated from newest to oldest"""
+        workout = Workout.objects.create(
+            user=self.user,
+            title='Workout',
+            date=date.today(),
+            duration=30
+        )
+        comments = [
+            Comment.objects.create(workout=workout, user=self.user, text=f'Comment {i}')
+            for i in range(5)
+        ]
+        expected = [c.id for c in sorted(comments, key=lambda c: c.created_at, reverse=True)]
+
+        self.assertEqual(
+            self.collect_pages(f'/workouts/{workout.id}/comments/?page_size=2'),
+            expected
+        )
+
+    def test_page_size_is_capped(self):
+        """Test that clients cannot request pages larger than the maximum"""
+        Exercise.objects.bulk_create([
+            Exercise(user=self.user, name=f'Exercise {i:03}')
+            for i in range(settings.MAX_PAGE_SIZE + 5)
+        ])
+
+        response = self.client.get(f'/exercises/?page_size={settings.MAX_PAGE_SIZE + 5}')
+        self.assertEqual(len(response.data['results']), settings.MAX_PAGE_SIZE)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        response = self.client.get('/workouts/?cursor=bogus')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_values_of_the_wrong_type(self):
+        """Test that well-formed cursors holding unusable values are rejected"""
+        Workout.objects.create(user=self.user, title='Workout', date=date(2024, 1, 1), duration=30)
+        for position in [
+            ['notadate', 'x'],
+            ['2024-01-01', 'abc'],
+            ['2024-01-01', None],
+            ['2024-01-01', [1]],
+            ['2024-01-01'],
+        ]:
+            query = urlencode({'p': json.dumps(position)})
+            encoded = base64.b64encode(query.encode()).decode()
+            response = self.client.get(f'/workouts/?{urlencode({"cursor": encoded})}')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class AsyncReadViewTests(TestCase):
+    ASYNC_URLCONF = 'fitness_workout_tracker_api.workouts.async_urls'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        _, key = AuthToken.issue(self.user)
+        self.headers = {'Authorization': f'Bearer {key}'}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {key}')
+
+        self.exercise = Exercise.objects.create(user=self.user, name='Squat')
+        self.workout = Workout.objects.create(
+            user=self.user,
+            title='Leg Day',
+            date=date(2024, 1, 1),
+            duration=60
+        )
+        WorkoutExercise.objects.create(
+            workout=self.workout,
+            exercise=self.exercise,
+            sets=3,
+            reps=5,
+            weight=100,
+            order=1
+        )
+        Comment.objects.create(workout=self.workout, user=self.user, text='Heavy')
+        self.other_workout = Workout.objects.create(
+            user=self.other,
+            title='Other',
+            date=date(2024, 1, 1),
+            duration=30
+        )
+
+    async def async_get(self, url):
+        with self.settings(ROOT_URLCONF=self.ASYNC_URLCONF):
+            return await self.async_client.get(url, headers=self.headers)
+
+    async def test_async_reads_match_viewsets(self):
+        """Test that the async handlers render the same payloads as the viewsets"""
+        urls = [
+            '/workouts/',
+            '/workouts/?expand=exercises,comments',
+            '/workouts/?fields=id,title',
+            f'/workouts/?exercise={self.exercise.id}&date_from=2024-01-01&title=leg',
+            f'/workouts/{self.workout.id}/',
+            '/exercises/',
+            f'/exercises/{self.exercise.id}/',
+            f'/workouts/{self.workout.id}/comments/',
+        ]
+        for url in urls:
+            expected = await sync_to_async(self.client.get)(url)
+            response = await self.async_get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertEqual(response.json(), json.loads(expected.content), url)
+
+    async def test_async_reads_are_scoped_to_user(self):
+        """Test that other users' rows and missing rows return 404"""
+        for url in [
+            f'/workouts/{self.other_workout.id}/',
+            f'/workouts/{self.other_workout.id}/comments/',
+            '/exercises/999999/',
+            '/workouts/?cursor=bogus',
+        ]:
+            response = await self.async_get(url)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, url)
+
+        response = await self.async_get('/workouts/?min_duration=-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('min_duration', response.json())
+
+    async def test_async_reads_require_authentication(self):
+        """Test that missing and unknown tokens are rejected"""
+        with self.settings(ROOT_URLCONF=self.ASYNC_URLCONF):
+            response = await self.async_client.get('/workouts/')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            response = await self.async_client.get('/workouts/', headers={'Authorization': 'Bearer bogus'})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_writes_fall_back_to_viewsets(self):
+        """Test that non-GET methods on async routes reach the viewsets"""
+        with self.settings(ROOT_URLCONF=self.ASYNC_URLCONF):
+            response = await self.async_client.post(
+                '/exercises/',
+                {'name': 'Bench Press'},
+                content_type='application/json',
+                headers=self.headers
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await Exercise.objects.filter(user=self.user, name='Bench Press').aexists())
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.squat = Exercise.objects.create(user=self.user, name='Squat')
+        self.workouts = [
+            Workout.objects.create(
+                user=self.user,
+                title=f'Workout {i}',
+                date=date(2024, 1, 1) + timedelta(days=i),
+                duration=30 + i
+            )
+            for i in range(5)
+        ]
+        for workout in self.workouts[:3]:
+            WorkoutExercise.objects.create(
+                workout=workout,
+                exercise=self.squat,
+                sets=3,
+                reps=5,
+                weight=100,
+                order=1
+            )
+            Comment.objects.create(workout=workout, user=self.user, text='Felt strong')
+        Workout.objects.create(user=self.other, title='Other', date=date(2024, 1, 1), duration=30)
+
+    def export(self, export_type):
+        response = self.client.get(f'/workouts/export/?type={export_type}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export_matches_detail_representation(self):
+        """Test that every line is a workout as rendered by the detail endpoint"""
+        lines = self.export('ndjson').splitlines()
+
+        self.assertEqual(len(lines), len(self.workouts))
+        for line, workout in zip(lines, self.workouts):
+            detail = self.client.get(f'/workouts/{workout.id}/')
+            self.assertEqual(json.loads(line), json.loads(detail.content))
+
+    def test_csv_export_lists_workouts_exercises_and_comments(self):
+        """Test that the CSV has a record per workout, set entry and comment"""
+        rows = list(csv.DictReader(StringIO(self.export('csv'))))
+
+        records = [row['record'] for row in rows]
+        self.assertEqual(records.count('workout'), 5)
+        self.assertEqual(records.count('exercise'), 3)
+        self.assertEqual(records.count('comment'), 3)
+        self.assertEqual({row['workout_id'] for row in rows}, {str(w.id) for w in self.workouts})
+
+        exercise_row = next(row for row in rows if row['record'] == 'exercise')
+        self.assertEqual(exercise_row['exercise'], 'Squat')
+        self.assertEqual(exercise_row['title'], 'Workout 0')
+        self.assertEqual(exercise_row['weight'], '100.00')
+
+    @override_settings(EXPORT_BATCH_SIZE=2)
+    def test_export_reads_in_batches(self):
+        """Test that the export issues a fixed number of queries per batch"""
+        with CaptureQueriesContext(connection) as queries:
+            self.export('ndjson')
+
+        # One cursor over the workouts, plus exercise and comment prefetches
+        # for each of the three batches
+        self.assertEqual(len(queries), 7)
+
+    def test_invalid_export_type(self):
+        """Test that unknown export types are rejected"""
+        response = self.client.get('/workouts/export/?type=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.squat = Exercise.objects.create(user=self.user, name='Squat')
+
+    def upload(self, name, content, **data):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post('/workouts/import/', {'file': upload, **data}, format='multipart')
+
+    def test_ndjson_round_trip(self):
+        """Test that an export of one user can be imported by another"""
+        source = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        bench = Exercise.objects.create(user=source, name='Bench Press')
+        for i in range(3):
+            workout = Workout.objects.create(
+                user=source,
+                title=f'Workout {i}',
+                date=date(2024, 1, 1 + i),
+                duration=45
+            )
+            WorkoutExercise.objects.create(workout=workout, exercise=bench, sets=3, reps=8, weight=60, order=1)
+        exporter = APIClient()
+        exporter.force_authenticate(user=source)
+        export = b''.join(exporter.get('/workouts/export/').streaming_content).decode()
+
+        response = self.upload('history.ndjson', export)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['workouts'], 3)
+        self.assertEqual(response.data['workout_exercises'], 3)
+        self.assertEqual(response.data['exercises'], 1)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(
+            list(WorkoutExercise.objects.filter(workout__user=self.user).values_list('exercise__name', 'weight')),
+            [('Bench Press', 60)] * 3
+        )
+        self.assertEqual(DailySummary.objects.filter(user=self.user).count(), 3)
+
+    def test_csv_import_reports_invalid_workouts(self):
+        """Test that invalid workouts are skipped and reported by line"""
+        content = (
+            'date,title,duration,exercise,sets,reps,weight\n'
+            '2024-01-01,Legs,60,Squat,5,5,100\n'
+            '2024-01-01,Legs,60,Lunge,3,10,\n'
+            '2024-01-02,Broken,soon,Squat,5,5,100\n'
+            '2024-01-03,Rest walk,30,,,,\n'
+        )
+        response = self.upload('history.csv', content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['workouts'], 2)
+        self.assertEqual(response.data['workout_exercises'], 2)
+        self.assertEqual(response.data['exercises'], 1)
+        self.assertEqual(len(response.data['errors']), 1)
+        self.assertEqual(response.data['errors'][0]['line'], 4)
+        self.assertIn('duration', response.data['errors'][0]['errors'])
+
+        legs = Workout.objects.get(user=self.user, title='Legs')
+        self.assertEqual(
+            list(legs.workout_exercises.values_list('exercise_id', flat=True).order_by('id'))[0],
+            self.squat.id
+        )
+        self.assertTrue(Workout.objects.filter(user=self.user, title='Rest walk').exists())
+
+    def test_import_query_count_does_not_grow_with_rows(self):
+        """Test that workouts in one batch are written with bulk queries"""
+        def content(count):
+            return 'date,title,duration,exercise,sets,reps,weight\n' + ''.join(
+                f'2024-02-01,Workout {i},30,Squat,3,5,100\n' for i in range(count)
+            )
+
+        counts = []
+        for count in (2, 20):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.upload('history.csv', content(count))
+            self.assertEqual(response.data['workouts'], count)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_unknown_file_type(self):
+        """Test that uploads without a recognizable format are rejected"""
+        response = self.upload('history.txt', '{}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_command(self):
+        """Test that the management command imports a file for a user"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('date,title,duration,exercise,sets,reps,weight\n2024-03-01,Legs,60,Squat,5,5,100\n')
+        self.addCleanup(os.remove, handle.name)
+
+        out = StringIO()
+        call_command('import_workouts', 'user1', handle.name, stdout=out)
+
+        self.assertIn('Imported 1 workout(s)', out.getvalue())
+        self.assertTrue(Workout.objects.filter(user=self.user, title='Legs').exists())
+
+@override_settings(REPLICA_DATABASES=['replica_0'], RESPONSE_CACHE_TIMEOUT=0)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.workout = Workout.objects.create(user=self.user, title='Workout', date=date.today(), duration=30)
+
+    def replica_reads(self, method, url, data=None, client=None):
+        """Return, for every read query routed, whether it could use a replica"""
+        reads = []
+
+        def db_for_read(router, model, **hints):
+            reads.append(reading_from_replica())
+            # The test database has no replica alias
+            return 'default'
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            response = getattr(client or self.client, method)(url, data)
+        self.assertLess(response.status_code, 400)
+        return reads
+
+    def test_router_sends_opted_in_reads_to_replicas(self):
+        """Test that only reads inside a replica scope leave the primary"""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Workout), 'default')
+
+        token = start_replica_reads(self.user.pk)
+        try:
+            self.assertEqual(router.db_for_read(Workout), 'replica_0')
+            self.assertEqual(router.db_for_write(Workout), 'default')
+            # Reads after a write in the same request stay on the primary
+            self.assertEqual(router.db_for_read(Workout), 'default')
+        finally:
+            end_replica_reads(token)
+        self.assertFalse(reading_from_replica())
+
+    def test_list_and_retrieve_read_from_replicas(self):
+        """Test that list and detail reads use replicas and other actions do not"""
+        self.assertTrue(all(self.replica_reads('get', '/workouts/')))
+        self.assertTrue(all(self.replica_reads('get', f'/workouts/{self.workout.id}/')))
+        self.assertTrue(all(self.replica_reads('get', f'/workouts/{self.workout.id}/comments/')))
+        self.assertFalse(any(self.replica_reads('get', '/workouts/stats/')))
+        self.assertFalse(reading_from_replica())
+
+    def test_reads_stick_to_primary_after_write(self):
+        """Test that a user's reads use the primary right after they write"""
+        self.assertFalse(any(self.replica_reads(
+            'post', '/workouts/', {'title': 'New', 'date': '2024-01-01', 'duration': 30}
+        )))
+        self.assertFalse(any(self.replica_reads('get', '/workouts/')))
+
+        other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        client = APIClient()
+        client.force_authenticate(user=other)
+        self.assertTrue(all(self.replica_reads('get', '/workouts/', client=client)))
+
+    def test_sticky_reads_require_shared_cache(self):
+        """Test that pinning users to the primary in a per-process cache is reported"""
+        self.assertEqual([w.id for w in check_replica_pin_cache(None)], ['workouts.W001'])
+        with override_settings(REPLICA_DATABASES=[]):
+            self.assertEqual(check_replica_pin_cache(None), [])
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Workout.objects.create(user=self.user, title='Workout', date=date.today(), duration=30)
+
+    def test_server_timing_header(self):
+        """Test that responses report database, serialization and total time"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/workouts/')
+
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_endpoint(self):
+        """Test that per-endpoint aggregates are exposed to admins in Prometheus format"""
+        self.client.get('/workouts/')
+        self.client.get('/workouts/')
+
+        self.assertEqual(self.client.get('/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser('admin', 'admin@test.com', 'password123')
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        response = client.get('/metrics/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('http_requests_total{method="GET",view="workout-list",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",view="workout-list"} 2', body)
+        self.assertIn('http_request_db_queries_total{method="GET",view="workout-list"}', body)
+        self.assertIn('http_response_size_bytes_total{method="GET",view="workout-list"}', body)
+        self.assertIn('response_cache_requests_total{resource="workout",outcome="hits"}', body)
+
+    async def test_async_handlers_run_natively(self):
+        """Test that async handlers are awaited directly and still measured"""
+        def query():
+            # On a connection of its own, as under an ASGI server
+            try:
+                with connections['default'].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    return cursor.fetchone()[0]
+            finally:
+                connections.close_all()
+
+        async def handler(request):
+            return HttpResponse(str(await sync_to_async(query, thread_sensitive=False)()))
+
+        middleware = PerformanceMiddleware(handler)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        request = RequestFactory().get('/workouts/')
+        request.resolver_match = None
+        response = await middleware(request)
+
+        self.assertEqual(response.content, b'1')
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        self.assertEqual(registry.requests[('GET', 'unmatched', '200')], 1)
+
+        # Django logs every sync-only middleware it has to adapt
+        _, key = await sync_to_async(AuthToken.issue)(self.user)
+        with self.settings(ROOT_URLCONF='fitness_workout_tracker_api.workouts.async_urls'):
+            with self.assertNoLogs('django.request', level='DEBUG'):
+                response = await self.async_client.get('/exercises/', headers={'Authorization': f'Bearer {key}'})
+        self.assertIn('Server-Timing', response)
+
+    def test_every_serializer_is_instrumented(self):
+        """Test that the project's serializers all report serialization time"""
+        for app_config in apps.get_app_configs():
+            if not app_config.name.startswith('fitness_workout_tracker_api.'):
+                continue
+            try:
+                module = import_module(f'{app_config.name}.serializers')
+            except ModuleNotFoundError:
+                continue
+            for name, value in vars(module).items():
+                if (
+                    isinstance(value, type)
+                    and issubclass(value, BaseSerializer)
+                    and not issubclass(value, ListSerializer)
+                    and value.__module__ == module.__name__
+                ):
+                    self.assertTrue(issubclass(value, InstrumentedSerializerMixin), f'{module.__name__}.{name}')
+
+    @override_settings(SLOW_REQUEST_THRESHOLD=1)
+    def test_slow_requests_are_logged_with_queries(self):
+        """Test that requests over the threshold are logged with their SQL"""
+        with mock.patch('fitness_workout_tracker_api.instrumentation.time.perf_counter', side_effect=range(0, 10000, 1)):
+            with self.assertLogs('fitness_workout_tracker_api.instrumentation', level='WARNING') as logs:
+                self.client.get('/workouts/')
+
+        self.assertIn('Slow request: GET /workouts/', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+class WorkoutFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.squat = Exercise.objects.create(user=self.user, name='Squat')
+        self.bench = Exercise.objects.create(user=self.user, name='Bench Press')
+        self.legs = Workout.objects.create(user=self.user, title='Leg Day', date=date(2024, 1, 1), duration=60)
+        self.push = Workout.objects.create(user=self.user, title='Push Day', date=date(2024, 2, 1), duration=30)
+        self.full = Workout.objects.create(user=self.user, title='Full body', date=date(2024, 3, 1), duration=90)
+        # Squat entered twice in one workout must not duplicate it
+        for order in range(2):
+            WorkoutExercise.objects.create(workout=self.legs, exercise=self.squat, sets=3, reps=5, order=order)
+        WorkoutExercise.objects.create(workout=self.full, exercise=self.squat, sets=3, reps=5, order=0)
+        WorkoutExercise.objects.create(workout=self.push, exercise=self.bench, sets=3, reps=5, order=0)
+
+    def get_ids(self, query):
+        response = self.client.get(f'/workouts/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [workout['id'] for workout in response.data['results']]
+
+    def test_filters(self):
+        """Test each filter and their combination"""
+        self.assertEqual(self.get_ids('date_from=2024-02-01'), [self.full.id, self.push.id])
+        self.assertEqual(self.get_ids('date_to=2024-02-01'), [self.push.id, self.legs.id])
+        self.assertEqual(self.get_ids(f'exercise={self.squat.id}'), [self.full.id, self.legs.id])
+        self.assertEqual(self.get_ids('min_duration=60'), [self.full.id, self.legs.id])
+        self.assertEqual(self.get_ids('max_duration=60'), [self.push.id, self.legs.id])
+        self.assertEqual(self.get_ids('title=day'), [self.push.id, self.legs.id])
+        self.assertEqual(
+            self.get_ids(f'exercise={self.squat.id}&date_to=2024-02-15&min_duration=45&title=leg'),
+            [self.legs.id],
+        )
+
+    def test_filters_paginate(self):
+        """Test that cursors keep the filters"""
+        response = self.client.get(f'/workouts/?exercise={self.squat.id}&page_size=1')
+        self.assertEqual([w['id'] for w in response.data['results']], [self.full.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([w['id'] for w in response.data['results']], [self.legs.id])
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_filters(self):
+        """Test that malformed or contradictory filters are rejected"""
+        for query in ['date_from=yesterday', 'exercise=abc', 'min_duration=-1',
+                      'date_from=2024-03-01&date_to=2024-01-01', 'min_duration=60&max_duration=30']:
+            response = self.client.get(f'/workouts/?{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+    def test_filters_apply_to_list_only(self):
+        """Test that detail requests ignore list filters"""
+        response = self.client.get(f'/workouts/{self.legs.id}/?date_from=2024-03-01')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_other_users_exercise(self):
+        """Test that filtering by another user's exercise matches nothing"""
+        other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        exercise = Exercise.objects.create(user=other, name='Squat')
+        self.assertEqual(self.get_ids(f'exercise={exercise.id}'), [])
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.bench = Exercise.objects.create(user=self.user, name='Bench Press')
+        self.incline = Exercise.objects.create(user=self.user, name='Incline Bench Press')
+        self.squat = Exercise.objects.create(user=self.user, name='Squat', description='Keep the bench out of it')
+        self.workout = Workout.objects.create(
+            user=self.user,
+            title='Push Day',
+            description='Bench felt heavy, shoulder was sore',
+            date=date(2024, 1, 1),
+            duration=60
+        )
+        self.entry = WorkoutExercise.objects.create(
+            workout=self.workout, exercise=self.bench, sets=3, reps=5, notes='Paused reps', order=0
+        )
+        other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        Exercise.objects.create(user=other, name='Bench Press')
+
+    def search(self, query):
+        response = self.client.get(f'/search/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_ranked_search(self):
+        """Test that every type is searched and name matches outrank description matches"""
+        data = self.search('q=bench')
+        self.assertEqual([e['id'] for e in data['exercises']], [self.bench.id, self.incline.id, self.squat.id])
+        self.assertEqual([w['id'] for w in data['workouts']], [self.workout.id])
+        self.assertEqual(data['workout_exercises'], [])
+
+        data = self.search('q=paused&type=workout_exercises')
+        self.assertEqual(list(data), ['workout_exercises'])
+        self.assertEqual(data['workout_exercises'][0]['workout'], self.workout.id)
+        self.assertEqual(data['workout_exercises'][0]['exercise_name'], 'Bench Press')
+
+    def test_all_words_must_match(self):
+        """Test that queries match whole words, all of them, in any order"""
+        self.assertEqual([e['id'] for e in self.search('q=press bench&type=exercises')['exercises']],
+                         [self.bench.id, self.incline.id])
+        self.assertEqual(self.search('q=incline squat&type=exercises')['exercises'], [])
+        self.assertEqual(self.search('q=ben&type=exercises')['exercises'], [])
+        # Query syntax characters are not interpreted
+        self.assertEqual(self.search('q="bench* OR (squat&type=exercises')['exercises'], [])
+
+    def test_prefix_autocomplete(self):
+        """Test that prefix mode completes the last word of exercise names only"""
+        self.assertEqual(
+            self.search('q=ben&prefix=true')['exercises'],
+            [{'id': self.bench.id, 'name': 'Bench Press'}, {'id': self.incline.id, 'name': 'Incline Bench Press'}],
+        )
+        self.assertEqual([e['id'] for e in self.search('q=incline ben&prefix=true')['exercises']], [self.incline.id])
+        self.assertEqual(self.search('q=ou&prefix=true')['exercises'], [])
+
+    def test_index_follows_writes(self):
+        """Test that updates, deletes and bulk inserts are reflected"""
+        self.client.patch(f'/exercises/{self.squat.id}/', {'name': 'Back Squat', 'description': ''}, format='json')
+        Exercise.objects.bulk_create([Exercise(user=self.user, name='Benchmark Row')])
+        self.bench.delete()
+
+        names = [e['name'] for e in self.search('q=b&prefix=true')['exercises']]
+        self.assertEqual(sorted(names), ['Back Squat', 'Benchmark Row', 'Incline Bench Press'])
+        self.assertEqual([e['name'] for e in self.search('q=bench&type=exercises')['exercises']],
+                         ['Incline Bench Press'])
+        self.assertEqual(self.search('q=paused&type=workout_exercises')['workout_exercises'], [])
+
+    def test_invalid_queries(self):
+        """Test that missing queries and prefix searches of other types are rejected"""
+        for query in ['', 'q=bench&type=comments', 'q=bench&prefix=true&type=workouts', 'q=bench&limit=0']:
+            response = self.client.get(f'/search/?{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+class SearchSchemaChangeTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def alter_title(self, old, new):
+        with connection.schema_editor() as schema_editor:
+            schema_editor.alter_field(Workout, old, new)
+
+    def test_search_stays_in_sync_after_altering_a_table(self):
+        """Test that migrating after a schema change restores the search triggers"""
+        old = Workout._meta.get_field('title')
+        new = copy.copy(old)
+        new.max_length = old.max_length + 1
+        self.alter_title(old, new)
+        try:
+            call_command('migrate', verbosity=0, stdout=StringIO())
+            workout = Workout.objects.create(user=self.user, title='Leg Day', date=date(2024, 1, 1), duration=30)
+            response = self.client.get('/search/?q=leg&type=workouts')
+            self.assertEqual([w['id'] for w in response.data['workouts']], [workout.id])
+
+            workout.title = 'Arm Day'
+            workout.save()
+            response = self.client.get('/search/?q=leg&type=workouts')
+            self.assertEqual(response.data['workouts'], [])
+        finally:
+            self.alter_title(new, old)
+            call_command('migrate', verbosity=0, stdout=StringIO())
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class FastReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        squat = Exercise.objects.create(user=self.user, name='Squat', description='Back squat ü')
+        bench = Exercise.objects.create(user=self.user, name='Bench Press')
+        self.workouts = []
+        for i in range(3):
+            workout = Workout.objects.create(
+                user=self.user,
+                title=f'Workout {i}   "quoted"',
+                description='Ünïcode 💪' if i else '',
+                date=date(2024, 1, 1) + timedelta(days=i % 2),
+                duration=30 + i
+            )
+            WorkoutExercise.objects.create(workout=workout, exercise=squat, sets=3, reps=5, weight=100.5, order=0)
+            WorkoutExercise.objects.create(workout=workout, exercise=bench, sets=3, reps=8, order=1, notes='Pause')
+            Comment.objects.create(workout=workout, user=self.user, text='Nice')
+            Comment.objects.create(workout=workout, user=other, text='Strong \u2029 work')
+            self.workouts.append(workout)
+        self.other_workout = Workout.objects.create(user=other, title='Other', date=date(2024, 1, 1), duration=30)
+
+    def get_both(self, url):
+        """Return the responses of the serializer path and of the fast path, with their query counts"""
+        responses = []
+        for fast in (False, True):
+            with override_settings(FAST_READS=fast), CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            responses.append((response, len(queries)))
+        return responses
+
+    def test_responses_are_byte_identical(self):
+        """Test that the fast path renders the same bytes with no more queries"""
+        workout = self.workouts[0]
+        urls = [
+            '/workouts/',
+            '/workouts/?page_size=2',
+            '/workouts/?expand=exercises,comments',
+            '/workouts/?fields=id,title&expand=comments',
+            f'/workouts/?exercise={workout.workout_exercises.first().exercise_id}&min_duration=31',
+            f'/workouts/{workout.id}/',
+            '/exercises/',
+            '/exercises/?page_size=1',
+            f'/exercises/{workout.workout_exercises.first().exercise_id}/',
+            f'/workouts/{workout.id}/comments/',
+            f'/workouts/{workout.id}/comments/{workout.comments.first().id}/',
+        ]
+        for url in urls:
+            (expected, expected_queries), (response, queries) = self.get_both(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertEqual(response.content, expected.content, url)
+            self.assertLessEqual(queries, expected_queries, url)
+
+        # Cursors too
+        (expected, _), _ = self.get_both('/workouts/?page_size=2')
+        (expected, _), (response, _) = self.get_both(json.loads(expected.content)['next'])
+        self.assertEqual(response.content, expected.content)
+
+    def test_missing_objects(self):
+        """Test that missing and other users' objects are 404 on both paths"""
+        for url in [
+            f'/workouts/{self.other_workout.id}/',
+            '/workouts/999999/',
+            f'/workouts/{self.other_workout.id}/comments/',
+            '/workouts/?cursor=bogus',
+        ]:
+            (expected, _), (response, _) = self.get_both(url)
+            self.assertEqual(expected.status_code, status.HTTP_404_NOT_FOUND, url)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, url)
+
+    def test_renderer_falls_back_for_other_types(self):
+        """Test that data orjson would format differently is rendered by JSONRenderer"""
+        from rest_framework.renderers import JSONRenderer
+        from .fast_reads import FastJSONRenderer
+
+        for data in [
+            {'when': timezone.now(), 'amount': Decimal('1.50'), 'text': 'a\u2028b'},
+            [{'id': 1, 'name': 'Ünïcode'}, None, True, 1.5],
+            {'ids': {1, 2}},
+        ]:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+class WorkoutAggregateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.squat = Exercise.objects.create(user=self.user, name='Squat')
+        self.bench = Exercise.objects.create(user=self.user, name='Bench')
+        self.workout = Workout.objects.create(user=self.user, title='Session', date=date.today(), duration=60)
+        self.url = f'/workouts/{self.workout.id}/'
+
+    def aggregates(self):
+        self.workout.refresh_from_db()
+        return (self.workout.exercise_count, self.workout.comment_count, self.workout.total_volume)
+
+    def test_exercise_writes_update_aggregates(self):
+        """Test that adding, changing and removing exercises keeps the counts and volume"""
+        response = self.client.post(f'{self.url}exercises/', {
+            'exercise_id': self.squat.id, 'sets': 3, 'reps': 10, 'weight': '100.00'
+        })
+        squat_set = response.data['id']
+        self.client.post(f'{self.url}exercises/', {'exercise_id': self.bench.id, 'sets': 3, 'reps': 10, 'order': 1})
+        self.assertEqual(self.aggregates(), (2, 0, Decimal('3000.00')))
+
+        self.client.put(f'{self.url}exercises/{squat_set}/', {
+            'exercise_id': self.squat.id, 'sets': 5, 'reps': 5, 'weight': '120.50'
+        })
+        self.assertEqual(self.aggregates(), (2, 0, Decimal('3012.50')))
+
+        self.client.delete(f'{self.url}exercises/{squat_set}/')
+        self.assertEqual(self.aggregates(), (1, 0, Decimal('0.00')))
+
+    def test_bulk_writes_update_aggregates(self):
+        """Test that bulk add and replace keep the counts and volume"""
+        payload = [
+            {'exercise_id': self.squat.id, 'sets': 2, 'reps': 5, 'weight': '100.00'},
+            {'exercise_id': self.bench.id, 'sets': 2, 'reps': 5, 'weight': '60.00', 'order': 1},
+        ]
+        self.client.post(f'{self.url}exercises/bulk/', payload, format='json')
+        self.assertEqual(self.aggregates(), (2, 0, Decimal('1600.00')))
+
+        self.client.put(f'{self.url}exercises/bulk/', payload[1:], format='json')
+        self.assertEqual(self.aggregates(), (1, 0, Decimal('600.00')))
+
+    def test_comment_writes_update_count(self):
+        """Test that creating and deleting comments keeps the comment count"""
+        first = self.client.post(f'{self.url}comments/', {'text': 'Good'}).data['id']
+        self.client.post(f'{self.url}comments/', {'text': 'Tired'})
+        self.assertEqual(self.aggregates()[1], 2)
+
+        self.client.delete(f'{self.url}comments/{first}/')
+        self.assertEqual(self.aggregates()[1], 1)
+
+    def test_workout_update_keeps_concurrent_increments(self):
+        """Test that editing a workout does not write back the aggregates it loaded"""
+        get_object = WorkoutViewSet.get_object
+
+        def load_then_comment(view):
+            workout = get_object(view)
+            # Another request adds a comment between the load and the save
+            Comment.objects.create(workout=self.workout, user=self.user, text='Meanwhile')
+            Workout.objects.get(pk=self.workout.pk).touch(comment_count=1)
+            return workout
+
+        with mock.patch.object(WorkoutViewSet, 'get_object', load_then_comment):
+            response = self.client.patch(self.url, {'title': 'Renamed'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.aggregates()[1], 1)
+        self.assertEqual(self.workout.title, 'Renamed')
+
+    def test_exercise_delete_recomputes_aggregates(self):
+        """Test that deleting an exercise updates every workout that used it"""
+        self.client.put(f'{self.url}exercises/bulk/', [
+            {'exercise_id': self.squat.id, 'sets': 1, 'reps': 1, 'weight': '100.00'},
+            {'exercise_id': self.bench.id, 'sets': 1, 'reps': 1, 'weight': '50.00', 'order': 1},
+        ], format='json')
+
+        self.client.delete(f'/exercises/{self.squat.id}/')
+
+        self.assertEqual(self.aggregates(), (1, 0, Decimal('50.00')))
+
+    def test_list_reads_aggregates_without_joins(self):
+        """Test that the list shows the aggregates from the workout row alone"""
+        self.client.post(f'{self.url}exercises/', {'exercise_id': self.squat.id, 'sets': 3, 'reps': 10, 'weight': '20.00'})
+        self.client.post(f'{self.url}comments/', {'text': 'Good'})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/workouts/')
+
+        result = response.data['results'][0]
+        self.assertEqual(
+            (result['exercise_count'], result['comment_count'], result['total_volume']),
+            (1, 1, '600.00')
+        )
+        self.assertFalse(any('JOIN' in q['sql'] for q in context.captured_queries))
+
+    def test_import_sets_aggregates(self):
+        """Test that imported workouts get their aggregates"""
+        import_workouts(self.user, [json.dumps({
+            'title': 'Imported', 'date': '2024-03-01', 'duration': 30,
+            'exercises': [{'exercise_name': 'Squat', 'sets': 2, 'reps': 5, 'weight': '10.00'}],
+        })], 'ndjson')
+
+        workout = Workout.objects.get(title='Imported')
+        self.assertEqual((workout.exercise_count, workout.total_volume), (1, Decimal('100.00')))
+
+    def test_repair_command(self):
+        """Test that the repair command fixes drifted workouts only"""
+        WorkoutExercise.objects.create(workout=self.workout, exercise=self.squat, sets=2, reps=5, weight=10)
+        Comment.objects.create(workout=self.workout, user=self.user, text='Added behind the API')
+        intact = Workout.objects.create(user=self.user, title='Empty', date=date.today(), duration=30)
+        updated_at = Workout.objects.get(pk=intact.pk).updated_at
+
+        out = StringIO()
+        call_command('repair_workout_aggregates', user=['user1'], stdout=out)
+
+        self.assertIn('Repaired the aggregates of 1 workout(s)', out.getvalue())
+        self.assertEqual(self.aggregates(), (1, 1, Decimal('100.00')))
+        self.assertEqual(Workout.objects.get(pk=intact.pk).updated_at, updated_at)
+
+        out = StringIO()
+        call_command('repair_workout_aggregates', stdout=out)
+        self.assertIn('Repaired the aggregates of 0 workout(s)', out.getvalue())
+
+class ExerciseHistoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user1', 'user1@test.com', 'password123')
+        self.other = User.objects.create_user('user2', 'user2@test.com', 'password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.squat = Exercise.objects.create(user=self.user, name='Squat')
+        self.url = f'/exercises/{self.squat.id}/history/'
+
+        # Monday 2024-01-01 and Wednesday 2024-01-03 share a week; two sessions on 2024-02-05
+        sessions = [
+            (date(2024, 1, 1), [(3, 5, 100)]),
+            (date(2024, 1, 3), [(5, 5, 110), (1, 3, 120)]),
+            (date(2024, 2, 5), [(1, 12, 80)]),
+            (date(2024, 2, 5), [(2, 5, None)]),
+        ]
+        for day, sets in sessions:
+            workout = Workout.objects.create(user=self.user, title='Legs', date=day, duration=60)
+            for order, (set_count, reps, weight) in enumerate(sets):
+                WorkoutExercise.objects.create(
+                    workout=workout, exercise=self.squat, sets=set_count, reps=reps, weight=weight, order=order
+                )
+
+    def get_points(self, query=''):
+        response = self.client.get(f'{self.url}{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_session_series(self):
+        """Test the per-session weight, estimated one-rep max and volume"""
+        data = self.get_points()
+
+        self.assertEqual(data['bucket'], 'session')
+        self.assertFalse(data['truncated'])
+        self.assertEqual(
+            [(p['date'], p['max_weight'], p['estimated_one_rep_max'], p['volume']) for p in data['points']],
+            [
+                ('2024-01-01', '100.00', '116.67', '1500.00'),
+                ('2024-01-03', '120.00', '132.00', '3110.00'),
+                ('2024-02-05', '80.00', '112.00', '960.00'),
+                ('2024-02-05', None, None, '0.00'),
+            ]
+        )
+
+    def test_high_rep_sets(self):
+        """Test that estimated maxes of valid high-rep sets fit the response"""
+        workout = Workout.objects.create(user=self.user, title='Legs', date=date(2024, 3, 1), duration=60)
+        WorkoutExercise.objects.create(workout=workout, exercise=self.squat, sets=1, reps=100000, weight='999.99')
+
+        point = self.get_points('?date_from=2024-03-01')['points'][0]
+        self.assertEqual(point['estimated_one_rep_max'], '3334299.99')
+        self.assertEqual(point['volume'], '99999000.00')
+
+    def test_buckets_aggregate_sessions(self):
+        """Test that day and week buckets merge sessions"""
+        data = self.get_points('?bucket=day')
+        self.assertEqual([p['sessions'] for p in data['points']], [1, 1, 2])
+        self.assertEqual(data['points'][-1]['volume'], '960.00')
+
+        data = self.get_points('?bucket=week&date_to=2024-01-31')
+        self.assertEqual(len(data['points']), 1)
+        week = data['points'][0]
+        self.assertEqual(
+            (week['date'], week['sessions'], week['max_weight'], week['volume']),
+            ('2024-01-01', 2, '120.00', '4610.00')
+        )
+
+    def test_point_cap_coarsens_bucket(self):
+        """Test that a series longer than max_points moves to a coarser bucket"""
+        data = self.get_points('?max_points=2')
+        self.assertEqual(data['bucket'], 'week')
+        self.assertEqual(len(data['points']), 2)
+
+        workout = Workout.objects.create(user=self.user, title='Old', date=date(2022, 6, 1), duration=30)
+        WorkoutExercise.objects.create(workout=workout, exercise=self.squat, sets=1, reps=1, weight=50)
+        data = self.get_points('?max_points=1')
+        self.assertEqual(data['bucket'], 'year')
+        self.assertTrue(data['truncated'])
+        self.assertEqual([p['date'] for p in data['points']], ['2024-01-01'])
+
+    def test_query_count_is_constant(self):
+        """Test that the series costs the same queries however long it is"""
+        with CaptureQueriesContext(connection) as short:
+            self.get_points('?date_to=2024-01-01')
+        with CaptureQueriesContext(connection) as full:
+            self.get_points()
+        self.assertEqual(len(short), len(full))
+
+    def test_invalid_parameters_and_isolation(self):
+        """Test that bad parameters are rejected and other users get a 404"""
+        for query in ['?bucket=hour', '?max_points=0', '?date_from=2024-02-01&date_to=2024-01-01']:
+            response = self.client.get(f'{self.url}{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        client = APIClient()
+        client.force_authenticate(user=self.other)
+        self.assertEqual(client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+class BenchmarkCommandTests(TestCase):
+    def seed(self):
+        call_command('seed_data', users=1, workouts=20, stdout=StringIO())
+        user = User.objects.get(username='seed-user-0')
+        return [
+            (workout.title, workout.date, workout.duration, workout.workout_exercises.count())
+            for workout in user.workouts.order_by('id')
+        ]
+
+    def test_seed_data_is_reproducible(self):
+        """Test that the same seed produces the same data, with summaries"""
+        data = self.seed()
+        self.assertEqual(len(data), 20)
+        self.assertTrue(DailySummary.objects.filter(user__username='seed-user-0').exists())
+
+        call_command('seed_data', users=0, clear=True, stdout=StringIO())
+        self.assertFalse(User.objects.filter(username='seed-user-0').exists())
+        self.assertEqual(self.seed(), data)
+
+    def test_benchmark_routes(self):
+        """Test that routes are driven as the seeded user without changing the data"""
+        self.seed()
+        counts = (Workout.objects.count(), WorkoutExercise.objects.count(), Comment.objects.count(), User.objects.count())
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            output = os.path.join(media_root, 'results.json')
+            call_command(
+                'benchmark_routes', requests=2, warmup=0, output=output, stdout=StringIO(),
+                route=['workout-list', 'workout-comments-list', 'job-download', 'metrics'],
+            )
+            with open(output) as handle:
+                results = json.load(handle)['results']
+
+        self.assertEqual(
+            set(results),
+            {'GET workout-list', 'POST workout-list', 'GET workout-comments-list', 'POST workout-comments-list',
+             'GET job-download', 'GET metrics'},
+        )
+        self.assertEqual(results['POST workout-list']['status'], [201])
+        self.assertEqual(results['GET metrics']['status'], [200])
+        self.assertEqual(results['GET job-download']['status'], [200])
+        self.assertGreater(results['GET workout-list']['queries'], 0)
+        self.assertEqual(
+            (Workout.objects.count(), WorkoutExercise.objects.count(), Comment.objects.count(), User.objects.count()),
+            counts,
+        )
+        self.assertFalse(AuthToken.objects.exists())
+
+    def test_benchmark_serialization(self):
+        """Test that the microbenchmark finds the fast path byte-identical on seeded data"""
+        self.seed()
+        out = StringIO()
+        call_command('benchmark_serialization', iterations=1, stdout=out)
+        self.assertIn('workout list expanded', out.getvalue())
+        self.assertIn('speedup=', out.getvalue())
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plan assertions target SQLite')
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class QueryPlanTests(TestCase):
+    """
+    Check that the list endpoints are served by the composite indexes on a
+    large dataset, i.e. that the plans use an index and need no sort step.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'user{i}', f'user{i}@test.com', 'password123')
+            for i in range(5)
+        ]
+        exercises = Exercise.objects.bulk_create([
+            Exercise(user=user, name=f'Exercise {i}')
+            for user in cls.users
+            for i in range(20)
+        ])
+        workouts = Workout.objects.bulk_create([
+            Workout(
+                user=user,
+                title=f'Workout {i}',
+                date=date(2020, 1, 1) + timedelta(days=i // 2),
+                duration=20 + i % 100
+            )
+            for user in cls.users
+            for i in range(400)
+        ])
+        WorkoutExercise.objects.bulk_create([
+            WorkoutExercise(workout=workout, exercise=exercises[order], sets=3, reps=10, order=order)
+            for workout in workouts
+            for order in range(3)
+        ])
+        Comment.objects.bulk_create([
+            Comment(workout=workout, user=workout.user, text='Nice')
+            for workout in workouts[:50]
+            for _ in range(4)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user = cls.users[0]
+        cls.workout = workouts[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get_plan(self, url, table):
+        """Return the query plan of the paginated query on `table` issued by `url`"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = next(
+            q['sql'] for q in context.captured_queries
+            if f'FROM "{table}"' in q['sql'] and 'ORDER BY' in q['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' '.join(row[-1] for row in cursor.fetchall()), response
+
+    def assertIndexScan(self, url, table, index):
+        plan, response = self.get_plan(url, table)
+        self.assertIn(index, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        return response
+
+    def test_workout_list_uses_index(self):
+        response = self.assertIndexScan('/workouts/?page_size=10', 'workouts_workout', 'workout_user_date_idx')
+        self.assertIndexScan(response.data['next'], 'workouts_workout', 'workout_user_date_idx')
+
+    def test_exercise_list_uses_index(self):
+        response = self.assertIndexScan('/exercises/?page_size=5', 'workouts_exercise', 'exercise_user_name_idx')
+        self.assertIndexScan(response.data['next'], 'workouts_exercise', 'exercise_user_name_idx')
+
+    def test_comment_list_uses_index(self):
+        response = self.assertIndexScan(
+            f'/workouts/{self.workout.id}/comments/?page_size=2',
+            'workouts_comment',
+            'comment_workout_created_idx'
+        )
+        self.assertIndexScan(response.data['next'], 'workouts_comment', 'comment_workout_created_idx')
+
+    def test_workout_exercise_list_uses_index(self):
+        self.assertIndexScan(
+            f'/workouts/{self.workout.id}/exercises/',
+            'workouts_workoutexercise',
+            'workoutexercise_order_idx'
+        )
+
+    def test_filtered_workout_list_uses_indexes(self):
+        self.assertIndexScan(
+            '/workouts/?date_from=2020-02-01&date_to=2020-03-01&page_size=10',
+            'workouts_workout',
+            'workout_user_date_idx'
+        )
+        exercise_id = self.workout.workout_exercises.first().exercise_id
+        plan, _ = self.get_plan(f'/workouts/?exercise={exercise_id}', 'workouts_workout')
+        self.assertIn('workoutexercise_exercise_idx', plan)
+        plan, _ = self.get_plan('/workouts/?min_duration=30&max_duration=32', 'workouts_workout')
+        self.assertIn('workout_user_duration_idx', plan)
+        # No index covers infix title matches on SQLite, but the scan stays
+        # within the user's workouts
+        self.assertIndexScan('/workouts/?title=orkout%201&page_size=10', 'workouts_workout', 'workout_user_date_idx')
+
+@skipUnless(connection.vendor == 'postgresql', 'Trigram indexes target PostgreSQL')
+class TitleIndexTests(TestCase):
+    def test_title_filter_has_trigram_index(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Workout._meta.db_table)
+        self.assertIn('workout_title_trgm_idx', constraints)
+        sql = str(filter_workouts(Workout.objects.all(), {'title': 'push'}).query)
+        self.assertIn('UPPER("workouts_workout"."title"::text) LIKE UPPER(', sql)
+
+@skipUnless(connection.vendor == 'sqlite', 'Connection pragmas target SQLite')
+class SQLiteConnectionTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @skipUnless('init_command' in connection.settings_dict['OPTIONS'], 'SQLite tuning is disabled')
+    def test_pragmas_are_applied_on_connect(self):
+        """Test that new connections wait for locks and use NORMAL sync"""
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), int(os.getenv('DJANGO_SQLITE_BUSY_TIMEOUT', '5000')))
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
@@ -1,43 +1,426 @@
+import codecs
+import hashlib
 from django.shortcuts import render
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, SAFE_METHODS
+from rest_framework.generics import GenericAPIView
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.shortcuts import get_object_or_404
-from .models import Workout, Exercise, WorkoutExercise, Comment
+from django.db import IntegrityError, transaction
+from .models import Workout, Exercise, WorkoutExercise, Comment, Tombstone
+from .pagination import WorkoutPagination, ExercisePagination, CommentPagination
 from .serializers import (
     WorkoutSerializer, 
+    WorkoutListSerializer,
     ExerciseSerializer, 
     WorkoutExerciseSerializer,
     AddExerciseToWorkoutSerializer,
-    CommentSerializer
+    CommentSerializer,
+    WorkoutStatsQuerySerializer,
+    PeriodTotalsSerializer,
+    PersonalBestSerializer,
+    ExerciseHistoryQuerySerializer,
+    ExerciseHistoryPointSerializer,
+    SyncQuerySerializer,
+    ExportQuerySerializer,
+    ImportFileSerializer,
+    SearchQuerySerializer,
+    ExerciseNameSerializer,
+    SearchWorkoutSerializer,
+    SearchWorkoutExerciseSerializer
 )
+from .caching import (
+    get_cache_stats,
+    invalidate_user_cache,
+    record_cache_access,
+    response_cache_key
+)
+from fitness_workout_tracker_api.instrumentation import escape, registry
+from fitness_workout_tracker_api.db_routers import end_replica_reads, pin_to_primary, start_replica_reads
+from .export import csv_rows, ndjson_rows
+from .fast_reads import FastJSONRenderer, get_plan
+from .filters import filter_workouts
+from .imports import import_workouts
+from .search import search
+from .stats import exercise_history, period_totals, personal_bests
+from .summaries import refresh_daily_summaries, update_workout_aggregates
+from .sync import InvalidSyncToken, get_changes
+
+class EagerLoadingViewMixin:
+    """
+    Applies the eager loading declared by the serializer class to every
+    queryset the view reads from (list and object lookups alike)
+    """
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        setup_eager_loading = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+        if setup_eager_loading is not None:
+            queryset = setup_eager_loading(queryset, request=self.request)
+        return queryset
+
+class ReplicaReadMixin:
+    """
+    Serves list and retrieve requests from a read replica (when configured)
+    and keeps the user on the primary for a while after they write
+    """
+    replica_actions = ['list', 'retrieve']
+    _replica_token = None
 
-class ExerciseViewSet(viewsets.ModelViewSet):
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                end_replica_reads(self._replica_token)
+                self._replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        # Runs after authentication, which always reads the primary
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and self.action in self.replica_actions:
+            self._replica_token = start_replica_reads(request.user.pk)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+class CachedResponseMixin:
+    """
+    Caches list and retrieve responses per user and per URL, and drops all
+    of the user's cached responses after any successful write. Behind
+    ConditionalGetMixin the key also includes the ETag of the request.
+    """
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout:
+            return handler(request, *args, **kwargs)
+
+        key = response_cache_key(
+            request.user.pk, self.basename, request.get_full_path(), getattr(self, 'etag', None) or ''
+        )
+        data = cache.get(key)
+        record_cache_access(self.basename, hit=data is not None)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            invalidate_user_cache(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified validators to list and retrieve responses
+    and answers matching conditional requests with 304 Not Modified.
+
+    Validators come from one `Count`/`Max('updated_at')` aggregate per
+    queryset returned by `get_validator_querysets`, so a 304 costs neither
+    loading nor serializing the rows. Lists also take the user's newest
+    `tombstone_model` deletion into account, since deleting a row does not
+    move `Max('updated_at')` forward.
+    """
+    tombstone_model = None
+    # Validator of the current request, for CachedResponseMixin
+    etag = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_validator_querysets(self):
+        queryset = self.get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return [queryset]
+
+    def get_validators(self, request):
+        try:
+            summaries = [
+                queryset.aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+                for queryset in self.get_validator_querysets()
+            ]
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup value; the regular handler turns it into a 404
+            return None, None
+        if not summaries[0]['count']:
+            # Let the regular handler answer (404 or an empty list)
+            return None, None
+        if self.action == 'list' and self.tombstone_model is not None:
+            deleted = Tombstone.objects.filter(user=request.user, model=self.tombstone_model)
+            summaries.append({'count': 0, **deleted.aggregate(last_modified=Max('deleted_at'))})
+
+        last_modified = max(s['last_modified'] for s in summaries if s['last_modified'])
+        fingerprint = '|'.join(
+            [request.get_full_path()]
+            + [f"{s['count']}:{s['last_modified'].isoformat() if s['last_modified'] else ''}" for s in summaries]
+        )
+        etag = 'W/"%s"' % hashlib.md5(fingerprint.encode()).hexdigest()
+        return etag, int(last_modified.timestamp())
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        self.etag = etag
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+class FastReadMixin:
+    """
+    With FAST_READS, list and retrieve build their responses from
+    `.values()` rows through a plan compiled from the serializer class (see
+    fast_reads.py) and render JSON with FastJSONRenderer. Responses are
+    byte-identical to the serializer path. Object permissions are not
+    checked, so views using this must not rely on them.
+    """
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not settings.FAST_READS:
+            return renderers
+        return [FastJSONRenderer() if isinstance(renderer, JSONRenderer) else renderer for renderer in renderers]
+
+    def get_values_queryset(self):
+        # Filter backends only: the plan replaces the serializer's eager loading
+        return GenericAPIView.filter_queryset(self, self.get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READS:
+            return super().list(request, *args, **kwargs)
+
+        plan = get_plan(self.get_serializer_class(), request)
+        queryset = self.get_values_queryset()
+        page = self.paginator.get_page_queryset(queryset, request, view=self) if self.paginator else None
+        if page is None:
+            return Response([plan.represent(row) for row in plan.fetch(queryset)])
+
+        # The paginator builds its cursors from the raw ordering values
+        ordering = [field.lstrip('-') for field in self.paginator.ordering]
+        rows = self.paginator.set_page(plan.fetch(page, extra=ordering))
+        return self.get_paginated_response([plan.represent(row) for row in rows])
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_READS:
+            return super().retrieve(request, *args, **kwargs)
+
+        plan = get_plan(self.get_serializer_class(), request)
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        try:
+            rows = plan.fetch(self.get_values_queryset().filter(**lookup))
+        except (TypeError, ValueError, ValidationError):
+            rows = []
+        if not rows:
+            raise Http404
+        return Response(plan.represent(rows[0]))
+
+class ExerciseViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, FastReadMixin, EagerLoadingViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing exercises
     """
     serializer_class = ExerciseSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ExercisePagination
+    tombstone_model = Tombstone.EXERCISE
 
     def get_queryset(self):
         return Exercise.objects.filter(user=self.request.user)
 
-class WorkoutViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Deleting an exercise cascades to its sets on every day it was used
+        dates = set(instance.workout_exercises.values_list('workout__date', flat=True))
+        workout_ids = list(
+            Workout.objects.filter(workout_exercises__exercise=instance).values_list('id', flat=True).distinct()
+        )
+        Tombstone.record(
+            self.request.user,
+            Tombstone.WORKOUT_EXERCISE,
+            instance.workout_exercises.values_list('id', flat=True)
+        )
+        Tombstone.record(self.request.user, Tombstone.EXERCISE, [instance.id])
+        instance.delete()
+        update_workout_aggregates(Workout.objects.filter(id__in=workout_ids))
+        Workout.objects.filter(id__in=workout_ids).update(updated_at=timezone.now())
+        refresh_daily_summaries(self.request.user, dates)
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """
+        The exercise's heaviest weight, estimated one-rep max and volume over
+        time, per session or per day/week/month/year, for progression charts
+        """
+        exercise = self.get_object()
+        query = ExerciseHistoryQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        history = exercise_history(
+            exercise,
+            params['bucket'],
+            params['max_points'],
+            params.get('date_from'),
+            params.get('date_to')
+        )
+        return Response({
+            'exercise_id': exercise.id,
+            'exercise_name': exercise.name,
+            'bucket': history['bucket'],
+            'truncated': history['truncated'],
+            'date_from': params.get('date_from'),
+            'date_to': params.get('date_to'),
+            'points': ExerciseHistoryPointSerializer(history['points'], many=True).data,
+        })
+
+class WorkoutViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, FastReadMixin, EagerLoadingViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing workouts
     """
     serializer_class = WorkoutSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = WorkoutPagination
+    tombstone_model = Tombstone.WORKOUT
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return WorkoutListSerializer
+        return WorkoutSerializer
 
     def get_queryset(self):
-        return Workout.objects.filter(user=self.request.user)
+        queryset = Workout.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = filter_workouts(queryset, self.request.query_params)
+        return queryset
+
+    def get_validator_querysets(self):
+        # Nested workout exercises render the exercise name, so renaming an
+        # exercise must change the workout validators too
+        return super().get_validator_querysets() + [Exercise.objects.filter(user=self.request.user)]
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        workout = serializer.save()
+        refresh_daily_summaries(self.request.user, [workout.date])
 
-class WorkoutExerciseViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_date = serializer.instance.date
+        workout = serializer.save()
+        refresh_daily_summaries(self.request.user, [previous_date, workout.date])
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        Tombstone.record(
+            self.request.user,
+            Tombstone.WORKOUT_EXERCISE,
+            instance.workout_exercises.values_list('id', flat=True)
+        )
+        Tombstone.record(self.request.user, Tombstone.COMMENT, instance.comments.values_list('id', flat=True))
+        Tombstone.record(self.request.user, Tombstone.WORKOUT, [instance.id])
+        instance.delete()
+        refresh_daily_summaries(self.request.user, [instance.date])
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Weekly or monthly training totals and per-exercise personal bests,
+        optionally limited to a date range
+        """
+        query = WorkoutStatsQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        date_from = params.get('date_from')
+        date_to = params.get('date_to')
+        totals = period_totals(request.user, params['period'], date_from, date_to)
+        bests = personal_bests(request.user, date_from, date_to)
+        return Response({
+            'period': params['period'],
+            'date_from': date_from,
+            'date_to': date_to,
+            'totals': PeriodTotalsSerializer(totals, many=True).data,
+            'personal_bests': PersonalBestSerializer(bests, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Download the full workout history with exercises and comments as
+        NDJSON (`?type=ndjson`, one workout per line) or CSV (`?type=csv`).
+        The body is streamed while it is read from the database.
+        """
+        query = ExportQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        if query.validated_data['type'] == 'csv':
+            rows, content_type, extension = csv_rows(request.user), 'text/csv', 'csv'
+        else:
+            rows, content_type, extension = ndjson_rows(request.user), 'application/x-ndjson', 'ndjson'
+        response = StreamingHttpResponse(rows, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="workouts.{extension}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_history(self, request):
+        """
+        Load workouts from an uploaded `file` in the export formats (NDJSON
+        or CSV, taken from `type` or the file extension). Exercises are
+        matched by name and created when missing. Invalid workouts are
+        skipped and reported by line.
+        """
+        upload = ImportFileSerializer(data=request.data)
+        if not upload.is_valid():
+            return Response(upload.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = upload.validated_data
+        lines = codecs.iterdecode(params['file'], 'utf-8-sig')
+        return Response(import_workouts(request.user, lines, params['type']))
+
+class WorkoutExerciseViewSet(ReplicaReadMixin, CachedResponseMixin, EagerLoadingViewMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_serializer_class(self):
-        if self.action in ['create', 'update', 'partial_update']:
+        if self.action in ['create', 'update', 'partial_update', 'bulk']:
             return AddExerciseToWorkoutSerializer
         return WorkoutExerciseSerializer
 
@@ -58,15 +441,18 @@ class WorkoutExerciseViewSet(viewsets.ModelViewSet):
         
         if serializer.is_valid():
             exercise = Exercise.objects.get(id=serializer.validated_data['exercise_id'])
-            workout_exercise = WorkoutExercise.objects.create(
-                workout=workout,
-                exercise=exercise,
-                sets=serializer.validated_data['sets'],
-                reps=serializer.validated_data['reps'],
-                weight=serializer.validated_data.get('weight'),
-                notes=serializer.validated_data.get('notes', ''),
-                order=serializer.validated_data.get('order', 0)
-            )
+            with transaction.atomic():
+                workout_exercise = WorkoutExercise.objects.create(
+                    workout=workout,
+                    exercise=exercise,
+                    sets=serializer.validated_data['sets'],
+                    reps=serializer.validated_data['reps'],
+                    weight=serializer.validated_data.get('weight'),
+                    notes=serializer.validated_data.get('notes', ''),
+                    order=serializer.validated_data.get('order', 0)
+                )
+                refresh_daily_summaries(request.user, [workout.date])
+                workout.touch(exercise_count=1, total_volume=workout_exercise.volume)
             return Response(
                 WorkoutExerciseSerializer(workout_exercise).data,
                 status=status.HTTP_201_CREATED
@@ -82,13 +468,17 @@ class WorkoutExerciseViewSet(viewsets.ModelViewSet):
         
         if serializer.is_valid():
             exercise = Exercise.objects.get(id=serializer.validated_data['exercise_id'])
+            old_volume = workout_exercise.volume
             workout_exercise.exercise = exercise
             workout_exercise.sets = serializer.validated_data['sets']
             workout_exercise.reps = serializer.validated_data['reps']
             workout_exercise.weight = serializer.validated_data.get('weight')
             workout_exercise.notes = serializer.validated_data.get('notes', '')
             workout_exercise.order = serializer.validated_data.get('order', 0)
-            workout_exercise.save()
+            with transaction.atomic():
+                workout_exercise.save()
+                refresh_daily_summaries(request.user, [workout_exercise.workout.date])
+                workout_exercise.workout.touch(total_volume=workout_exercise.volume - old_volume)
             
             return Response(
                 WorkoutExerciseSerializer(workout_exercise).data,
@@ -96,6 +486,65 @@ class WorkoutExerciseViewSet(viewsets.ModelViewSet):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post', 'put'])
+    def bulk(self, request, workout_pk=None):
+        """
+        Add a list of exercises to the workout (POST), or replace all of the
+        workout's exercises with the list (PUT), in a single transaction
+        """
+        workout = get_object_or_404(Workout, id=workout_pk, user=request.user)
+        replace = request.method == 'PUT'
+        context = self.get_serializer_context()
+        context.update({'workout': workout, 'replace': replace})
+        serializer = self.get_serializer(data=request.data, many=True, context=context)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        exercises = serializer.exercises
+        try:
+            with transaction.atomic():
+                if replace:
+                    replaced = WorkoutExercise.objects.filter(workout=workout)
+                    Tombstone.record(
+                        request.user,
+                        Tombstone.WORKOUT_EXERCISE,
+                        replaced.values_list('id', flat=True)
+                    )
+                    replaced.delete()
+                workout_exercises = WorkoutExercise.objects.bulk_create([
+                    WorkoutExercise(
+                        workout=workout,
+                        exercise=exercises[item['exercise_id']],
+                        sets=item['sets'],
+                        reps=item['reps'],
+                        weight=item.get('weight'),
+                        notes=item.get('notes', ''),
+                        order=item.get('order', 0)
+                    )
+                    for item in serializer.validated_data
+                ])
+                refresh_daily_summaries(request.user, [workout.date])
+                if replace:
+                    update_workout_aggregates(Workout.objects.filter(pk=workout.pk))
+                    workout.touch()
+                else:
+                    workout.touch(
+                        exercise_count=len(workout_exercises),
+                        total_volume=sum(entry.volume for entry in workout_exercises)
+                    )
+        except IntegrityError:
+            # Another request took an (exercise, order) slot after validation;
+            # validating again reports it like any other duplicate
+            serializer = self.get_serializer(data=request.data, many=True, context=context)
+            if serializer.is_valid():
+                raise
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            WorkoutExerciseSerializer(workout_exercises, many=True).data,
+            status=status.HTTP_200_OK if replace else status.HTTP_201_CREATED
+        )
+
     def destroy(self, request, workout_pk=None, pk=None):
         """
         Remove an exercise from the workout
@@ -106,15 +555,21 @@ class WorkoutExerciseViewSet(viewsets.ModelViewSet):
             id=pk,
             workout__user=request.user
         )
-        workout_exercise.delete()
+        with transaction.atomic():
+            Tombstone.record(request.user, Tombstone.WORKOUT_EXERCISE, [workout_exercise.id])
+            workout_exercise.delete()
+            refresh_daily_summaries(request.user, [workout_exercise.workout.date])
+            workout_exercise.workout.touch(exercise_count=-1, total_volume=-workout_exercise.volume)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class WorkoutCommentViewSet(viewsets.ModelViewSet):
+class WorkoutCommentViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, FastReadMixin, EagerLoadingViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing workout comments
     """
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CommentPagination
+    tombstone_model = Tombstone.COMMENT
 
     def get_queryset(self):
         workout = get_object_or_404(
@@ -130,4 +585,113 @@ class WorkoutCommentViewSet(viewsets.ModelViewSet):
             id=self.kwargs['workout_pk'],
             user=self.request.user
         )
-        serializer.save(workout=workout, user=self.request.user)
+        with transaction.atomic():
+            serializer.save(workout=workout, user=self.request.user)
+            workout.touch(comment_count=1)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+        serializer.instance.workout.touch()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        Tombstone.record(self.request.user, Tombstone.COMMENT, [instance.id])
+        instance.delete()
+        instance.workout.touch(comment_count=-1)
+
+class SyncViewSet(viewsets.GenericViewSet):
+    """
+    Incremental sync of workouts, exercises, workout exercises, comments
+    and deletions for offline clients
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        """
+        Return the changes since `?since=<timestamp>` (or everything when
+        omitted), or continue from a `?token=` returned by a previous call
+        """
+        query = SyncQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        try:
+            changes = get_changes(
+                request.user,
+                since=params.get('since'),
+                token=params.get('token'),
+                limit=params.get('limit')
+            )
+        except InvalidSyncToken as exc:
+            return Response({'token': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes)
+
+class SearchViewSet(viewsets.GenericViewSet):
+    """
+    Ranked full-text search over the user's exercises, workouts and workout
+    exercise notes, and exercise name autocomplete
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        """
+        Return the best matches for every word of `?q=`, per type (or only
+        `?type=`). With `?prefix=true` the last word may be incomplete and
+        only exercise names are matched, for autocomplete.
+        """
+        query = SearchQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        user = request.user
+        if params['prefix']:
+            exercises = search(
+                'exercises', Exercise.objects.only('id', 'name'), user, params['q'], params['limit'], prefix=True
+            )
+            return Response({'exercises': ExerciseNameSerializer(exercises, many=True).data})
+
+        searches = {
+            'exercises': (Exercise.objects.all(), ExerciseSerializer),
+            'workouts': (Workout.objects.all(), SearchWorkoutSerializer),
+            'workout_exercises': (WorkoutExercise.objects.select_related('exercise'), SearchWorkoutExerciseSerializer),
+        }
+        results = {}
+        for name, (queryset, serializer_class) in searches.items():
+            if params.get('type', name) == name:
+                objects = search(name, queryset, user, params['q'], params['limit'])
+                results[name] = serializer_class(objects, many=True).data
+        return Response(results)
+
+class CacheStatsView(APIView):
+    """
+    Response cache hit and miss counters per resource, for monitoring
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_cache_stats())
+
+class MetricsView(APIView):
+    """
+    Request and response cache metrics of this process in the Prometheus
+    text format
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        lines = [
+            '# HELP response_cache_requests_total Response cache lookups by resource and outcome.',
+            '# TYPE response_cache_requests_total counter',
+        ]
+        for resource, counts in get_cache_stats().items():
+            for outcome, count in counts.items():
+                lines.append(
+                    f'response_cache_requests_total{{resource="{escape(resource)}",outcome="{outcome}"}} {count}'
+                )
+        return HttpResponse(
+            registry.render() + '\n'.join(lines) + '\n',
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )